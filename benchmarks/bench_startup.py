@@ -0,0 +1,132 @@
+"""
+Measures the cold-start time of the data-provider:
+- the import time of the package and of its main classes,
+- the time for the debiai-data-provider command to serve a small project.
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from tempfile import TemporaryDirectory
+
+ROOT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(statement: str) -> float:
+    # A new interpreter for each run, to measure a cold import
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True, cwd=ROOT_FOLDER)
+    return time.perf_counter() - start
+
+
+def get_free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_bind(config_path: str) -> float:
+    port = get_free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "debiai_data_provider.cli",
+            config_path,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+        ],
+        cwd=ROOT_FOLDER,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        # Wait for the server to answer
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("The data-provider stopped before serving")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/info", timeout=1)
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def create_config(folder: str) -> str:
+    import pandas as pd
+
+    pd.DataFrame(
+        {
+            "sample_id": [f"s{i}" for i in range(1000)],
+            "class": ["A", "B"] * 500,
+            "value": range(1000),
+        }
+    ).to_parquet(os.path.join(folder, "data.parquet"))
+
+    config_path = os.path.join(folder, "config.json")
+    with open(config_path, "w") as config_file:
+        json.dump(
+            {
+                "projects": [
+                    {
+                        "parquet_path": "data.parquet",
+                        "sample_id_column_name": "sample_id",
+                    }
+                ]
+            },
+            config_file,
+        )
+    return config_path
+
+
+def report(name: str, durations: list):
+    print(
+        f"{name:<40} median {statistics.median(durations) * 1000:8.1f} ms"
+        + f"   min {min(durations) * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    report(
+        "import debiai_data_provider",
+        [measure_import("import debiai_data_provider") for _ in range(args.runs)],
+    )
+    report(
+        "import DataProvider, DebiAIProject",
+        [
+            measure_import(
+                "from debiai_data_provider import DataProvider, DebiAIProject"
+            )
+            for _ in range(args.runs)
+        ],
+    )
+
+    with TemporaryDirectory() as temp_dir:
+        config_path = create_config(temp_dir)
+        report(
+            "debiai-data-provider serving /info",
+            [measure_bind(config_path) for _ in range(args.runs)],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,37 @@
-from debiai_data_provider.data_provider import DataProvider
-from debiai_data_provider.data_provider import DebiAIProject
-from debiai_data_provider.providers.parquet_data_provider import ParquetDataProvider
+from typing import TYPE_CHECKING
+
+# The public classes are imported on first access, so that importing the
+# package does not load pandas, rich or the providers dependencies
+_LAZY_IMPORTS = {
+    "DataProvider": "debiai_data_provider.data_provider",
+    "DebiAIProject": "debiai_data_provider.models.project",
+    "ParquetDataProvider": "debiai_data_provider.providers.parquet_data_provider",
+    "SQLiteDataProvider": "debiai_data_provider.providers.sql_data_provider",
+    "TextDataProvider": "debiai_data_provider.providers.text_data_provider",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+if TYPE_CHECKING:
+    from debiai_data_provider.data_provider import DataProvider
+    from debiai_data_provider.models.project import DebiAIProject
+    from debiai_data_provider.providers.parquet_data_provider import (
+        ParquetDataProvider,
+    )
+    from debiai_data_provider.providers.sql_data_provider import SQLiteDataProvider
+    from debiai_data_provider.providers.text_data_provider import TextDataProvider
+
+
+def __getattr__(name: str):
+    if name in _LAZY_IMPORTS:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -22,6 +22,22 @@ def start_api_server(data_provider: DataProvider, host, port):
         allow_headers=["*"],
     )
 
+    if data_provider.admission_controller.enabled:
+        from debiai_data_provider.controller.middleware import (
+            AdmissionControlMiddleware,
+        )
+
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            admission_controller=data_provider.admission_controller,
+        )
+
+    if data_provider.trace_exporters:
+        from debiai_data_provider.controller.middleware import TracingMiddleware
+
+        # Outermost, the request span includes the admission queue
+        app.add_middleware(TracingMiddleware, tracer=data_provider.tracer)
+
     app.state.data_provider = data_provider
 
     app.include_router(controller_router)
@@ -0,0 +1,36 @@
+import argparse
+from typing import List, Optional
+from debiai_data_provider.version import VERSION
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="debiai-data-provider",
+        description="Start a DebiAI data-provider serving the projects of a config file",
+    )
+    parser.add_argument("config", help="Path to the .json, .yaml or .yml config file")
+    parser.add_argument("--host", help="Host of the API server, overrides the config")
+    parser.add_argument(
+        "--port", type=int, help="Port of the API server, overrides the config"
+    )
+    parser.add_argument(
+        "--version", action="version", version=f"debiai-data-provider {VERSION}"
+    )
+    args = parser.parse_args(argv)
+
+    # Imported after the arguments parsing so that --help and --version stay fast
+    from debiai_data_provider.config import load_config, create_data_provider
+
+    config = load_config(args.config)
+    if args.host:
+        config.server.host = args.host
+    if args.port:
+        config.server.port = args.port
+
+    # The server starts right away, projects are served as soon as they are loaded
+    data_provider = create_data_provider(config, wait=False)
+    data_provider.start_server(host=config.server.host, port=config.server.port)
+
+
+if __name__ == "__main__":
+    main()
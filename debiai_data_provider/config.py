@@ -0,0 +1,158 @@
+import os
+import json
+from functools import partial
+from pathlib import Path
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from debiai_data_provider.providers.parquet_data_provider import (
+    ParquetDataProviderConfig,
+)
+
+
+class ServerConfig(BaseModel):
+    host: str = Field("0.0.0.0", description="Host of the API server")
+    port: int = Field(8000, description="Port of the API server")
+    max_sample_id_by_request: int = Field(
+        10000, description="Maximum number of sample IDs in a single request"
+    )
+    max_sample_data_by_request: int = Field(
+        2000, description="Maximum number of sample data in a single request"
+    )
+    max_result_by_request: int = Field(
+        5000, description="Maximum number of results in a single request"
+    )
+    max_results_cache_memory: Optional[int] = Field(
+        128 * 1024 * 1024,
+        description="Memory budget in bytes of the model results cache of each "
+        + "project, the parquet projects drop the results of a modified model file",
+    )
+    prefetch_blocks: bool = Field(
+        False, description="Prepare the blocks of the served sample IDs in background"
+    )
+    auto_tune_limits: bool = Field(
+        False, description="Advertise request limits tuned for each project"
+    )
+    max_concurrent_requests: Optional[int] = Field(
+        None,
+        description="Maximum number of data, blocks and results requests running "
+        + "at the same time, the next ones are queued",
+    )
+    route_concurrency_limits: Optional[Dict[str, int]] = Field(
+        None,
+        description="Maximum number of running requests by route group: "
+        + "dataIdList, blocks or results",
+    )
+    max_queued_requests: int = Field(
+        100, description="Maximum number of requests waiting for a concurrency limit"
+    )
+    queue_timeout: float = Field(
+        30, description="Seconds a request can wait for a concurrency limit"
+    )
+    request_timeout: Optional[float] = Field(
+        None, description="Seconds after which a blocks or results request is cancelled"
+    )
+    overview_max_age: float = Field(
+        60,
+        description="Seconds after which the cached overview of a project "
+        + "without version is refreshed",
+    )
+    trace_file: Optional[str] = Field(
+        None, description="JSON Lines file where the spans of the requests are appended"
+    )
+    trace_memory_spans: int = Field(
+        0, description="Number of the last spans served by /diagnostics/traces"
+    )
+    loading_workers: Optional[int] = Field(
+        None, description="Number of projects loaded in parallel at startup"
+    )
+
+
+class DataProviderConfig(BaseModel):
+    server: ServerConfig = Field(
+        default_factory=ServerConfig, description="Data-provider server parameters"
+    )
+    projects: List[ParquetDataProviderConfig] = Field(
+        default_factory=list, description="Parquet projects to expose"
+    )
+
+
+def load_config(config_path: str) -> DataProviderConfig:
+    """
+    Loads a data-provider configuration from a JSON or YAML file.
+    Relative project paths, including the cache folders, are resolved
+    from the configuration file folder.
+
+    Parameters:
+        config_path (str): Path to the .json, .yaml or .yml configuration file.
+
+    Returns:
+        DataProviderConfig: The validated configuration.
+    """
+    with open(config_path, "r", encoding="utf-8") as config_file:
+        if config_path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError(
+                    "PyYAML is required to load YAML configuration files, "
+                    + "install it with: pip install pyyaml"
+                )
+
+            config_dict = yaml.safe_load(config_file)
+        else:
+            config_dict = json.load(config_file)
+
+    config = DataProviderConfig(**(config_dict or {}))
+
+    config_folder = os.path.dirname(os.path.abspath(config_path))
+    for project in config.projects:
+        project.parquet_path = os.path.join(config_folder, project.parquet_path)
+        if project.results_parquet_folder_path:
+            project.results_parquet_folder_path = os.path.join(
+                config_folder, project.results_parquet_folder_path
+            )
+        if project.cache_dir:
+            project.cache_dir = os.path.join(config_folder, project.cache_dir)
+
+    return config
+
+
+def create_data_provider(config: DataProviderConfig, wait: bool = True):
+    """
+    Creates a DataProvider exposing the projects of a configuration,
+    the projects are loaded in parallel.
+
+    Parameters:
+        config (DataProviderConfig): The data-provider configuration.
+        wait (bool): Wait for the projects to be loaded, otherwise they are
+            added to the data-provider in the background as they are loaded.
+
+    Returns:
+        DataProvider: The data-provider, ready to be started.
+    """
+    from debiai_data_provider.data_provider import DataProvider
+    from debiai_data_provider.providers.parquet_data_provider import (
+        ParquetDataProvider,
+    )
+
+    server_parameters = dict(config.server)
+    server_parameters.pop("host")
+    server_parameters.pop("port")
+    loading_workers = server_parameters.pop("loading_workers")
+    data_provider = DataProvider(**server_parameters)
+
+    project_loaders = {}
+    for project_config in config.projects:
+        name = project_config.name or Path(project_config.parquet_path).stem
+        if name in project_loaders:
+            raise ValueError(f"A project with the name '{name}' already exists.")
+
+        project_loaders[name] = partial(
+            ParquetDataProvider, **dict(project_config), verbose=False
+        )
+
+    data_provider.add_projects_in_parallel(
+        project_loaders, max_workers=loading_workers, wait=wait
+    )
+
+    return data_provider
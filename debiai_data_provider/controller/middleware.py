@@ -0,0 +1,99 @@
+import time
+import asyncio
+from debiai_data_provider.utils.admission import AdmissionController, AdmissionRejected
+from debiai_data_provider.utils.tracing import Tracer, use_tracer
+
+
+def hold_admission(scope, computation: asyncio.Future):
+    """
+    Keeps the admission slots of a request until its computation finishes,
+    for the requests answered before, when the client disconnected or timed out:
+    their computation keeps its thread until its next cancellation check.
+    """
+    held_computations = scope.get("state", {}).get("held_computations")
+    if held_computations is not None:
+        held_computations.append(computation)
+
+
+class AdmissionControlMiddleware:
+    """
+    Applies the concurrency limits of the heavy routes before they are
+    dispatched, the rejected requests get a 429 or 503 status with a
+    Retry-After header.
+    """
+
+    def __init__(self, app, admission_controller: AdmissionController):
+        self.app = app
+        self.admission_controller = admission_controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limits = self.admission_controller.get_limits(scope["path"])
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.admission_controller.acquire(limits)
+        except AdmissionRejected as e:
+            from fastapi.responses import JSONResponse
+
+            response = JSONResponse(
+                {"detail": e.reason},
+                status_code=e.status_code,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        start_time = time.monotonic()
+        held_computations = []
+        scope.setdefault("state", {})["held_computations"] = held_computations
+
+        def release(_=None):
+            self.admission_controller.release(limits, time.monotonic() - start_time)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            running = [
+                computation
+                for computation in held_computations
+                if not computation.done()
+            ]
+            if running:
+                asyncio.gather(*running, return_exceptions=True).add_done_callback(
+                    release
+                )
+            else:
+                release()
+
+
+class TracingMiddleware:
+    """
+    Opens the root span of each request, the spans of the data path are its children.
+    The spans of the request are exported by the tracer of its DataProvider.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with use_tracer(self.tracer), self.tracer.span(
+            "http.request", method=scope["method"], path=scope["path"]
+        ) as request_span:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("statusCode", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
@@ -1,4 +1,8 @@
-from fastapi import APIRouter, Depends, Request
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from pydantic_core import to_json
 from typing import List, Dict, Optional, Union
 from fastapi import Path, Query, Body
 from debiai_data_provider.models.debiai import (
@@ -11,14 +15,101 @@ from debiai_data_provider.models.debiai import (
 )
 from debiai_data_provider.version import VERSION
 from debiai_data_provider.data_provider import DataProvider
+from debiai_data_provider.utils.cancellation import (
+    CancellationToken,
+    RequestCancelled,
+    RequestTimeout,
+)
+from debiai_data_provider.controller.middleware import hold_admission
+from debiai_data_provider.utils.tracing import span
 
 router = APIRouter()
 
+# Status of the requests cancelled because their client disconnected
+CLIENT_CLOSED_REQUEST = 499
+
 
 def get_data_provider(request: Request):
     return request.app.state.data_provider
 
 
+async def wait_for_disconnect(request: Request):
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+def _encode_unknown(value):
+    # The numpy scalars of the object columns, the other values as strings
+    import numpy as np
+
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def encode_json(content, **attributes) -> Response:
+    """
+    Encodes a blocks or results response in the thread computing it,
+    instead of validating it with the route response model on the event loop.
+    The NaN values are sent as null, like with the response models.
+    """
+    with span("encode_response", **attributes):
+        return Response(
+            to_json(content, inf_nan_mode="null", fallback=_encode_unknown),
+            media_type="application/json",
+        )
+
+
+async def run_cancellable(
+    request: Request, data_provider: DataProvider, function, *args, **kwargs
+):
+    """
+    Runs a blocks or results computation in the threadpool, cancelled
+    when the client disconnects or when the request times out.
+    The function returns the encoded response.
+    """
+    cancellation = CancellationToken(
+        data_provider.request_timeout, asyncio.get_running_loop()
+    )
+    computation = asyncio.ensure_future(
+        run_in_threadpool(function, *args, cancellation=cancellation, **kwargs)
+    )
+    # A cancelled computation stops at its next check, its result is dropped
+    computation.add_done_callback(
+        lambda future: future.cancelled() or future.exception()
+    )
+    disconnection = asyncio.ensure_future(wait_for_disconnect(request))
+
+    try:
+        done, _ = await asyncio.wait(
+            {computation, disconnection},
+            timeout=cancellation.remaining(),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        disconnection.cancel()
+
+    if computation in done:
+        try:
+            return computation.result()
+        except RequestTimeout as e:
+            raise HTTPException(status_code=504, detail=e.reason)
+        except RequestCancelled:
+            return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+    # Answered before the computation stops, it keeps the request slot until then
+    hold_admission(request.scope, computation)
+
+    if disconnection in done:
+        cancellation.cancel()
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+    cancellation.expire()
+    raise HTTPException(status_code=504, detail=cancellation.reason)
+
+
 # Info routes
 @router.get("/info", response_model=InfoResponse, tags=["Info"])
 def get_info(data_provider: DataProvider = Depends(get_data_provider)):
@@ -34,8 +125,8 @@ def get_info(data_provider: DataProvider = Depends(get_data_provider)):
 # Project routes
 @router.get("/projects", response_model=Dict[str, ProjectOverview], tags=["Projects"])
 def get_projects(data_provider: DataProvider = Depends(get_data_provider)):
-    debiai_projects = data_provider.projects
-    return {project.project_name: project.get_overview() for project in debiai_projects}
+    # Cached overviews, refreshed in the background when a project changes
+    return data_provider.get_overviews()
 
 
 @router.get("/projects/{projectId}", response_model=ProjectDetails, tags=["Projects"])
@@ -55,6 +146,18 @@ def delete_project(
     return {"message": "Project deleted"}
 
 
+@router.post(
+    "/projects/{projectId}/reload",
+    response_model=ProjectOverview,
+    tags=["Projects"],
+)
+def reload_project(
+    projectId: str = Path(..., min_length=1, example="Project 1"),
+    data_provider: DataProvider = Depends(get_data_provider),
+):
+    return data_provider.reload_project(projectId)
+
+
 # Data routes
 @router.post(
     "/projects/{projectId}/dataIdList",
@@ -77,7 +180,8 @@ async def get_data_id_list(
     try:
         body_json = await request.json()
         if body_json:
-            return project.get_data_id_list(
+            return await run_in_threadpool(
+                project.get_data_id_list,
                 body_json.get("from"),
                 body_json.get("to"),
                 body_json.get("analysis", {}).get("id"),
@@ -88,7 +192,10 @@ async def get_data_id_list(
         # No JSON
         pass
 
-    return project.get_data_id_list(from_, to, analysisId, analysisStart, analysisEnd)
+    # Run in the threadpool so that identical concurrent requests can be coalesced
+    return await run_in_threadpool(
+        project.get_data_id_list, from_, to, analysisId, analysisStart, analysisEnd
+    )
 
 
 @router.post(
@@ -102,17 +209,41 @@ async def get_data_id_list(
     ],
     tags=["Data"],
 )
-def get_data(
+async def get_data(
+    request: Request,
     projectId: str = Path(..., min_length=1, example="Project 1"),
     analysisId: Optional[str] = Query(None),
     analysisStart: Optional[bool] = Query(None),
     analysisEnd: Optional[bool] = Query(None),
+    columnar: Optional[bool] = Query(False),
+    dictionaryEncoding: Optional[bool] = Query(False),
     sampleIds: List[Union[str, int, float]] = Body(..., embed=True),
     data_provider: DataProvider = Depends(get_data_provider),
 ):
     project = data_provider._get_project_to_expose(projectId)
-    response = {"data": project.get_data_from_ids(sampleIds), "dataMap": True}
-    return response
+
+    def get_blocks(cancellation: CancellationToken) -> Response:
+        if columnar:
+            # One ID array and one value array per column
+            data = project.get_columnar_data_from_ids(
+                sampleIds,
+                analysisId,
+                analysisStart,
+                analysisEnd,
+                dictionary_encoding=bool(dictionaryEncoding),
+                cancellation=cancellation,
+            )
+            return encode_json(
+                {"data": data, "dataMap": False, "columnar": True},
+                nbSamples=len(sampleIds),
+            )
+
+        data = project.get_data_from_ids(
+            sampleIds, analysisId, analysisStart, analysisEnd, cancellation=cancellation
+        )
+        return encode_json({"data": data, "dataMap": True}, nbSamples=len(sampleIds))
+
+    return await run_cancellable(request, data_provider, get_blocks)
 
 
 # Model routes
@@ -129,6 +260,45 @@ def get_models(
     return project.get_models()
 
 
+@router.post(
+    "/projects/{projectId}/models/refresh",
+    response_model=Dict[str, List[str]],
+    tags=["Models"],
+)
+def refresh_models(
+    projectId: str = Path(..., min_length=1, example="Project 1"),
+    data_provider: DataProvider = Depends(get_data_provider),
+):
+    return data_provider.refresh_models(projectId)
+
+
+@router.post(
+    "/projects/{projectId}/models/results",
+    response_model=Dict[
+        str, Dict[Union[str, int], List[Union[str, int, float, bool, None]]]
+    ],
+    tags=["Models"],
+)
+async def get_models_results(
+    request: Request,
+    projectId: str = Path(..., min_length=1, example="Project 1"),
+    modelIds: List[str] = Body(..., embed=True),
+    sampleIds: List[Union[str, int, float]] = Body(..., embed=True),
+    data_provider: DataProvider = Depends(get_data_provider),
+):
+    # The results of several models in one request, by model ID
+    project = data_provider._get_project_to_expose(projectId)
+
+    def get_results(cancellation: CancellationToken) -> Response:
+        return encode_json(
+            project.get_models_results(modelIds, sampleIds, cancellation=cancellation),
+            nbModels=len(modelIds),
+            nbSamples=len(sampleIds),
+        )
+
+    return await run_cancellable(request, data_provider, get_results)
+
+
 @router.get(
     "/projects/{projectId}/models/{modelId}",
     response_model=List[Union[str, int]],
@@ -159,17 +329,25 @@ def get_models_evaluated_data_id_list(
 
 @router.post(
     "/projects/{projectId}/models/{modelId}/results",
-    response_model=Dict[Union[str, int], List[Union[str, int, float, bool]]],
+    response_model=Dict[Union[str, int], List[Union[str, int, float, bool, None]]],
     tags=["Models"],
 )
-def get_model_results(
+async def get_model_results(
+    request: Request,
     projectId: str = Path(..., min_length=1, example="Project 1"),
     modelId: str = Path(..., min_length=1, example="Model 1"),
     body: List[Union[str, int, float]] = Body(...),
     data_provider: DataProvider = Depends(get_data_provider),
 ):
     project = data_provider._get_project_to_expose(projectId)
-    return project.get_model_results(modelId, body)
+
+    def get_results(cancellation: CancellationToken) -> Response:
+        return encode_json(
+            project.get_model_results(modelId, body, cancellation=cancellation),
+            nbSamples=len(body),
+        )
+
+    return await run_cancellable(request, data_provider, get_results)
 
 
 @router.delete(
@@ -182,6 +360,22 @@ def delete_model(
     return {"message": "Model deleted"}
 
 
+# Diagnostics routes
+@router.get("/diagnostics/analyses", tags=["Diagnostics"])
+def get_analyses_stats(data_provider: DataProvider = Depends(get_data_provider)):
+    return data_provider.get_analyses_stats()
+
+
+@router.get("/diagnostics/projects", tags=["Diagnostics"])
+def get_diagnostics(data_provider: DataProvider = Depends(get_data_provider)):
+    return data_provider.get_diagnostics()
+
+
+@router.get("/diagnostics/traces", tags=["Diagnostics"])
+def get_traces(data_provider: DataProvider = Depends(get_data_provider)):
+    return data_provider.get_traces()
+
+
 # Selection routes
 @router.get(
     "/projects/{projectId}/selections",
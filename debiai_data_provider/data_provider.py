@@ -1,9 +1,19 @@
-from typing import List
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
 from debiai_data_provider.utils.parser import extract_project_class_name
+from debiai_data_provider.models.debiai import ProjectOverview
 from debiai_data_provider.models.project import DebiAIProject, ProjectToExpose
+from debiai_data_provider.utils.admission import AdmissionController
+from debiai_data_provider.utils.memory import format_bytes, get_process_rss
+from debiai_data_provider.utils.request_limits import RequestLimitsTuner
+from debiai_data_provider.utils.tracing import (
+    InMemorySpanExporter,
+    JsonLinesSpanExporter,
+    Tracer,
+)
 from debiai_data_provider.version import VERSION
-from rich.console import Console
-from rich.panel import Panel
 
 
 class DataProvider:
@@ -12,6 +22,23 @@ class DataProvider:
         max_sample_id_by_request=10000,
         max_sample_data_by_request=2000,
         max_result_by_request=5000,
+        max_results_cache_memory=None,
+        analysis_idle_timeout=600,
+        max_analysis_cache_memory=64 * 1024 * 1024,
+        prefetch_blocks=False,
+        prefetch_workers=2,
+        auto_tune_limits=False,
+        target_response_size=4 * 1024 * 1024,
+        target_response_time=None,
+        max_concurrent_requests=None,
+        route_concurrency_limits=None,
+        max_queued_requests=100,
+        queue_timeout=30,
+        request_timeout=None,
+        overview_max_age=60,
+        overview_workers=4,
+        trace_file=None,
+        trace_memory_spans=0,
     ):
         """
         Initializes the DataProvider with optional parameters for maximum limits.
@@ -20,14 +47,102 @@ class DataProvider:
             max_sample_id_by_request (int): Maximum number of sample IDs in a single request.
             max_sample_data_by_request (int): Maximum number of sample data in a single request.
             max_result_by_request (int): Maximum number of results in a single request.
+            max_results_cache_memory (int): Memory budget in bytes of the model results
+                cache of each project, None or 0 to disable the cache (default).
+                The cached results of a model are only dropped when the project
+                get_model_version changes, or on invalidate_model_results: only enable
+                it for projects implementing get_model_version or static results.
+            analysis_idle_timeout (float): Seconds of inactivity after which the state
+                pinned for a DebiAI analysis is released.
+            max_analysis_cache_memory (int): Memory budget in bytes of the sample blocks
+                cache of each analysis, also caps the prefetched blocks.
+            prefetch_blocks (bool): Prepare in the background the blocks of the sample IDs
+                served to an analysis, before DebiAI requests them.
+            prefetch_workers (int): Number of threads preparing the prefetched blocks.
+            auto_tune_limits (bool): Advertise in the project details sample data and result
+                limits tuned from the measured size and build time of the project samples.
+            target_response_size (int): Targeted response size in bytes of the tuned limits.
+            target_response_time (float): Targeted response build time in seconds
+                of the tuned limits.
+            max_concurrent_requests (int): Maximum number of data, blocks and results
+                requests running at the same time, None for no limit.
+            route_concurrency_limits (Dict[str, int]): Maximum number of running
+                requests by route group: "dataIdList", "blocks" or "results".
+            max_queued_requests (int): Maximum number of requests waiting for each limit,
+                the next ones are rejected with a 429 status and a Retry-After header.
+            queue_timeout (float): Seconds a request can wait for a limit, after which
+                it is rejected with a 503 status and a Retry-After header.
+            request_timeout (float): Seconds after which a blocks or results request is
+                cancelled and answered with a 504 status, None for no timeout.
+            overview_max_age (float): Seconds after which the cached overview of a
+                project without version is refreshed, see DebiAIProject.get_version.
+            overview_workers (int): Number of threads computing the projects overviews.
+            trace_file (str): JSON Lines file where the spans of the requests are
+                appended, see debiai_data_provider.utils.tracing.
+            trace_memory_spans (int): Number of the last spans kept in memory,
+                served by the /diagnostics/traces route. 0 to disable.
         """
         self.projects: List[ProjectToExpose] = []
+        self._projects_lock = threading.Lock()
+
+        # Projects loaded in the background, their details are displayed
+        # once loaded if the server has been started meanwhile
+        self._loading_lock = threading.Lock()
+        self._nb_loading_projects = 0
+        self._display_loaded_projects = False
         self.max_sample_id_by_request = max_sample_id_by_request
         self.max_sample_data_by_request = max_sample_data_by_request
         self.max_result_by_request = max_result_by_request
+        self.max_results_cache_memory = max_results_cache_memory
+        self.analysis_idle_timeout = analysis_idle_timeout
+        self.max_analysis_cache_memory = max_analysis_cache_memory
+
+        self.auto_tune_limits = auto_tune_limits
+        self.target_response_size = target_response_size
+        self.target_response_time = target_response_time
+
+        # Blocks and results requests are also cancelled when the client disconnects
+        self.request_timeout = request_timeout
+
+        # Applied by the API server before the heavy routes
+        self.admission_controller = AdmissionController(
+            max_concurrent_requests=max_concurrent_requests,
+            route_concurrency_limits=route_concurrency_limits,
+            max_queued_requests=max_queued_requests,
+            queue_timeout=queue_timeout,
+        )
+
+        # Spans of the data path, exported locally
+        self.trace_collector: Optional[InMemorySpanExporter] = None
+        self.trace_exporters = []
+        if trace_memory_spans:
+            self.trace_collector = InMemorySpanExporter(trace_memory_spans)
+            self.trace_exporters.append(self.trace_collector)
+        if trace_file:
+            self.trace_exporters.append(JsonLinesSpanExporter(trace_file))
+        # Set for the requests of this provider by the tracing middleware
+        self.tracer = Tracer(self.trace_exporters)
+
+        # Projects overviews are served from memory and refreshed in the background
+        self.overview_max_age = overview_max_age
+        self.overview_executor = ThreadPoolExecutor(
+            max_workers=overview_workers, thread_name_prefix="debiai-overview"
+        )
+
+        self.prefetch_executor = None
+        if prefetch_blocks:
+            self.prefetch_executor = ThreadPoolExecutor(
+                max_workers=prefetch_workers, thread_name_prefix="debiai-prefetch"
+            )
 
     def start_server(self, host="0.0.0.0", port=8000):
         from debiai_data_provider.app import start_api_server
+        from rich.console import Console
+        from rich.panel import Panel
+
+        with self._loading_lock:
+            nb_loading_projects = self._nb_loading_projects
+            self._display_loaded_projects = nb_loading_projects > 0
 
         # Print the server information
         console = Console()
@@ -36,16 +151,32 @@ class DataProvider:
             + f"\n\n[bold]API Server[/bold]: http://{host}:{port}"
             + f"\n[bold]Number of Projects[/bold]: {len(self.get_projects())}"
         )
+        if nb_loading_projects:
+            panel_text += f" ({nb_loading_projects} loading)"
 
         # Display parameters
+        concurrency_limits = ", ".join(
+            f"{name} {stats['maxConcurrent']}"
+            for name, stats in self.admission_controller.get_stats().items()
+        )
         panel_text += "\n[bold]Parameters[/bold]:\n  " + "\n  ".join(
             [
                 f"Max sample id by request: {self.max_sample_id_by_request}",
                 f"Max sample data by request: {self.max_sample_data_by_request}",
                 f"Max result by request: {self.max_result_by_request}",
+                f"Max results cache memory: {self.max_results_cache_memory}",
+                f"Prefetch blocks: {self.prefetch_executor is not None}",
+                f"Auto tune limits: {self.auto_tune_limits}",
+                f"Max concurrent requests: {concurrency_limits or None}",
+                f"Request timeout: {self.request_timeout}",
+                f"Tracing: {bool(self.trace_exporters)}",
             ]
         )
 
+        process_rss = get_process_rss()
+        if process_rss is not None:
+            panel_text += f"\n[bold]Process memory[/bold]: {format_bytes(process_rss)}"
+
         console.print(
             Panel(
                 panel_text,
@@ -55,12 +186,16 @@ class DataProvider:
             )
         )
 
-        # Print the details of each project
-        for project in self.projects:
-            console.print(project.get_rich_table())
+        # Print the details of each project, once they are all loaded
+        if not nb_loading_projects:
+            self._print_projects_tables(console)
 
         start_api_server(self, host, port)
 
+    def _print_projects_tables(self, console):
+        for project in self.projects:
+            console.print(project.get_rich_table())
+
     # Projects
     def add_project(
         self,
@@ -77,19 +212,173 @@ class DataProvider:
         else:
             project_name = extract_project_class_name(project)
 
-        # Check if the project name already exists
-        for existing_project in self.projects:
-            if existing_project.project_name == project_name:
-                raise ValueError(
-                    f"A project with the name '{project_name}' already exists."
+        project_to_expose = ProjectToExpose(
+            project=project,
+            project_name=project_name,
+            max_results_cache_memory=self.max_results_cache_memory,
+            analysis_idle_timeout=self.analysis_idle_timeout,
+            max_analysis_cache_memory=self.max_analysis_cache_memory,
+            prefetch_executor=self.prefetch_executor,
+            prefetch_chunk_size=self.max_sample_data_by_request or 2000,
+            overview_max_age=self.overview_max_age,
+            expire_idle_analyses=self.expire_idle_analyses,
+            limits_tuner=(
+                RequestLimitsTuner(
+                    default_sample_data_by_request=self.max_sample_data_by_request,
+                    default_result_by_request=self.max_result_by_request,
+                    target_response_size=self.target_response_size,
+                    target_response_time=self.target_response_time,
                 )
+                if self.auto_tune_limits
+                else None
+            ),
+        )
 
-        self.projects.append(
-            ProjectToExpose(
-                project=project,
-                project_name=project_name,
-            )
+        with self._projects_lock:
+            # Check if the project name already exists
+            for existing_project in self.projects:
+                if existing_project.project_name == project_name:
+                    raise ValueError(
+                        f"A project with the name '{project_name}' already exists."
+                    )
+
+            # The list is replaced and not modified, for the requests iterating over it
+            self.projects = self.projects + [project_to_expose]
+
+    def add_projects_in_parallel(
+        self,
+        project_loaders: Dict[str, Callable[[], DebiAIProject]],
+        max_workers: Optional[int] = None,
+        wait: bool = True,
+    ) -> Optional[threading.Thread]:
+        """
+        Loads projects on a thread pool and adds each one to the data-provider
+        as soon as it is loaded, with a combined progress display.
+
+        Parameters:
+            project_loaders (Dict[str, Callable]): Functions creating the projects,
+                by displayed name.
+            max_workers (int): Number of projects loaded at the same time.
+            wait (bool): Wait for all the projects to be loaded, otherwise they are
+                loaded in the background, while the already loaded ones are served.
+
+        Returns:
+            threading.Thread: The background loading thread, if not waiting.
+        """
+        if wait:
+            self._load_projects(project_loaders, max_workers)
+            return None
+
+        with self._loading_lock:
+            self._nb_loading_projects += len(project_loaders)
+
+        # No live progress display, it would be overwritten by the server logs
+        loading_thread = threading.Thread(
+            target=self._load_projects,
+            args=(project_loaders, max_workers, False),
+            name="debiai-projects-loading",
+            daemon=True,
         )
+        loading_thread.start()
+        return loading_thread
+
+    def _load_projects(
+        self,
+        project_loaders: Dict[str, Callable[[], DebiAIProject]],
+        max_workers: Optional[int],
+        progress_display: bool = True,
+    ):
+        from contextlib import nullcontext
+        from rich.console import Console
+        from rich.progress import (
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            BarColumn,
+            TimeElapsedColumn,
+        )
+
+        progress = None
+        if progress_display:
+            progress = Progress(
+                SpinnerColumn(),
+                TextColumn("{task.description}"),
+                BarColumn(),
+                TextColumn("{task.completed}/{task.total}"),
+                TimeElapsedColumn(),
+            )
+        console = progress.console if progress is not None else Console()
+
+        with progress if progress is not None else nullcontext():
+            if progress is not None:
+                overall_task = progress.add_task(
+                    "[bold]Loading projects", total=len(project_loaders)
+                )
+                project_tasks = {
+                    name: progress.add_task(name, total=1, start=False)
+                    for name in project_loaders
+                }
+
+            def load_project(name: str) -> DebiAIProject:
+                if progress is not None:
+                    progress.start_task(project_tasks[name])
+                start_time = time.perf_counter()
+                project = project_loaders[name]()
+                if project.load_duration is None:
+                    project.load_duration = time.perf_counter() - start_time
+                return project
+
+            with ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="debiai-loading"
+            ) as executor:
+                futures = {
+                    executor.submit(load_project, name): name
+                    for name in project_loaders
+                }
+
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        project = future.result()
+                        self.add_project(project)
+                        if progress is not None:
+                            progress.update(
+                                project_tasks[name],
+                                completed=1,
+                                description=f"[green]{name}",
+                            )
+                        else:
+                            console.print(
+                                f"[green]Loaded[/green] the project '{name}' "
+                                + f"in {project.load_duration:.2f}s"
+                            )
+                    except Exception as e:
+                        # The other projects are still served
+                        if progress is not None:
+                            progress.update(
+                                project_tasks[name], description=f"[red]{name}"
+                            )
+                        console.print(
+                            "[bold red]Error:[/bold red] Failed to load the project "
+                            + f"'{name}': {e}"
+                        )
+                    if progress is not None:
+                        progress.advance(overall_task)
+
+        if progress_display:
+            return
+
+        with self._loading_lock:
+            self._nb_loading_projects -= len(project_loaders)
+            display_loaded_projects = (
+                self._display_loaded_projects and self._nb_loading_projects == 0
+            )
+            if display_loaded_projects:
+                self._display_loaded_projects = False
+
+        # The server has been started before the projects were loaded
+        if display_loaded_projects:
+            self._print_projects_tables(console)
 
     def get_projects(self) -> List[DebiAIProject]:
         """
@@ -119,19 +408,142 @@ class DataProvider:
         Parameters:
             project_name (str): The name of the project to delete.
         """
-        project_to_delete = self.get_project(project_name)
+        project_to_expose = self._get_project_to_expose(project_name)
+        project_to_delete = project_to_expose.project
         try:
-            project_to_delete.delete_project()
-            self.projects = [
-                project
-                for project in self.projects
-                if project.project_name != project_name
-            ]
+            # Waits for the requests reading the project
+            with project_to_expose.lock.write():
+                project_to_delete.delete_project()
+                project_to_expose.analysis_sessions.end_all()
+
+            with self._projects_lock:
+                # Replaced and not modified, for the requests iterating over it
+                self.projects = [
+                    project
+                    for project in self.projects
+                    if project.project_name != project_name
+                ]
         except NotImplementedError:
             print(
                 f"Project '{project_name}' does not implement the delete_project method."
             )
 
+    def invalidate_model_results(
+        self, project_name: str, model_id: Optional[str] = None
+    ):
+        """
+        Removes the cached results of a model, for example after it has been re-evaluated.
+
+        Parameters:
+            project_name (str): The name of the project.
+            model_id (str): The ID of the model, all the models if not given.
+        """
+        self._get_project_to_expose(project_name).invalidate_model_results(model_id)
+
+    def refresh_models(self, project_name: str) -> dict:
+        """
+        Discovers the new, modified and removed models of a project.
+
+        Parameters:
+            project_name (str): The name of the project.
+
+        Returns:
+            dict: The added, modified and removed model IDs.
+        """
+        return self._get_project_to_expose(project_name).refresh_models()
+
+    def reload_project(self, project_name: str) -> ProjectOverview:
+        """
+        Reloads the data of a project while it is served, each request
+        sees either the previous or the new version of the data.
+
+        Parameters:
+            project_name (str): The name of the project.
+
+        Returns:
+            ProjectOverview: The overview of the reloaded project.
+        """
+        project_to_expose = self._get_project_to_expose(project_name)
+        project_to_expose.reload()
+        return project_to_expose.refresh_overview()
+
+    def get_overviews(self) -> Dict[str, ProjectOverview]:
+        """
+        Get the overview of each project, served from memory. The missing ones
+        are computed concurrently, the stale ones are refreshed in the background.
+
+        Returns:
+            Dict[str, ProjectOverview]: The overviews by project name.
+        """
+        projects = self.projects
+
+        missing = []
+        for project in projects:
+            if project.get_cached_overview() is None:
+                missing.append(project)
+            elif project.is_overview_stale():
+                project.refresh_overview_in_background(self.overview_executor)
+
+        # Only waited for on the first request, or for the newly added projects
+        futures = [
+            self.overview_executor.submit(project.refresh_overview)
+            for project in missing
+        ]
+        for future in futures:
+            future.result()
+
+        return {
+            project.project_name: project.get_cached_overview() for project in projects
+        }
+
+    def get_analyses_stats(self) -> dict:
+        """
+        Get the number and memory usage of the ongoing analyses of each project.
+
+        Returns:
+            dict: The analyses statistics by project name.
+        """
+        return {
+            project.project_name: project.analysis_sessions.get_stats()
+            for project in self.projects
+        }
+
+    def expire_idle_analyses(self):
+        """
+        Releases the idle analyses of all the projects, called on each analysis
+        request: an abandoned analysis does not wait for its project to be used again.
+        """
+        for project in self.projects:
+            project.analysis_sessions.expire_idle()
+
+    def get_diagnostics(self) -> dict:
+        """
+        Get the resident memory of the process and, for each project,
+        the memory used by its data, indexes and caches.
+
+        Returns:
+            dict: The process and projects diagnostics.
+        """
+        projects = self.projects
+        return {
+            "process": {"rss": get_process_rss(), "nbProjects": len(projects)},
+            "admission": self.admission_controller.get_stats(),
+            "projects": {
+                project.project_name: project.get_diagnostics() for project in projects
+            },
+        }
+
+    def get_traces(self) -> dict:
+        """
+        Get the spans kept in memory, grouped by trace.
+
+        Returns:
+            dict: The spans by trace ID, empty if trace_memory_spans is not set.
+        """
+        if self.trace_collector is None:
+            return {}
+        return self.trace_collector.get_traces()
+
     def _get_project_to_expose(self, project_name: str) -> ProjectToExpose:
         """
         Get a project by its name.
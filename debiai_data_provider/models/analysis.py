@@ -0,0 +1,175 @@
+import time
+import threading
+from concurrent.futures import Future
+from debiai_data_provider.models.debiai import Column
+from debiai_data_provider.utils.cache import MemoryBoundedCache, estimate_size
+from typing import Callable, Dict, List, Optional, Union
+
+
+class AnalysisSession:
+    """
+    State pinned for the duration of a DebiAI analysis: the snapshot of the
+    sample IDs ordering, the project columns and a cache of sample blocks.
+    """
+
+    def __init__(
+        self,
+        analysis_id: str,
+        samples_ids: List[Union[str, int]],
+        columns: Optional[List[Column]],
+        max_cache_memory: int,
+    ):
+        self.analysis_id = analysis_id
+        self.samples_ids: Optional[List[Union[str, int]]] = samples_ids
+        self.columns = columns
+        self.blocks = MemoryBoundedCache(max_cache_memory)
+
+        # Background tasks preparing blocks, cancelled when the session ends
+        self.cancelled = threading.Event()
+        self.tasks: List[Future] = []
+
+        self.start_time = time.monotonic()
+        self.last_access = self.start_time
+        self._samples_ids_memory = estimate_size(samples_ids)
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def release_samples_ids(self):
+        """
+        Releases the sample IDs snapshot once all the pages have been served.
+        """
+        self.samples_ids = None
+        self._samples_ids_memory = 0
+
+    def add_task(self, task: Future):
+        self.tasks = [t for t in self.tasks if not t.done()] + [task]
+
+    def close(self):
+        self.cancelled.set()
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+        self.release_samples_ids()
+        self.blocks.clear()
+
+    def get_memory_usage(self) -> int:
+        return self._samples_ids_memory + self.blocks.memory_usage
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "id": self.analysis_id,
+            "nbSamples": (
+                len(self.samples_ids) if self.samples_ids is not None else None
+            ),
+            "cachedSamples": len(self.blocks),
+            "memoryUsage": self.get_memory_usage(),
+            "duration": now - self.start_time,
+            "idleTime": now - self.last_access,
+        }
+
+
+class AnalysisSessionManager:
+    """
+    Keeps track of the analyses of a project, sessions are released
+    when the analysis ends or after an idle timeout.
+    """
+
+    def __init__(self, idle_timeout: float = 600, max_cache_memory: int = 0):
+        """
+        Parameters:
+            idle_timeout (float): Seconds of inactivity after which a session is released.
+            max_cache_memory (int): Memory budget in bytes of the blocks cache of each session.
+        """
+        self.idle_timeout = idle_timeout
+        self.max_cache_memory = max_cache_memory
+
+        self._sessions: Dict[str, AnalysisSession] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def start(
+        self,
+        analysis_id: str,
+        get_samples_ids: Callable[[], List[Union[str, int]]],
+        get_columns: Callable[[], Optional[List[Column]]],
+    ) -> AnalysisSession:
+        """
+        Returns the session of an analysis, creating it if it does not exist yet.
+        """
+        self.expire_idle()
+
+        with self._lock:
+            session = self._sessions.get(analysis_id)
+            if session is not None:
+                session.touch()
+                return session
+
+        # Compute the snapshot outside of the lock, this can be slow
+        new_session = AnalysisSession(
+            analysis_id,
+            samples_ids=list(get_samples_ids()),
+            columns=get_columns(),
+            max_cache_memory=self.max_cache_memory,
+        )
+
+        with self._lock:
+            # Another request may have started the same analysis meanwhile
+            return self._sessions.setdefault(analysis_id, new_session)
+
+    def get(self, analysis_id: Optional[str]) -> Optional[AnalysisSession]:
+        if analysis_id is None:
+            return None
+
+        self.expire_idle()
+
+        with self._lock:
+            session = self._sessions.get(analysis_id)
+
+        if session is not None:
+            session.touch()
+        return session
+
+    def end(self, analysis_id: str):
+        with self._lock:
+            session = self._sessions.pop(analysis_id, None)
+
+        if session is not None:
+            session.close()
+
+    def end_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+
+        for session in sessions:
+            session.close()
+
+    def expire_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            expired_ids = [
+                analysis_id
+                for analysis_id, session in self._sessions.items()
+                if now - session.last_access > self.idle_timeout
+            ]
+
+        for analysis_id in expired_ids:
+            self.end(analysis_id)
+
+    def get_stats(self) -> dict:
+        self.expire_idle()
+
+        with self._lock:
+            sessions = list(self._sessions.values())
+
+        sessions_stats = [session.get_stats() for session in sessions]
+        return {
+            "nbAnalyses": len(sessions_stats),
+            "memoryUsage": sum(stats["memoryUsage"] for stats in sessions_stats),
+            "analyses": sessions_stats,
+        }
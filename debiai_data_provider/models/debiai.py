@@ -53,6 +53,9 @@ class ProjectDetails(BaseModel):
     metrics: Optional[dict] = {}
     tags: Optional[list] = []
     metadata: Optional[dict] = {}
+    # Project specific request limits, overriding the /info ones when set
+    maxSampleDataByRequest: Optional[int] = None
+    maxResultByRequest: Optional[int] = None
 
 
 class ModelDetail(BaseModel):
@@ -1,5 +1,8 @@
-import pandas as pd
-from rich.table import Table
+from __future__ import annotations
+
+import time
+import functools
+import threading
 from debiai_data_provider.models.debiai import (
     ProjectOverview,
     ProjectDetails,
@@ -7,13 +10,59 @@ from debiai_data_provider.models.debiai import (
     Column,
     ExpectedResult,
 )
-from typing import Optional, Union, List, Tuple, Dict
+from debiai_data_provider.models.analysis import (
+    AnalysisSession,
+    AnalysisSessionManager,
+)
+from debiai_data_provider.utils.cache import MemoryBoundedCache
+from debiai_data_provider.utils.cancellation import (
+    CancellationToken,
+    RequestCancelled,
+    resolve_result,
+)
+from debiai_data_provider.utils.memory import format_bytes
+from debiai_data_provider.utils.request_limits import RequestLimitsTuner
+from debiai_data_provider.utils.rw_lock import ReadWriteLock
+from debiai_data_provider.utils.tracing import span
+from debiai_data_provider.utils.single_flight import SingleFlight
+from concurrent.futures import Executor
+from typing import (
+    Callable,
+    Optional,
+    Union,
+    List,
+    Tuple,
+    Dict,
+    Hashable,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    # pandas is only imported when needed, to keep the package import fast
+    import pandas as pd
+
+
+# Binary encodings of the numeric list columns, for example embeddings
+LIST_ENCODINGS = ["float32", "float16"]
+
+
+def reading(method):
+    # The method sees a single version of the project data,
+    # a reload waits for it to finish
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
 class DebiAIProject:
     creation_date: Optional[Union[None, str]] = None
     update_date: Optional[Union[None, str]] = None
     name: Optional[str] = None
+    # Time spent loading the project, in seconds
+    load_duration: Optional[float] = None
 
     # Project information
     def get_structure(self) -> dict:
@@ -46,15 +95,114 @@ class DebiAIProject:
     def get_model_results(
         self, model_id: str, sample_ids: List[Union[str, int, float]]
     ) -> pd.DataFrame:
+        # Results in the sample_ids order, or with a "Data ID" column or
+        # indexed by sample ID, then the samples without results can be left out
+        raise NotImplementedError
+
+    def get_models_results(
+        self, model_ids: List[str], sample_ids: List[Union[str, int, float]]
+    ) -> Dict[str, pd.DataFrame]:
+        # Optional, the results of several models in a single query:
+        # {model_id: results indexed by sample ID, samples without results left out}
+        # get_model_results is called for each model if not implemented
+        raise NotImplementedError
+
+    def get_memory_usage(self) -> Optional[int]:
+        # Bytes used by the project data, displayed at startup
+        memory_details = self.get_memory_details()
+        if memory_details is None:
+            return None
+        return sum(memory_details.values())
+
+    def get_memory_details(self) -> Optional[Dict[str, int]]:
+        # Bytes used by each part of the project data,
+        # for example {"data": ..., "results": ..., "indexes": ...}
+        return None
+
+    def get_version(self) -> Optional[Hashable]:
+        # Changes when the project samples or models change, the cached
+        # overview is then computed again. None if unknown: the overview
+        # is then refreshed after a maximum age
+        return None
+
+    def get_model_version(self, model_id: str) -> Optional[Hashable]:
+        # A value changing when the model results change, the cached
+        # results of the model are dropped when it changes
+        return None
+
+    def prepare_reload(self) -> Callable[[], None]:
+        # Optional, reads the project source again without modifying the served
+        # data, returns the function swapping the new data in.
+        # The swap is called while no request is reading the project
+        raise NotImplementedError
+
+    def refresh_models(self) -> Dict[str, List[str]]:
+        # Discover the new, modified and removed models
+        # Returns: {"added": [...], "modified": [...], "removed": [...]}
         raise NotImplementedError
 
 
 class ProjectToExpose:
-    def __init__(self, project: DebiAIProject, project_name: str):
+    def __init__(
+        self,
+        project: DebiAIProject,
+        project_name: str,
+        max_results_cache_memory: Optional[int] = None,
+        analysis_idle_timeout: float = 600,
+        max_analysis_cache_memory: int = 64 * 1024 * 1024,
+        prefetch_executor: Optional[Executor] = None,
+        prefetch_chunk_size: int = 2000,
+        limits_tuner: Optional[RequestLimitsTuner] = None,
+        sub_chunk_size: int = 500,
+        overview_max_age: float = 60,
+        expire_idle_analyses: Optional[Callable[[], None]] = None,
+    ):
         self.project = project
         self.project_name = project_name
 
+        # Requests read the project under the read lock, reloads swap
+        # the project data under the write lock
+        self.lock = ReadWriteLock()
+
+        # Concurrent identical requests share the same computation
+        self.single_flight = SingleFlight()
+
+        # Model results cache, rows are stored in the results columns order
+        self.results_cache: Optional[MemoryBoundedCache] = None
+        self._results_cache_columns: Optional[Tuple[str, ...]] = None
+        self._results_cache_versions: Dict[str, Optional[Hashable]] = {}
+        if max_results_cache_memory:
+            self.results_cache = MemoryBoundedCache(max_results_cache_memory)
+
+        # Analyses pin a snapshot of the project while DebiAI loads it
+        self.analysis_sessions = AnalysisSessionManager(
+            idle_timeout=analysis_idle_timeout,
+            max_cache_memory=max_analysis_cache_memory,
+        )
+        # Releases the idle analyses of all the projects, not only of this one
+        self.expire_idle_analyses = expire_idle_analyses
+
+        # Blocks of the served IDs pages can be prepared in the background
+        self.prefetch_executor = prefetch_executor
+        self.prefetch_chunk_size = prefetch_chunk_size
+
+        # Request limits tuned from the measured cost of the project samples
+        self.limits_tuner = limits_tuner
+
+        # Cancellable requests are computed by sub-chunks,
+        # a cancelled request stops between two of them
+        self.sub_chunk_size = sub_chunk_size
+
+        # Overview served to the projects list, from memory
+        self.overview_max_age = overview_max_age
+        self._overview: Optional[ProjectOverview] = None
+        self._overview_version: Optional[Hashable] = None
+        self._overview_time = 0.0
+        self._overview_stale = False
+        self._overview_refreshing = threading.Lock()
+
     # Getters
+    @reading
     def get_columns(self) -> Union[List[Column], None]:
         try:
             structure = self.project.get_structure()
@@ -112,6 +260,19 @@ class ProjectToExpose:
                         f"Error in the structure of the column '{key}', the 'group' must be a string."
                     )
 
+            if "encoding" in value:
+                if value["encoding"] not in LIST_ENCODINGS:
+                    raise ValueError(
+                        f"Error in the structure of the column '{key}', the 'encoding' must be "
+                        + ", ".join(LIST_ENCODINGS)
+                        + "."
+                    )
+
+                if value.get("type") != "list":
+                    raise ValueError(
+                        f"Error in the structure of the column '{key}', only the 'list' columns can be encoded."  # noqa
+                    )
+
         # Convert:
         # {
         #     "col_name": {
@@ -129,13 +290,22 @@ class ProjectToExpose:
 
         columns = []
         for key, value in structure.items():
+            metadata = {
+                "category": value["category"],
+                "group": value.get("group", ""),
+            }
+            if "encoding" in value:
+                # Numeric lists sent as base64 strings of their binary buffer
+                metadata["encoding"] = {
+                    "format": "base64",
+                    "dtype": value["encoding"],
+                    "byteOrder": "little",
+                }
+
             columns.append(
                 Column(
                     name=key,
-                    metadata={
-                        "category": value["category"],
-                        "group": value.get("group", ""),
-                    },
+                    metadata=metadata,
                     metrics=value.get("metrics", {}),
                     tags=[],
                     type=value["type"],
@@ -143,6 +313,7 @@ class ProjectToExpose:
             )
         return columns
 
+    @reading
     def get_results_columns(self) -> Union[List[ExpectedResult], None]:
         try:
             structure = self.project.get_results_structure()
@@ -207,6 +378,7 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
 
         return columns
 
+    @reading
     def get_nb_samples(self) -> Union[int, None]:
         nb_samples = self.project.get_nb_samples()
 
@@ -215,6 +387,7 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
 
         return nb_samples
 
+    @reading
     def get_samples_ids(self) -> List[str]:
         try:
             samples_id = self.project.get_samples_ids()
@@ -233,7 +406,10 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
         return samples_id
 
     # Project information
+    @reading
     def get_dates(self) -> Tuple[Optional[int], Optional[int]]:
+        import pandas as pd
+
         # Get the creation date
         creationDate = None
         if self.project.creation_date is not None and isinstance(
@@ -252,7 +428,62 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
 
         return creationDate, updateDate
 
+    @reading
     def get_overview(self) -> ProjectOverview:
+        """
+        Get the cached overview, computed again if it is missing or stale.
+        """
+        overview = self._overview
+        if overview is None or self.is_overview_stale():
+            return self.refresh_overview()
+        return overview
+
+    def get_cached_overview(self) -> Optional[ProjectOverview]:
+        return self._overview
+
+    @reading
+    def is_overview_stale(self) -> bool:
+        if self._overview is None or self._overview_stale:
+            return True
+
+        version = self.project.get_version()
+        if version is None:
+            return time.monotonic() - self._overview_time > self.overview_max_age
+        return version != self._overview_version
+
+    @reading
+    def refresh_overview(self) -> ProjectOverview:
+        return self.single_flight.do("overview", self._compute_overview)
+
+    def refresh_overview_in_background(self, executor: Executor):
+        """
+        Computes the overview again on the executor, the stale one is
+        served meanwhile. Only one refresh by project is queued at a time.
+        """
+        if not self._overview_refreshing.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self.refresh_overview()
+            except Exception:
+                # Retried on the next projects request
+                pass
+            finally:
+                self._overview_refreshing.release()
+
+        try:
+            executor.submit(refresh)
+        except RuntimeError:
+            # Executor shut down
+            self._overview_refreshing.release()
+
+    def _compute_overview(self) -> ProjectOverview:
+        # The version is read first, a change during the computation
+        # is detected on the next request
+        version = self.project.get_version()
+        self._overview_stale = False
+
         # Get project details
         creationDate, updateDate = self.get_dates()
 
@@ -262,7 +493,7 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
         # Get models details
         models = self.get_models()
 
-        return ProjectOverview(
+        overview = ProjectOverview(
             name=self.project_name,
             nbSamples=nbSamples,
             nbModels=len(models),
@@ -271,7 +502,16 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
             updateDate=updateDate,
         )
 
+        self._overview_version = version
+        self._overview_time = time.monotonic()
+        self._overview = overview
+        return overview
+
+    @reading
     def get_details(self) -> ProjectDetails:
+        return self.single_flight.do("details", self._compute_details)
+
+    def _compute_details(self) -> ProjectDetails:
         # Get project details
         creationDate, updateDate = self.get_dates()
 
@@ -284,6 +524,15 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
 
         models = self.get_models()
 
+        # Tuned request limits
+        max_sample_data_by_request = None
+        max_result_by_request = None
+        if self.limits_tuner is not None:
+            if not self.limits_tuner.has_measures("data"):
+                self._measure_data_cost(columns)
+            max_sample_data_by_request = self.limits_tuner.get_sample_data_by_request()
+            max_result_by_request = self.limits_tuner.get_result_by_request()
+
         return ProjectDetails(
             id=self.project_name,
             name=self.project_name,
@@ -301,9 +550,23 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
             metadata={},
             creationDate=creationDate,
             updateDate=updateDate,
+            maxSampleDataByRequest=max_sample_data_by_request,
+            maxResultByRequest=max_result_by_request,
         )
 
+    def _measure_data_cost(self, columns: Optional[List[Column]]):
+        # Build a first block to measure the cost of the project samples
+        if not columns:
+            return
+
+        samples_ids = self._get_samples_ids_coalesced()
+        if samples_ids:
+            self._compute_data_from_ids(
+                samples_ids[: self.prefetch_chunk_size // 10 or 1], columns
+            )
+
     # Samples
+    @reading
     def get_data_id_list(
         self,
         from_: Optional[int] = None,
@@ -312,7 +575,13 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
         analysisStart: Optional[bool] = None,
         analysisEnd: Optional[bool] = None,
     ) -> List[str]:
-        samples_ids = self.get_samples_ids()
+        session = self._get_analysis_session(analysisId, analysisStart)
+
+        if session is not None and session.samples_ids is not None:
+            # Serve the pages from the analysis snapshot
+            samples_ids = session.samples_ids
+        else:
+            samples_ids = self._get_samples_ids_coalesced()
 
         if from_ is not None and to is not None:
             samples_ids = samples_ids[from_ : to + 1]  # noqa
@@ -323,32 +592,316 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
         elif to is not None:
             samples_ids = samples_ids[: to + 1]
 
+        if session is not None and self.prefetch_executor is not None:
+            # DebiAI will now ask the blocks of this page
+            session.add_task(
+                self.prefetch_executor.submit(
+                    self._prefetch_data, session, list(samples_ids)
+                )
+            )
+
+        if session is not None and analysisEnd:
+            # All the pages are served, only the blocks are left to load
+            session.release_samples_ids()
+
         return samples_ids
 
-    def get_data_from_ids(self, samples_ids: List[Union[str, int, float]]) -> dict:
+    @reading
+    def get_data_from_ids(
+        self,
+        samples_ids: List[Union[str, int, float]],
+        analysisId: Optional[str] = None,
+        analysisStart: Optional[bool] = None,
+        analysisEnd: Optional[bool] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> dict:
+        session = self._get_analysis_session(analysisId, analysisStart)
+
+        with span("project.validate_columns"):
+            if session is not None:
+                columns = session.columns
+            else:
+                columns = self.get_columns()
+        if not columns:
+            raise ValueError("The project has no columns defined.")
+
+        # Samples already prepared for the analysis
+        samples_data = {}
+        missing_samples_ids = samples_ids
+        if session is not None and len(session.blocks):
+            missing_samples_ids = []
+            for sample_id in samples_ids:
+                data = session.blocks.get(("data", sample_id))
+                if data is None:
+                    missing_samples_ids.append(sample_id)
+                else:
+                    # Blocks are only requested once by analysis
+                    session.blocks.pop(("data", sample_id))
+                    samples_data[sample_id] = data
+
+        if missing_samples_ids:
+            samples_data.update(
+                self._compute_by_sub_chunks(
+                    missing_samples_ids,
+                    lambda chunk: self._get_data_coalesced(
+                        chunk, columns, cancellation
+                    ),
+                    cancellation,
+                )
+            )
+
+        if session is not None and analysisEnd:
+            self.analysis_sessions.end(session.analysis_id)
+
+        return {sample_id: samples_data[sample_id] for sample_id in samples_ids}
+
+    @reading
+    def get_columnar_data_from_ids(
+        self,
+        samples_ids: List[Union[str, int, float]],
+        analysisId: Optional[str] = None,
+        analysisStart: Optional[bool] = None,
+        analysisEnd: Optional[bool] = None,
+        dictionary_encoding: bool = False,
+        cancellation: Optional[CancellationToken] = None,
+    ) -> dict:
+        """
+        Columnar alternative to get_data_from_ids, built from the columns
+        of the project data instead of one list per sample:
+        {"ids": [s_id, ...], "columns": [[col_1 values], [col_2 values], ...]}
+
+        With dictionary_encoding, the categorical columns are sent as
+        {"dictionary": [values], "codes": [value index, ...]}.
+        """
+        from debiai_data_provider.utils.parser import dataframe_to_debiai_columns
+
+        session = self._get_analysis_session(analysisId, analysisStart)
+
+        with span("project.validate_columns"):
+            if session is not None:
+                columns = session.columns
+            else:
+                columns = self.get_columns()
+        if not columns:
+            raise ValueError("The project has no columns defined.")
+
+        def compute_columns() -> List[list]:
+            df_data = self._get_project_data_by_sub_chunks(
+                samples_ids, columns, cancellation
+            )
+            if cancellation is not None:
+                cancellation.raise_if_cancelled()
+            with span("build_columns", nbSamples=len(samples_ids)):
+                return dataframe_to_debiai_columns(
+                    columns=columns,
+                    samples_id=samples_ids,
+                    data=df_data,
+                    dictionary_encoding=dictionary_encoding,
+                )
+
+        columns_key = tuple(column.name for column in columns)
+        flight_key = ("columnar", columns_key, dictionary_encoding, tuple(samples_ids))
+        while True:
+            try:
+                columns_values = self.single_flight.do(flight_key, compute_columns)
+                break
+            except RequestCancelled:
+                # The shared computation was cancelled with the request leading it,
+                # computed again if this request is still running
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled()
+
+        if session is not None and analysisEnd:
+            self.analysis_sessions.end(session.analysis_id)
+
+        return {"ids": samples_ids, "columns": columns_values}
+
+    def _get_samples_ids_coalesced(self) -> List[str]:
+        return self.single_flight.do("samples_ids", self.get_samples_ids)
+
+    def _get_data_coalesced(
+        self,
+        samples_ids: List[Union[str, int, float]],
+        columns: List[Column],
+        cancellation: Optional[CancellationToken] = None,
+    ) -> dict:
+        # Samples already being computed by another request are awaited
+        # instead of being asked again to the project
+        columns_key = tuple(column.name for column in columns)
+
+        def compute_samples(keys: list) -> dict:
+            samples_data = self._compute_data_from_ids(
+                [key[2] for key in keys], columns, cancellation
+            )
+            return {
+                ("data", columns_key, s_id): data for s_id, data in samples_data.items()
+            }
+
+        samples_data = self.single_flight.do_many(
+            [("data", columns_key, sample_id) for sample_id in samples_ids],
+            compute_samples,
+        )
+
+        return {key[2]: data for key, data in samples_data.items()}
+
+    def _prefetch_data(
+        self, session: AnalysisSession, samples_ids: List[Union[str, int]]
+    ):
+        if not session.columns:
+            return
+
+        chunk_size = self.prefetch_chunk_size
+        if self.limits_tuner is not None:
+            # DebiAI requests the blocks with the advertised project limit
+            chunk_size = self.limits_tuner.get_sample_data_by_request() or chunk_size
+
+        last_chunk_memory = 0
+        for i in range(0, len(samples_ids), chunk_size):
+            if session.cancelled.is_set():
+                return
+
+            # Stop before the chunk would exceed the session memory budget
+            memory_usage = session.blocks.memory_usage
+            if memory_usage + last_chunk_memory > session.blocks.max_memory:
+                return
+
+            chunk = [
+                sample_id
+                for sample_id in samples_ids[i : i + chunk_size]  # noqa
+                if ("data", sample_id) not in session.blocks
+            ]
+            if not chunk:
+                continue
+
+            try:
+                with self.lock.read():
+                    samples_data = self._get_data_coalesced(chunk, session.columns)
+            except Exception:
+                # The blocks request will compute them again and report the error
+                return
+
+            if session.cancelled.is_set():
+                return
+
+            for sample_id, data in samples_data.items():
+                session.blocks.set(("data", sample_id), data)
+            last_chunk_memory = session.blocks.memory_usage - memory_usage
+
+    def _get_analysis_session(
+        self, analysis_id: Optional[str], analysis_start: Optional[bool]
+    ) -> Optional[AnalysisSession]:
+        if analysis_id is None:
+            return None
+
+        if self.expire_idle_analyses is not None:
+            self.expire_idle_analyses()
+
+        if analysis_start:
+            # Pin the sample IDs ordering and the columns for the analysis
+            return self.analysis_sessions.start(
+                analysis_id, self._get_samples_ids_coalesced, self.get_columns
+            )
+
+        return self.analysis_sessions.get(analysis_id)
+
+    def _compute_by_sub_chunks(
+        self,
+        samples_ids: list,
+        compute: Callable[[list], dict],
+        cancellation: Optional[CancellationToken],
+    ) -> dict:
+        if cancellation is None:
+            return compute(samples_ids)
+
+        computed = {}
+        chunk_size = self.sub_chunk_size or len(samples_ids) or 1
+        for i in range(0, len(samples_ids), chunk_size):
+            cancellation.raise_if_cancelled()
+            chunk = samples_ids[i : i + chunk_size]  # noqa
+            try:
+                computed.update(compute(chunk))
+            except RequestCancelled:
+                # The sub-chunk was shared with another cancelled request
+                cancellation.raise_if_cancelled()
+                computed.update(compute(chunk))
+
+        return computed
+
+    def _get_project_data_by_sub_chunks(
+        self,
+        samples_ids: List[Union[str, int, float]],
+        columns: List[Column],
+        cancellation: Optional[CancellationToken],
+    ) -> pd.DataFrame:
+        # The columns are built once from the data of all the sub-chunks,
+        # the dictionaries of the categorical columns stay shared
+        if cancellation is None or not samples_ids:
+            return self._get_project_data(samples_ids, columns, cancellation)
+
+        data_by_chunk = self._compute_by_sub_chunks(
+            list(range(len(samples_ids))),
+            lambda positions: {
+                positions[0]: self._get_project_data(
+                    [samples_ids[position] for position in positions],
+                    columns,
+                    cancellation,
+                )
+            },
+            cancellation,
+        )
+        if len(data_by_chunk) == 1:
+            return data_by_chunk[0]
+
+        import pandas as pd
+
+        return pd.concat(data_by_chunk.values())
+
+    def _compute_data_from_ids(
+        self,
+        samples_ids: List[Union[str, int, float]],
+        columns: List[Column],
+        cancellation: Optional[CancellationToken] = None,
+    ) -> dict:
         from debiai_data_provider.utils.parser import dataframe_to_debiai_data_array
 
-        # Get the data from the project
-        df_data = self.project.get_data(samples_ids)
+        start_time = time.perf_counter()
+
+        df_data = self._get_project_data(samples_ids, columns, cancellation)
+        with span("build_blocks", nbSamples=len(samples_ids)):
+            samples_data = dataframe_to_debiai_data_array(
+                columns=columns, samples_id=samples_ids, data=df_data
+            )
+
+        if self.limits_tuner is not None:
+            self.limits_tuner.record(
+                "data", samples_data, time.perf_counter() - start_time
+            )
+
+        return samples_data
+
+    def _get_project_data(
+        self,
+        samples_ids: List[Union[str, int, float]],
+        columns: List[Column],
+        cancellation: Optional[CancellationToken] = None,
+    ) -> pd.DataFrame:
+        # Get the data from the project, awaited if get_data is async
+        with span("project.get_data", nbSamples=len(samples_ids)):
+            df_data = resolve_result(self.project.get_data(samples_ids), cancellation)
 
         # Create a copy of the dataframe
         df_data = df_data.copy()
 
         # Verify that all the columns are in the dataframe
-        columns = self.get_columns()
-        if not columns:
-            raise ValueError("The project has no columns defined.")
-
         for column in columns:
             if column.name not in df_data.columns:
                 # Add the column to the dataframe
                 df_data[column.name] = None
 
-        return dataframe_to_debiai_data_array(
-            columns=columns, samples_id=samples_ids, data=df_data
-        )
+        return df_data
 
     # Models
+    @reading
     def get_models(self) -> List[ModelDetail]:
         models = self.project.get_models()
 
@@ -374,50 +927,338 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
 
         return model_details
 
+    @reading
     def get_model_evaluated_data_id_list(self, model_id: str) -> List[str]:
         return self.project.get_model_evaluated_data_id_list(model_id)
 
+    @reading
     def get_model_results(
-        self, model_id: str, sample_ids: List[str]
+        self,
+        model_id: str,
+        sample_ids: List[str],
+        cancellation: Optional[CancellationToken] = None,
     ) -> Dict[str, list]:
-        df_results = self.project.get_model_results(model_id, sample_ids)
+        with span("project.validate_results_columns"):
+            results_columns = self.get_results_columns() or []
+
+        if self.results_cache is None:
+            return self._compute_by_sub_chunks(
+                sample_ids,
+                lambda chunk: self._compute_model_results(
+                    model_id, chunk, results_columns, cancellation
+                ),
+                cancellation,
+            )
 
-        # Convert the dataframe to a list of dictionaries
-        results = df_results.to_dict(orient="records")
-        # Results:
-        # {
-        #     s_id: {
-        #         "res_col_1": "OK",
-        #         "res_col_2": 0.05,
-        #         "res_col_3": 0.94,
-        #         ...
-        #     },
-        #     "..."
-        # }
+        self._validate_results_cache(results_columns, [model_id])
 
-        # Convert to list with same order as results columns:
-        # {
-        #     s_id: ["OK", 0.05, 0.94, ...],
-        #     "..."
-        # }
-        results_dict = {}
-        results_columns = self.get_results_columns()
+        # Get the cached results, only the missing ones are asked to the project
+        cached_results = {}
+        missing_sample_ids = []
+        for sample_id in sample_ids:
+            result = self.results_cache.get((model_id, sample_id))
+            if result is None:
+                missing_sample_ids.append(sample_id)
+            else:
+                cached_results[sample_id] = result
 
-        for sample_id, result in zip(sample_ids, results):
-            results_list = []
+        if missing_sample_ids:
 
-            for column in results_columns:
-                if column.name in result:
-                    results_list.append(result[column.name])
-                else:
-                    results_list.append(None)
+            def compute_results(keys: list) -> dict:
+                computed_results = self._compute_model_results(
+                    model_id, [key[2] for key in keys], results_columns, cancellation
+                )
+                for sample_id, result in computed_results.items():
+                    self.results_cache.set((model_id, sample_id), result)
+                return {
+                    ("results", model_id, s_id): result
+                    for s_id, result in computed_results.items()
+                }
+
+            def compute_chunk(chunk: List[str]) -> dict:
+                computed_results = self.single_flight.do_many(
+                    [("results", model_id, s_id) for s_id in chunk],
+                    compute_results,
+                )
+                return {key[2]: result for key, result in computed_results.items()}
 
-            results_dict[sample_id] = results_list
+            cached_results.update(
+                self._compute_by_sub_chunks(
+                    missing_sample_ids, compute_chunk, cancellation
+                )
+            )
+
+        # Keep the requested order
+        return {
+            sample_id: cached_results[sample_id]
+            for sample_id in sample_ids
+            if sample_id in cached_results
+        }
+
+    @reading
+    def get_models_results(
+        self,
+        model_ids: List[str],
+        sample_ids: List[str],
+        cancellation: Optional[CancellationToken] = None,
+    ) -> Dict[str, Dict[str, list]]:
+        """
+        Results of several models in one request, by model ID then sample ID.
+        The results are asked to the project in a single call if it implements
+        get_models_results, otherwise one call by model.
+        """
+        with span("project.validate_results_columns"):
+            results_columns = self.get_results_columns() or []
+        models_results: Dict[str, Dict[str, list]] = {
+            model_id: {} for model_id in model_ids
+        }
+
+        if self.results_cache is None:
+            computed_results = self._compute_by_sub_chunks(
+                sample_ids,
+                lambda chunk: self._compute_models_results(
+                    model_ids, chunk, results_columns, cancellation
+                ),
+                cancellation,
+            )
+        else:
+            self._validate_results_cache(results_columns, model_ids)
+
+            missing_keys = []
+            for model_id in model_ids:
+                for sample_id in sample_ids:
+                    result = self.results_cache.get((model_id, sample_id))
+                    if result is None:
+                        missing_keys.append(("results", model_id, sample_id))
+                    else:
+                        models_results[model_id][sample_id] = result
+
+            def compute_results(keys: list) -> dict:
+                # The union of the missing models and samples, in one call
+                computed_results = self._compute_models_results(
+                    list(dict.fromkeys(key[1] for key in keys)),
+                    list(dict.fromkeys(key[2] for key in keys)),
+                    results_columns,
+                    cancellation,
+                )
+                for (model_id, sample_id), result in computed_results.items():
+                    self.results_cache.set((model_id, sample_id), result)
+                return {
+                    ("results", model_id, sample_id): result
+                    for (model_id, sample_id), result in computed_results.items()
+                }
+
+            def compute_chunk(keys: list) -> dict:
+                computed_results = self.single_flight.do_many(keys, compute_results)
+                return {key[1:]: result for key, result in computed_results.items()}
+
+            computed_results = {}
+            if missing_keys:
+                computed_results = self._compute_by_sub_chunks(
+                    missing_keys, compute_chunk, cancellation
+                )
+
+        for (model_id, sample_id), result in computed_results.items():
+            if model_id in models_results:
+                models_results[model_id][sample_id] = result
+
+        # Keep the requested order
+        return {
+            model_id: {
+                sample_id: models_results[model_id][sample_id]
+                for sample_id in sample_ids
+                if sample_id in models_results[model_id]
+            }
+            for model_id in model_ids
+        }
+
+    def _validate_results_cache(
+        self, results_columns: List[ExpectedResult], model_ids: List[str]
+    ):
+        # The cached rows are only valid for the same results columns
+        columns_names = tuple(column.name for column in results_columns)
+        if columns_names != self._results_cache_columns:
+            self.results_cache.clear()
+            self._results_cache_columns = columns_names
+
+        # Nor for a model that has been re-evaluated
+        for model_id in model_ids:
+            model_version = self.project.get_model_version(model_id)
+            if self._results_cache_versions.get(model_id) != model_version:
+                self.results_cache.invalidate_group(model_id)
+                self._results_cache_versions[model_id] = model_version
+
+    def invalidate_model_results(self, model_id: Optional[str] = None):
+        """
+        Removes the cached results of a model, or of all the models if
+        no model ID is given. Should be called when a model is re-evaluated.
+        """
+        if self.results_cache is None:
+            return
+
+        if model_id is None:
+            self.results_cache.clear()
+        else:
+            self.results_cache.invalidate_group(model_id)
+
+    @reading
+    def refresh_models(self) -> Dict[str, List[str]]:
+        """
+        Asks the project to discover its new, modified and removed models,
+        the cached results of the modified and removed ones are dropped.
+        """
+        try:
+            changes = self.project.refresh_models()
+        except NotImplementedError:
+            raise ValueError(
+                f"Project '{self.project_name}' does not implement the refresh_models method."
+            )
+
+        for model_id in changes.get("modified", []) + changes.get("removed", []):
+            self.invalidate_model_results(model_id)
+
+        # The number of models may have changed
+        self._overview_stale = True
+
+        return changes
+
+    def reload(self):
+        """
+        Reloads the project data. The new version is prepared while the current
+        one is served, then swapped in between two requests: a request sees
+        either the previous or the new version, never both.
+        """
+        try:
+            swap = self.project.prepare_reload()
+        except NotImplementedError:
+            raise ValueError(
+                f"Project '{self.project_name}' does not implement the prepare_reload method."
+            )
+
+        with self.lock.write():
+            swap()
+
+            # The analyses pinned the samples of the previous version
+            self.analysis_sessions.end_all()
+            self._overview_stale = True
+
+    def _compute_model_results(
+        self,
+        model_id: str,
+        sample_ids: List[str],
+        results_columns: List[ExpectedResult],
+        cancellation: Optional[CancellationToken] = None,
+    ) -> Dict[str, list]:
+        start_time = time.perf_counter()
+        from debiai_data_provider.utils.parser import dataframe_to_results
+
+        with span(
+            "project.get_model_results", modelId=model_id, nbSamples=len(sample_ids)
+        ):
+            df_results = resolve_result(
+                self.project.get_model_results(model_id, sample_ids), cancellation
+            )
+
+        with span("build_results", nbSamples=len(sample_ids)):
+            # Results, by sample ID, in the results columns order:
+            # {
+            #     s_id: ["OK", 0.05, 0.94, ...],
+            #     "..."
+            # }
+            results_dict = dataframe_to_results(results_columns, sample_ids, df_results)
+
+        if self.limits_tuner is not None:
+            self.limits_tuner.record(
+                "results", results_dict, time.perf_counter() - start_time
+            )
 
         return results_dict
 
+    def _compute_models_results(
+        self,
+        model_ids: List[str],
+        sample_ids: List[str],
+        results_columns: List[ExpectedResult],
+        cancellation: Optional[CancellationToken] = None,
+    ) -> Dict[Tuple[str, str], list]:
+        # Results by (model ID, sample ID)
+        from debiai_data_provider.utils.parser import dataframe_to_results
+
+        start_time = time.perf_counter()
+        try:
+            with span(
+                "project.get_models_results",
+                nbModels=len(model_ids),
+                nbSamples=len(sample_ids),
+            ):
+                models_df = resolve_result(
+                    self.project.get_models_results(model_ids, sample_ids),
+                    cancellation,
+                )
+        except NotImplementedError:
+            models_results = {}
+            for model_id in model_ids:
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled()
+                model_results = self._compute_model_results(
+                    model_id, sample_ids, results_columns, cancellation
+                )
+                for sample_id, result in model_results.items():
+                    models_results[(model_id, sample_id)] = result
+            return models_results
+
+        with span("build_results", nbSamples=len(sample_ids)):
+            models_results = {}
+            for model_id in model_ids:
+                # The unknown models have no results
+                if model_id not in models_df:
+                    continue
+                model_results = dataframe_to_results(
+                    results_columns, sample_ids, models_df[model_id]
+                )
+                for sample_id, result in model_results.items():
+                    models_results[(model_id, sample_id)] = result
+
+        if self.limits_tuner is not None:
+            self.limits_tuner.record(
+                "results",
+                dict(enumerate(models_results.values())),
+                time.perf_counter() - start_time,
+            )
+
+        return models_results
+
+    # Diagnostics
+    @reading
+    def get_diagnostics(self) -> dict:
+        """
+        Get the memory used by the project data, indexes and caches,
+        with its number of samples, columns and models and its load duration.
+        """
+        memory = dict(self.project.get_memory_details() or {})
+        if self.results_cache is not None:
+            memory["resultsCache"] = self.results_cache.memory_usage
+        memory["analyses"] = self.analysis_sessions.get_stats()["memoryUsage"]
+
+        columns = self.get_columns() or []
+        results_columns = self.get_results_columns() or []
+
+        return {
+            "nbSamples": self.get_nb_samples(),
+            "nbColumns": len(columns),
+            "nbResultsColumns": len(results_columns),
+            "nbModels": len(self.get_models()),
+            "loadDuration": self.project.load_duration,
+            "memoryUsage": sum(memory.values()),
+            "memory": memory,
+        }
+
     # Other
+    @reading
     def get_rich_table(self):
+        import pandas as pd
+        from rich.table import Table
+
         # Display the Project details
         table = Table(width=80)
         table.add_column(
@@ -472,6 +1313,28 @@ Expected dictionary format: {{"col_name": {{"type": text, "group": text}}}}.'
             table.add_row("NB samples:", f"{nb_samples}")
             table.add_row("", "")
 
+        # Display the memory used by the project data,
+        # the deep memory scan of the dataframes is only done once
+        memory_details = self.project.get_memory_details()
+        if memory_details is not None:
+            table.add_row("Memory:", format_bytes(sum(memory_details.values())))
+            for memory_part, memory_usage in memory_details.items():
+                table.add_row(
+                    f"[bold green]{memory_part}[/bold green]",
+                    format_bytes(memory_usage),
+                )
+            table.add_row("", "")
+        else:
+            memory_usage = self.project.get_memory_usage()
+            if memory_usage is not None:
+                table.add_row("Memory:", format_bytes(memory_usage))
+                table.add_row("", "")
+
+        # Display the project loading duration
+        if self.project.load_duration is not None:
+            table.add_row("Load duration:", f"{self.project.load_duration:.2f}s")
+            table.add_row("", "")
+
         # Display the project results structure
         results_columns = self.get_results_columns()
         if results_columns:
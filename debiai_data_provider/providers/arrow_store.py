@@ -0,0 +1,131 @@
+import os
+import glob
+import json
+import hashlib
+import tempfile
+import pandas as pd
+from debiai_data_provider.version import VERSION
+from pathlib import Path
+from typing import List, Optional
+
+# Validated project data stored as uncompressed Arrow IPC (Feather v2) files,
+# memory-mapped by the provider processes: the processes serving the same
+# dataset on a host share the page cache copy of the file instead of each
+# decoding the parquet file into its own heap
+
+
+def source_fingerprint(paths: List[str], config: dict) -> str:
+    """
+    Fingerprint of the source files and of the configuration they are loaded with,
+    changes when a file is modified.
+    """
+    sources = []
+    for path in paths:
+        stat = os.stat(path)
+        sources.append([os.path.abspath(path), stat.st_mtime_ns, stat.st_size])
+
+    key = json.dumps(
+        {"sources": sources, "config": config, "version": VERSION},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def store_name(path: str) -> str:
+    """
+    Name of the stored files of a source, unique by source path.
+    """
+    path_hash = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return f"{Path(path).stem}-{path_hash[:8]}"
+
+
+def _pandas_dtype(arrow_type):
+    import pyarrow as pa
+
+    # Categoricals are decoded, only their codes are copied
+    if pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
+class ArrowStore:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_path(self, name: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{fingerprint}.arrow")
+
+    def load(self, name: str, fingerprint: str) -> Optional[pd.DataFrame]:
+        """
+        Memory-maps a stored dataframe, None if it has not been stored yet.
+        """
+        import pyarrow as pa
+
+        path = self.get_path(name, fingerprint)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            return self._read_mapped(path)
+        except (pa.ArrowInvalid, OSError):
+            # Truncated or corrupted file, stored again by the caller
+            self._remove(path)
+            return None
+
+    def save(
+        self, name: str, fingerprint: str, dataframe: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Stores a dataframe and returns its memory-mapped copy.
+
+        Raises:
+            pyarrow.ArrowException: The dataframe can't be converted to Arrow,
+                for example a column with mixed types.
+        """
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+
+        # Written next to its final path then renamed, the processes
+        # loading the same dataset never map a partially written file
+        path = self.get_path(name, fingerprint)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                with pa.ipc.new_file(tmp_file, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        self.remove_stale(name, fingerprint)
+        return self._read_mapped(path)
+
+    def remove_stale(self, name: str, fingerprint: str):
+        """
+        Removes the files stored for the previous versions of a source.
+        The processes still mapping them keep their mapping until they reload.
+        """
+        pattern = os.path.join(
+            glob.escape(self.cache_dir), f"{glob.escape(name)}-{'?' * 32}.arrow"
+        )
+        for path in glob.glob(pattern):
+            if path != self.get_path(name, fingerprint):
+                self._remove(path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _read_mapped(self, path: str) -> pd.DataFrame:
+        import pyarrow as pa
+
+        # Zero-copy: the Arrow backed columns point into the mapped file
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(types_mapper=_pandas_dtype)
@@ -1,9 +1,19 @@
 import os
+import time
+import threading
 import pandas as pd
 import numpy as np
 from debiai_data_provider.models.project import DebiAIProject
+from debiai_data_provider.providers.arrow_store import (
+    ArrowStore,
+    source_fingerprint,
+    store_name,
+)
+from debiai_data_provider.providers.parquet_dataset import PartitionedParquetDataset
+from debiai_data_provider.providers.parquet_results import ParquetResultsCatalog
+from debiai_data_provider.utils.memory import dataframe_memory_usage
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Callable, Dict, List, Literal, Optional
 from pathlib import Path
 from rich.console import Console
 from rich.table import Table
@@ -11,8 +21,34 @@ from rich.table import Table
 # A Data-provider that only needs a path to a parquet file
 
 
+def is_json_arrow_column(values: pd.Series) -> bool:
+    import pyarrow as pa
+
+    if not isinstance(values.dtype, pd.ArrowDtype):
+        return False
+
+    def is_json_type(arrow_type) -> bool:
+        if pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+            return is_json_type(arrow_type.value_type)
+        if pa.types.is_struct(arrow_type):
+            return all(is_json_type(field.type) for field in arrow_type)
+        return (
+            pa.types.is_string(arrow_type)
+            or pa.types.is_large_string(arrow_type)
+            or pa.types.is_integer(arrow_type)
+            or pa.types.is_floating(arrow_type)
+            or pa.types.is_boolean(arrow_type)
+            or pa.types.is_null(arrow_type)
+        )
+
+    return is_json_type(values.dtype.pyarrow_dtype)
+
+
 class ParquetDataProviderConfig(BaseModel):
-    parquet_path: str = Field(..., description="Path to the parquet file")
+    parquet_path: str = Field(
+        ...,
+        description="Path to the parquet file, or to the folder of a hive partitioned dataset",
+    )
     sample_id_column_name: str = Field(
         ...,
         description="Name of the column containing the sample IDs, for the samples and results",
@@ -33,13 +69,58 @@ class ParquetDataProviderConfig(BaseModel):
     ignored_results_columns: Optional[List[str]] = Field(
         None, description="Columns to ignore in model results"
     )
+    lazy_results_loading: bool = Field(
+        False,
+        description="Only read the model results files metadata at startup, "
+        + "the results of a model are loaded when requested",
+    )
+    results_max_memory: Optional[int] = Field(
+        None,
+        description="Memory budget in bytes of the model results loaded on demand, "
+        + "the least recently used ones are evicted",
+    )
+    results_rescan_interval: Optional[float] = Field(
+        None,
+        description="Seconds between two scans of the results folder "
+        + "for new, modified or deleted model files, None to disable",
+    )
+    max_categories: Optional[int] = Field(
+        256,
+        description="Text columns with at most this number of distinct values "
+        + "are stored as categoricals, None to disable",
+    )
+    compact_memory: bool = Field(
+        False,
+        description="Keep the data in Arrow backed columns with downcast numbers, "
+        + "converted to Python values only when sent to DebiAI",
+    )
+    list_encoding: Optional[Literal["float32", "float16"]] = Field(
+        None,
+        description="Send the numeric list columns, like embeddings, as base64 "
+        + "strings of float32 or float16 buffers instead of JSON numbers",
+    )
+    cache_dir: Optional[str] = Field(
+        None,
+        description="Folder where the validated data, model results and partitioned "
+        + "dataset index are stored as Arrow files, memory-mapped on the next "
+        + "startups and shared by the processes serving the same dataset",
+    )
 
 
 class ParquetDataProvider(DebiAIProject):
     creation_date = "2025-03-28"
     # update_date = "2025-03-28"
     data: pd.DataFrame = None
-    model_results: pd.DataFrame = None
+    # Arrow files of the cache_dir, rebuilt when a source file changes
+    store: Optional[ArrowStore] = None
+    # Set when the data is memory-mapped from the cache_dir Arrow file
+    data_store_path: Optional[str] = None
+    results_catalog: ParquetResultsCatalog = None
+    _stop_rescan: threading.Event = None
+    # Set instead of data for partitioned datasets, read on demand
+    partitioned_dataset: PartitionedParquetDataset = None
+    # Incremented when the samples are reloaded, the loaded data is never modified
+    data_version: int = 0
 
     def __init__(
         self,
@@ -51,6 +132,14 @@ class ParquetDataProvider(DebiAIProject):
         results_columns: Optional[List[str]] = None,
         ignored_columns: Optional[List[str]] = None,
         ignored_results_columns: Optional[List[str]] = None,
+        lazy_results_loading: bool = False,
+        results_max_memory: Optional[int] = None,
+        results_rescan_interval: Optional[float] = None,
+        max_categories: Optional[int] = 256,
+        compact_memory: bool = False,
+        list_encoding: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        verbose: bool = True,
     ):
         super().__init__()
         self.config = ParquetDataProviderConfig(
@@ -62,6 +151,13 @@ class ParquetDataProvider(DebiAIProject):
             results_columns=results_columns,
             ignored_columns=ignored_columns,
             ignored_results_columns=ignored_results_columns,
+            lazy_results_loading=lazy_results_loading,
+            results_max_memory=results_max_memory,
+            results_rescan_interval=results_rescan_interval,
+            max_categories=max_categories,
+            compact_memory=compact_memory,
+            list_encoding=list_encoding,
+            cache_dir=cache_dir,
         )
 
         # Setup name
@@ -72,6 +168,18 @@ class ParquetDataProvider(DebiAIProject):
             self.name = Path(self.config.parquet_path).stem
 
         # Display project information
+        if verbose:
+            self.display_loading_table()
+
+        # Load the data from the parquet files
+        start_time = time.perf_counter()
+        if self.config.cache_dir:
+            self.store = ArrowStore(self.config.cache_dir)
+        self.load_project_parquet_samples()
+        self.load_model_parquet_results()
+        self.load_duration = time.perf_counter() - start_time
+
+    def display_loading_table(self):
         console = Console()
         table = Table(title="Loading Parquet File")
         table.add_column("Property", style="cyan", no_wrap=True)
@@ -89,12 +197,55 @@ class ParquetDataProvider(DebiAIProject):
         table.add_row("Sample ID Column", self.config.sample_id_column_name)
         console.print(table)
 
-        # Load the data from the parquet files
-        self.load_project_parquet_samples()
-        self.load_model_parquet_results()
-
     def load_project_parquet_samples(self):
-        parquet_df = pd.read_parquet(self.config.parquet_path)
+        if os.path.isdir(self.config.parquet_path):
+            self.load_partitioned_parquet_samples()
+            return
+
+        if self.store is None:
+            self.data = self.read_project_parquet_samples()
+            return
+
+        # Validated once, then shared by the processes through the page cache
+        store = self.store
+        name = store_name(self.config.parquet_path)
+        fingerprint = source_fingerprint(
+            [self.config.parquet_path],
+            self.config.model_dump(
+                include={
+                    "sample_id_column_name",
+                    "columns",
+                    "ignored_columns",
+                    "max_categories",
+                    "compact_memory",
+                }
+            ),
+        )
+
+        data = store.load(name, fingerprint)
+        if data is None:
+            data = self.read_project_parquet_samples()
+            try:
+                data = store.save(name, fingerprint, data)
+            except Exception as e:
+                Console().print(
+                    "[bold yellow]Warning:[/bold yellow] The data can't be stored "
+                    + f"in the cache folder, it is kept in memory: {e}"
+                )
+                self.data = data
+                return
+
+        self.data = data
+        self.data_store_path = store.get_path(name, fingerprint)
+
+    def read_project_parquet_samples(self) -> pd.DataFrame:
+        if self.config.compact_memory:
+            # Arrow backed columns, without a Python object per value
+            parquet_df = pd.read_parquet(
+                self.config.parquet_path, dtype_backend="pyarrow"
+            )
+        else:
+            parquet_df = pd.read_parquet(self.config.parquet_path)
 
         # Check if the sample_id_column_name is in the columns
         if self.config.sample_id_column_name not in parquet_df.columns:
@@ -155,6 +306,10 @@ class ParquetDataProvider(DebiAIProject):
         # Validate data types and log faulty columns
         valid_types = (str, int, float, bool, list, dict)
         for column in parquet_df.columns:
+            if self.config.compact_memory and is_json_arrow_column(parquet_df[column]):
+                # Sent as str, int, float, bool, list, dict or None values
+                continue
+
             invalid_rows = parquet_df[column].apply(
                 lambda x: not isinstance(x, valid_types)
             )
@@ -179,82 +334,156 @@ cause issues in DebiAI, you can use the `ignored_columns` parameter to ignore th
 
                 console.print(table)
 
-        # Convert np.int64 to native Python int
-        parquet_df = parquet_df.map(lambda x: int(x) if isinstance(x, np.int64) else x)
+        if self.config.compact_memory:
+            # Converted to Python values when the samples are sent
+            parquet_df = self.downcast_numeric_columns(parquet_df)
+        else:
+            # Convert np.int64 to native Python int
+            parquet_df = parquet_df.map(
+                lambda x: int(x) if isinstance(x, np.int64) else x
+            )
 
-        # Store the data
-        self.data = parquet_df
+        # Store the low cardinality text columns as categoricals
+        parquet_df = self.convert_low_cardinality_columns(parquet_df)
 
-    def load_model_parquet_results(self):
-        if not self.config.results_parquet_folder_path:
-            return
+        return parquet_df
 
-        model_results = None
+    def load_partitioned_parquet_samples(self):
+        # Only the sample IDs are loaded, with the files and row groups containing them
+        try:
+            self.partitioned_dataset = PartitionedParquetDataset(
+                self.config.parquet_path,
+                sample_id_column_name=self.config.sample_id_column_name,
+                columns=self.config.columns,
+                ignored_columns=self.config.ignored_columns,
+                store=self.store,
+            )
+        except ValueError as e:
+            console = Console()
+            console.print(f"[bold red]Error:[/bold red] {e}", style="red")
+            raise
 
-        for results_file in os.listdir(self.config.results_parquet_folder_path):
-            if not results_file.endswith(".parquet"):
+    def convert_low_cardinality_columns(self, parquet_df: pd.DataFrame) -> pd.DataFrame:
+        if not self.config.max_categories:
+            return parquet_df
+
+        for column in parquet_df.columns:
+            if column == self.config.sample_id_column_name:
+                continue
+            if not (
+                pd.api.types.is_object_dtype(parquet_df[column])
+                or pd.api.types.is_string_dtype(parquet_df[column])
+            ):
                 continue
 
-            model_name = results_file.split(".")[0]
-            parquet_df = pd.read_parquet(
-                os.path.join(self.config.results_parquet_folder_path, results_file)
-            )
+            try:
+                nb_values = parquet_df[column].nunique()
+            except TypeError:
+                # Unhashable values, lists or dicts
+                continue
 
-            # Check if the sample_id_column_name is in the columns
-            if self.config.sample_id_column_name not in parquet_df.columns:
-                console = Console()
-                available_columns = "\n".join(
-                    f"  - {col}" for col in parquet_df.columns
-                )
-                console.print(
-                    f"[bold red]Error:[/bold red] Column \
-'[cyan]{self.config.sample_id_column_name}[/cyan]' not found in the {model_name} parquet file.",
-                    style="red",
-                )
-                console.print(
-                    "[bold red]This column is required to map the model \
-results to the samples.[/bold red]",
-                    style="red",
-                )
-                console.print(
-                    f"[bold magenta]Available columns are:[/bold magenta]\n{available_columns}",
-                    style="magenta",
-                )
-                raise ValueError(
-                    f"Column '{self.config.sample_id_column_name}' not found in the parquet file."
-                )
+            # Only worth it when the values are repeated
+            if nb_values <= self.config.max_categories and nb_values * 2 <= len(
+                parquet_df
+            ):
+                parquet_df[column] = parquet_df[column].astype("category")
 
-            # Filter columns if specified
-            if self.config.results_columns:
-                columns_to_keep = set(self.config.results_columns)
+        return parquet_df
 
-                # Keep the sample_id_column_name if specified
-                if self.config.sample_id_column_name:
-                    columns_to_keep.add(self.config.sample_id_column_name)
+    def downcast_numeric_columns(self, parquet_df: pd.DataFrame) -> pd.DataFrame:
+        # Smallest Arrow types holding the exact same values
+        import pyarrow as pa
 
-                parquet_df = parquet_df[list(columns_to_keep)]
+        for column in parquet_df.columns:
+            values = parquet_df[column]
+            if not isinstance(values.dtype, pd.ArrowDtype) or values.isna().all():
+                continue
 
-            # Filter out ignored columns
-            if self.config.ignored_results_columns:
-                parquet_df = parquet_df.drop(
-                    columns=self.config.ignored_results_columns, errors="ignore"
-                )
+            arrow_type = values.dtype.pyarrow_dtype
+            if pa.types.is_signed_integer(arrow_type):
+                min_value, max_value = values.min(), values.max()
+                for int_type in [np.int8, np.int16, np.int32]:
+                    int_info = np.iinfo(int_type)
+                    if np.dtype(int_type).itemsize >= arrow_type.bit_width // 8:
+                        break
+                    if int_info.min <= min_value and max_value <= int_info.max:
+                        parquet_df[column] = values.astype(
+                            pd.ArrowDtype(pa.from_numpy_dtype(int_type))
+                        )
+                        break
+
+            elif pa.types.is_float64(arrow_type):
+                float32_values = values.astype(pd.ArrowDtype(pa.float32()))
+                if np.array_equal(
+                    values.to_numpy(dtype=np.float64, na_value=np.nan),
+                    float32_values.to_numpy(dtype=np.float64, na_value=np.nan),
+                    equal_nan=True,
+                ):
+                    parquet_df[column] = float32_values
+
+        return parquet_df
 
-            # Add a _model_name column
-            parquet_df["_model_name"] = model_name
+    def load_model_parquet_results(self):
+        if not self.config.results_parquet_folder_path:
+            return
 
-            if model_results is None:
-                model_results = parquet_df
-            else:
-                # Stack the results
-                model_results = pd.concat(
-                    [model_results, parquet_df], ignore_index=True
+        self.results_catalog = ParquetResultsCatalog(
+            self.config.results_parquet_folder_path,
+            sample_id_column_name=self.config.sample_id_column_name,
+            results_columns=self.config.results_columns,
+            ignored_results_columns=self.config.ignored_results_columns,
+            lazy=self.config.lazy_results_loading,
+            max_memory=self.config.results_max_memory,
+            store=self.store,
+        )
+        self.results_catalog.scan()
+
+        if self.config.results_rescan_interval:
+            self._stop_rescan = threading.Event()
+            threading.Thread(
+                target=self._rescan_results_periodically,
+                name=f"debiai-results-rescan-{self.name}",
+                daemon=True,
+            ).start()
+
+    def _rescan_results_periodically(self):
+        while not self._stop_rescan.wait(self.config.results_rescan_interval):
+            try:
+                self.refresh_models()
+            except Exception as e:
+                Console().print(
+                    "[bold red]Error:[/bold red] Failed to rescan the results of "
+                    + f"'{self.name}': {e}"
                 )
 
-        # Store the model results
-        self.model_results = model_results
+    def stop_results_rescan(self):
+        if self._stop_rescan is not None:
+            self._stop_rescan.set()
+
+    @property
+    def model_results(self) -> Optional[pd.DataFrame]:
+        # All the models results stacked, with a _model_name column
+        if self.results_catalog is None:
+            return None
+
+        return self.results_catalog.get_stacked_results()
 
     # Project Info
+    def get_memory_details(self) -> Dict[str, int]:
+        # The samples, the loaded model results and the partitioned dataset index
+        memory_details = {}
+        if self.data is not None:
+            # Mapped data is in the page cache, shared with the other processes
+            data_key = "data" if self.data_store_path is None else "mappedData"
+            memory_details[data_key] = dataframe_memory_usage(self.data)
+        if self.results_catalog is not None:
+            memory_details["results"] = self.results_catalog.get_memory_usage()
+        if self.partitioned_dataset is not None:
+            memory_details["indexes"] = dataframe_memory_usage(
+                self.partitioned_dataset.sample_index
+            )
+        return memory_details
+
     def get_structure(self) -> dict:
         # Load the data from the parquet file
         UNWANTED_COLUMNS = [self.config.sample_id_column_name]
@@ -262,7 +491,13 @@ results to the samples.[/bold red]",
         # Create the structure
         project_structure = {}
 
-        for col in self.data.columns:
+        if self.partitioned_dataset is not None:
+            # Partition keys included
+            columns = self.partitioned_dataset.columns
+        else:
+            columns = self.data.columns
+
+        for col in columns:
             if col in UNWANTED_COLUMNS:
                 continue
 
@@ -271,8 +506,53 @@ results to the samples.[/bold red]",
                 "type": "auto",
             }
 
+        if self.config.list_encoding:
+            for col in self.get_numeric_list_columns():
+                if col in project_structure:
+                    project_structure[col]["type"] = "list"
+                    project_structure[col]["encoding"] = self.config.list_encoding
+
         return project_structure
 
+    def get_numeric_list_columns(self) -> List[str]:
+        import pyarrow as pa
+
+        def is_numeric_list_type(arrow_type) -> bool:
+            return (
+                pa.types.is_list(arrow_type)
+                or pa.types.is_large_list(arrow_type)
+                or pa.types.is_fixed_size_list(arrow_type)
+            ) and (
+                pa.types.is_integer(arrow_type.value_type)
+                or pa.types.is_floating(arrow_type.value_type)
+            )
+
+        if self.partitioned_dataset is not None:
+            schema = self.partitioned_dataset.dataset.schema
+            return [
+                column
+                for column in self.partitioned_dataset.columns
+                if is_numeric_list_type(schema.field(column).type)
+            ]
+
+        numeric_list_columns = []
+        for column in self.data.columns:
+            values = self.data[column]
+            if isinstance(values.dtype, pd.ArrowDtype):
+                if is_numeric_list_type(values.dtype.pyarrow_dtype):
+                    numeric_list_columns.append(column)
+                continue
+
+            # Lists or arrays of numbers, checked on the first value
+            if not pd.api.types.is_object_dtype(values) or values.empty:
+                continue
+            first_value = values.iloc[0]
+            if isinstance(first_value, (list, np.ndarray)) and len(first_value) > 0:
+                if np.asarray(first_value).dtype.kind in "iuf":
+                    numeric_list_columns.append(column)
+
+        return numeric_list_columns
+
     def get_results_structure(self) -> dict:
         # Load the data from the parquet file
         if not self.config.results_parquet_folder_path:
@@ -285,9 +565,9 @@ results to the samples.[/bold red]",
         # Create the structure
         results_structure = {}
 
-        # Iterate over the columns of the model_results DataFrame
-        for col in self.model_results.columns:
-            if col in UNWANTED_COLUMNS or col == "_model_name":
+        # Iterate over the columns of the models results files
+        for col in self.results_catalog.get_columns():
+            if col in UNWANTED_COLUMNS:
                 continue
 
             results_structure[col] = {"type": "auto"}
@@ -297,10 +577,16 @@ results to the samples.[/bold red]",
     # Project Samples
     def get_nb_samples(self) -> int:
         # This function returns the number of samples in the project
+        if self.partitioned_dataset is not None:
+            return len(self.partitioned_dataset)
+
         return len(self.data)
 
     def get_samples_ids(self) -> List[str]:
         # This function returns the list of samples ids
+        if self.partitioned_dataset is not None:
+            return self.partitioned_dataset.get_samples_ids()
+
         project_data = self.data
         return project_data[self.config.sample_id_column_name].tolist()
 
@@ -310,6 +596,10 @@ results to the samples.[/bold red]",
 
         # The function should return a pandas DataFrame
         # containing the data corresponding to the samples_ids
+        if self.partitioned_dataset is not None:
+            # Only the files and row groups containing the samples are read
+            return self.partitioned_dataset.read(samples_ids)
+
         project_data = self.data.set_index(self.config.sample_id_column_name)
         data = project_data.loc[samples_ids]
         return data
@@ -317,16 +607,17 @@ results to the samples.[/bold red]",
     # Project models
     def get_models(self) -> List[dict]:
         # List the models available in the project
-        if self.model_results is None:
+        if self.results_catalog is None:
             return []
 
         models = []
-        # Get the list of models from model_results dataframe
-        unique_model_names = self.model_results["_model_name"].unique()
-
-        for model_name in unique_model_names:
+        for model_name in self.results_catalog.get_model_ids():
             # Count the number of results for the model
-            num_results = len(self.get_model_evaluated_data_id_list(model_name))
+            if self.config.lazy_results_loading:
+                # Read from the file metadata, without loading the results
+                num_results = self.results_catalog.get_nb_rows(model_name)
+            else:
+                num_results = len(self.get_model_evaluated_data_id_list(model_name))
 
             models.append(
                 {
@@ -346,19 +637,54 @@ results to the samples.[/bold red]",
         if not self.config.results_parquet_folder_path:
             return []
 
-        # Filter the model results
-        model_results = self.model_results[
-            self.model_results["_model_name"] == model_id
-        ]
-
         # Only keep the samples_id that are in the project data
+        evaluated_samples_ids = self.results_catalog.get_evaluated_samples_ids(model_id)
         project_samples_id = self.get_samples_ids()
-        model_results = model_results[
-            model_results[self.config.sample_id_column_name].isin(project_samples_id)
+        evaluated_samples_ids = evaluated_samples_ids[
+            evaluated_samples_ids.isin(project_samples_id)
         ]
 
         # Return the list of sample IDs
-        return model_results[self.config.sample_id_column_name].tolist()
+        return evaluated_samples_ids.tolist()
+
+    def get_version(self):
+        # Changes when the samples are reloaded or the models results change
+        if self.results_catalog is None:
+            return (self.data_version,)
+
+        return (self.data_version, self.results_catalog.get_version())
+
+    def prepare_reload(self) -> Callable[[], None]:
+        # The samples are read into a new provider, the served ones are not modified
+        reloaded = ParquetDataProvider(
+            **self.config.model_dump(
+                exclude={"results_parquet_folder_path", "results_rescan_interval"}
+            ),
+            verbose=False,
+        )
+
+        def swap():
+            self.data = reloaded.data
+            self.data_store_path = reloaded.data_store_path
+            self.partitioned_dataset = reloaded.partitioned_dataset
+            self.load_duration = reloaded.load_duration
+            self.data_version += 1
+
+        return swap
+
+    def get_model_version(self, model_id: str):
+        # Changes when the model results file is modified
+        if self.results_catalog is None:
+            return None
+
+        return self.results_catalog.get_model_version(model_id)
+
+    def refresh_models(self) -> Dict[str, List[str]]:
+        # Only the new or modified results files are read
+        if self.results_catalog is None:
+            return {"added": [], "modified": [], "removed": []}
+
+        return self.results_catalog.scan(strict=False)
 
     def get_model_results(
         self, model_id: str, samples_ids: List[str]
@@ -367,13 +693,28 @@ results to the samples.[/bold red]",
         if not self.config.results_parquet_folder_path:
             return []
 
-        # Filter the model results
-        model_results = self.model_results[
-            self.model_results["_model_name"] == model_id
-        ]
+        # Get the model results, loaded on demand in lazy mode
+        model_results = self.results_catalog.get_results(model_id)
 
         # Filter the results for the given sample IDs
-        model_results = model_results[model_results["sample_id"].isin(samples_ids)]
+        sample_id_column = self.config.sample_id_column_name
+        model_results = model_results[
+            model_results[sample_id_column].isin(samples_ids)
+        ].drop_duplicates(subset=sample_id_column)
+
+        # Indexed by sample ID in the samples_ids order,
+        # the samples without results are left out
+        model_results = model_results.set_index(sample_id_column, drop=False)
+        requested_ids = pd.Index(samples_ids).unique()
+        return model_results.reindex(
+            requested_ids[requested_ids.isin(model_results.index)]
+        )
+
+    def get_models_results(
+        self, model_ids: List[str], samples_ids: List[str]
+    ) -> Dict[str, pd.DataFrame]:
+        # The requested sample IDs are hashed once for all the models
+        if self.results_catalog is None:
+            return {}
 
-        # Return the filtered DataFrame
-        return model_results
+        return self.results_catalog.get_results_by_samples(model_ids, samples_ids)
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from debiai_data_provider.providers.arrow_store import (
+    ArrowStore,
+    source_fingerprint,
+    store_name,
+)
+from rich.console import Console
+from typing import Dict, List, Optional
+
+# A partitioned parquet dataset, read on demand:
+# only the sample IDs are loaded, the other columns are read from
+# the files and row groups that contain the requested samples
+
+
+class PartitionedParquetDataset:
+    def __init__(
+        self,
+        path: str,
+        sample_id_column_name: str,
+        columns: Optional[List[str]] = None,
+        ignored_columns: Optional[List[str]] = None,
+        store: Optional[ArrowStore] = None,
+    ):
+        """
+        Parameters:
+            path (str): Folder of the hive partitioned dataset (key=value folders).
+            sample_id_column_name (str): Name of the column containing the sample IDs.
+            columns (List[str]): Columns to include, all if not given.
+            ignored_columns (List[str]): Columns to ignore.
+            store (ArrowStore): Store of the sample index, memory-mapped
+                on the next startups while the files are not modified.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        self.path = path
+        self.sample_id_column_name = sample_id_column_name
+        self.dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        self.fragments = list(self.dataset.get_fragments())
+
+        schema_columns = self.dataset.schema.names
+        if sample_id_column_name not in schema_columns:
+            raise ValueError(
+                f"Column '{sample_id_column_name}' not found in the parquet file."
+            )
+
+        id_type = self.dataset.schema.field(sample_id_column_name).type
+        if not (pa.types.is_string(id_type) or pa.types.is_large_string(id_type)):
+            raise ValueError("Sample IDs must be strings.")
+
+        # Columns exposed in the project, partition keys included
+        self.columns = [
+            column
+            for column in schema_columns
+            if column != sample_id_column_name
+            and (not columns or column in columns)
+            and (not ignored_columns or column not in ignored_columns)
+        ]
+
+        self.sample_index = self._load_sample_index(store)
+        if not self.sample_index.index.is_unique:
+            raise ValueError("Sample IDs must be unique.")
+
+    def _load_sample_index(self, store: Optional[ArrowStore]) -> pd.DataFrame:
+        if store is None:
+            return self._build_sample_index()
+
+        # The fragment indexes follow the files order, part of the fingerprint
+        name = store_name(self.path)
+        fingerprint = source_fingerprint(
+            self.dataset.files, {"sample_id_column_name": self.sample_id_column_name}
+        )
+
+        sample_index = store.load(name, fingerprint)
+        if sample_index is not None:
+            return sample_index.set_index(self.sample_id_column_name)
+
+        sample_index = self._build_sample_index()
+        try:
+            store.save(name, fingerprint, sample_index.reset_index())
+        except Exception as e:
+            Console().print(
+                "[bold yellow]Warning:[/bold yellow] The sample index can't be "
+                + f"stored in the cache folder: {e}"
+            )
+        return sample_index
+
+    def _build_sample_index(self) -> pd.DataFrame:
+        # Sample ID -> fragment (file) and row group containing the sample
+        ids = []
+        fragment_ids = []
+        row_groups = []
+
+        for fragment_id, fragment in enumerate(self.fragments):
+            fragment_samples_ids = fragment.to_table(
+                columns=[self.sample_id_column_name]
+            )[self.sample_id_column_name].to_pylist()
+
+            row_groups_sizes = [
+                fragment.metadata.row_group(i).num_rows
+                for i in range(fragment.metadata.num_row_groups)
+            ]
+
+            ids.extend(fragment_samples_ids)
+            fragment_ids.append(
+                np.full(len(fragment_samples_ids), fragment_id, dtype=np.int32)
+            )
+            row_groups.append(
+                np.repeat(
+                    np.arange(len(row_groups_sizes), dtype=np.int32), row_groups_sizes
+                )
+            )
+
+        return pd.DataFrame(
+            {
+                "fragment": np.concatenate(fragment_ids or [np.array([], np.int32)]),
+                "row_group": np.concatenate(row_groups or [np.array([], np.int32)]),
+            },
+            index=pd.Index(ids, dtype=object, name=self.sample_id_column_name),
+        )
+
+    def __len__(self) -> int:
+        return len(self.sample_index)
+
+    def get_samples_ids(self) -> List[str]:
+        return self.sample_index.index.tolist()
+
+    def locate(self, samples_ids: List[str]) -> Dict[int, List[int]]:
+        """
+        Get the files and row groups containing samples.
+
+        Returns:
+            Dict[int, List[int]]: The row groups to read, by fragment index.
+        """
+        locations = self.sample_index.loc[samples_ids]
+        return {
+            int(fragment_id): sorted(set(group["row_group"].tolist()))
+            for fragment_id, group in locations.groupby("fragment")
+        }
+
+    def read(self, samples_ids: List[str]) -> pd.DataFrame:
+        """
+        Reads the samples, only opening the files and row groups that contain them.
+
+        Returns:
+            pd.DataFrame: The samples data, indexed by sample ID, in the samples_ids order.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        columns_to_read = [self.sample_id_column_name] + self.columns
+        ids_filter = pc.field(self.sample_id_column_name).isin(samples_ids)
+
+        tables = []
+        for fragment_id, row_groups in self.locate(samples_ids).items():
+            fragment = self.fragments[fragment_id].subset(row_group_ids=row_groups)
+            tables.append(
+                fragment.to_table(
+                    schema=self.dataset.schema,
+                    columns=columns_to_read,
+                    filter=ids_filter,
+                )
+            )
+
+        if tables:
+            data = pa.concat_tables(tables).to_pandas()
+        else:
+            data = self.dataset.schema.empty_table().select(columns_to_read).to_pandas()
+
+        return data.set_index(self.sample_id_column_name).loc[samples_ids]
@@ -0,0 +1,384 @@
+import os
+import threading
+import pandas as pd
+from debiai_data_provider.providers.arrow_store import (
+    ArrowStore,
+    source_fingerprint,
+    store_name,
+)
+from debiai_data_provider.utils.cache import MemoryBoundedCache
+from debiai_data_provider.utils.memory import dataframe_memory_usage
+from debiai_data_provider.utils.single_flight import SingleFlight
+from typing import Dict, List, Optional, Tuple
+from rich.console import Console
+
+# The model results of a ParquetDataProvider, one parquet file by model
+
+
+class ModelResultsFile:
+    """
+    Metadata of a model results file, read without loading its content.
+    """
+
+    def __init__(self, model_id: str, path: str):
+        import pyarrow.parquet as pq
+
+        self.model_id = model_id
+        self.path = path
+
+        # Used to detect the modified files
+        stat = os.stat(path)
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+
+        metadata = pq.read_metadata(path)
+        self.nb_rows: int = metadata.num_rows
+        self.columns: List[str] = [
+            column
+            for column in metadata.schema.to_arrow_schema().names
+            if not column.startswith("__index_level_")
+        ]
+
+
+class ParquetResultsCatalog:
+    def __init__(
+        self,
+        folder_path: str,
+        sample_id_column_name: str,
+        results_columns: Optional[List[str]] = None,
+        ignored_results_columns: Optional[List[str]] = None,
+        lazy: bool = False,
+        max_memory: Optional[int] = None,
+        store: Optional[ArrowStore] = None,
+    ):
+        """
+        Parameters:
+            folder_path (str): Folder containing one parquet results file by model.
+            sample_id_column_name (str): Name of the column containing the sample IDs.
+            results_columns (List[str]): Results columns to include, all if not given.
+            ignored_results_columns (List[str]): Results columns to ignore.
+            lazy (bool): Only read the files metadata, the results of a model
+                are loaded when they are requested.
+            max_memory (int): Memory budget in bytes of the loaded results, in lazy mode.
+            store (ArrowStore): Store of the loaded results, memory-mapped
+                on the next startups while their file is not modified.
+        """
+        self.folder_path = folder_path
+        self.sample_id_column_name = sample_id_column_name
+        self.results_columns = results_columns
+        self.ignored_results_columns = ignored_results_columns
+        self.lazy = lazy
+        self.store = store
+
+        self.files: Dict[str, ModelResultsFile] = {}
+
+        # Loaded results, by model ID
+        self._results: Dict[str, pd.DataFrame] = {}
+        self._results_cache: Optional[MemoryBoundedCache] = None
+        if lazy and max_memory:
+            self._results_cache = MemoryBoundedCache(
+                max_memory, sizeof=dataframe_memory_usage
+            )
+        # Models whose results exceed the memory budget, warned once
+        self._oversized_models = set()
+        self._single_flight = SingleFlight()
+        self._scan_lock = threading.Lock()
+
+    def scan(self, strict: bool = True) -> Dict[str, List[str]]:
+        """
+        Lists the models results files, and loads them if not in lazy mode.
+        On a rescan, only the new or modified files are read,
+        the models of the deleted files are dropped.
+
+        Parameters:
+            strict (bool): Raise on an invalid results file, otherwise
+                the error is displayed and the file is ignored.
+
+        Returns:
+            Dict[str, List[str]]: The added, modified and removed model IDs.
+        """
+        with self._scan_lock:
+            return self._scan(strict)
+
+    def _scan(self, strict: bool) -> Dict[str, List[str]]:
+        changes = {"added": [], "modified": [], "removed": []}
+        files = {}
+        results = {}
+
+        for results_file in sorted(os.listdir(self.folder_path)):
+            if not results_file.endswith(".parquet"):
+                continue
+
+            model_id = results_file.split(".")[0]
+            path = os.path.join(self.folder_path, results_file)
+            known_file = self.files.get(model_id)
+
+            # Unchanged file, keep the already loaded results
+            if known_file is not None and known_file.path == path:
+                stat = os.stat(path)
+                if (stat.st_mtime_ns, stat.st_size) == (
+                    known_file.mtime,
+                    known_file.size,
+                ):
+                    files[model_id] = known_file
+                    if model_id in self._results:
+                        results[model_id] = self._results[model_id]
+                    continue
+
+            try:
+                model_file = ModelResultsFile(model_id, path)
+                self._check_sample_id_column(model_file)
+                if not self.lazy:
+                    results[model_id] = self._load_results(model_file)
+            except Exception as e:
+                if strict:
+                    raise
+                Console().print(
+                    f"[bold red]Error:[/bold red] Ignoring the results file '{path}': {e}"
+                )
+                continue
+
+            files[model_id] = model_file
+            changes["added" if known_file is None else "modified"].append(model_id)
+
+        changes["removed"] = [
+            model_id for model_id in self.files if model_id not in files
+        ]
+
+        # Swap the catalog, requests keep being served during the scan
+        self._results = results
+        self.files = files
+
+        if self._results_cache is not None:
+            for model_id in changes["modified"] + changes["removed"]:
+                self._results_cache.pop(("results", model_id))
+                self._oversized_models.discard(model_id)
+
+        return changes
+
+    # Getters
+    def get_model_ids(self) -> List[str]:
+        return list(self.files.keys())
+
+    def get_columns(self) -> List[str]:
+        """
+        Get the results columns of all the models, without the sample ID column.
+        """
+        columns = []
+        for model_file in self.files.values():
+            for column in self._filter_columns(model_file.columns):
+                if column != self.sample_id_column_name and column not in columns:
+                    columns.append(column)
+        return columns
+
+    def get_model_version(self, model_id: str) -> Optional[Tuple[int, int]]:
+        model_file = self.files.get(model_id)
+        if model_file is None:
+            return None
+        return (model_file.mtime, model_file.size)
+
+    def get_version(self) -> Tuple[Tuple[str, int, int], ...]:
+        # Changes when a results file is added, modified or removed
+        return tuple(
+            (model_id, model_file.mtime, model_file.size)
+            for model_id, model_file in sorted(self.files.items())
+        )
+
+    def get_nb_rows(self, model_id: str) -> int:
+        return self.files[model_id].nb_rows
+
+    def get_results(self, model_id: str) -> pd.DataFrame:
+        """
+        Get the results of a model, loading them if needed.
+        """
+        if model_id not in self.files:
+            return pd.DataFrame(
+                columns=[self.sample_id_column_name, *self.get_columns(), "_model_name"]
+            )
+
+        if not self.lazy:
+            results = self._results.get(model_id)
+            if results is None:
+                # Removed by a concurrent scan
+                return self.get_results(None)
+            return results
+
+        results = self._get_loaded_results(model_id)
+        if results is not None:
+            return results
+
+        # Concurrent requests for the same model share the same load
+        return self._single_flight.do(model_id, lambda: self._load_lazy(model_id))
+
+    def get_results_by_samples(
+        self, model_ids: List[str], samples_ids: list
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Get the results of several models for the given samples,
+        indexed by sample ID. The unknown models are left out.
+        """
+        # Hashed once for all the models
+        requested_ids = pd.Index(samples_ids).unique()
+
+        models_results = {}
+        for model_id in model_ids:
+            if model_id not in self.files:
+                continue
+
+            results = self.get_results(model_id)
+            evaluated = results[self.sample_id_column_name].isin(requested_ids)
+            models_results[model_id] = results[evaluated].set_index(
+                self.sample_id_column_name
+            )
+
+        return models_results
+
+    def get_evaluated_samples_ids(self, model_id: str) -> pd.Series:
+        """
+        Get the sample IDs of a model results, without loading the other columns.
+        """
+        if model_id not in self.files:
+            return pd.Series([], dtype=object)
+
+        results = self._results.get(model_id)
+        if results is None and self.lazy:
+            results = self._get_loaded_results(model_id)
+        if results is not None:
+            return results[self.sample_id_column_name]
+
+        return pd.read_parquet(
+            self.files[model_id].path, columns=[self.sample_id_column_name]
+        )[self.sample_id_column_name]
+
+    def get_stacked_results(self) -> Optional[pd.DataFrame]:
+        """
+        Get the results of all the models in a single dataframe,
+        with a _model_name column.
+        """
+        if not self.files:
+            return None
+
+        return pd.concat(
+            [self.get_results(model_id) for model_id in self.files], ignore_index=True
+        )
+
+    def get_memory_usage(self) -> int:
+        if self._results_cache is not None:
+            return self._results_cache.memory_usage
+
+        return sum(
+            dataframe_memory_usage(results) for results in self._results.values()
+        )
+
+    # Loading
+    def _get_loaded_results(self, model_id: str) -> Optional[pd.DataFrame]:
+        if self._results_cache is not None:
+            return self._results_cache.get(("results", model_id))
+        return self._results.get(model_id)
+
+    def _load_lazy(self, model_id: str) -> pd.DataFrame:
+        model_file = self.files.get(model_id)
+        if model_file is None:
+            # Removed by a concurrent scan
+            return self.get_results(None)
+
+        results = self._load_results(model_file)
+
+        if self._results_cache is not None:
+            # Least recently used models are evicted from the memory budget
+            if (
+                not self._results_cache.set(("results", model_id), results)
+                and model_id not in self._oversized_models
+            ):
+                self._oversized_models.add(model_id)
+                Console().print(
+                    "[bold yellow]Warning:[/bold yellow] The results of "
+                    + f"'{model_id}' ({dataframe_memory_usage(results)} bytes) "
+                    + "exceed results_max_memory, they will be loaded again "
+                    + "on each request."
+                )
+        else:
+            self._results[model_id] = results
+
+        return results
+
+    def _load_results(self, model_file: ModelResultsFile) -> pd.DataFrame:
+        if self.store is None:
+            return self._read_results(model_file)
+
+        name = store_name(model_file.path)
+        fingerprint = source_fingerprint(
+            [model_file.path],
+            {
+                "model_id": model_file.model_id,
+                "columns": self._filter_columns(model_file.columns),
+            },
+        )
+
+        results = self.store.load(name, fingerprint)
+        if results is not None:
+            return results
+
+        results = self._read_results(model_file)
+        try:
+            return self.store.save(name, fingerprint, results)
+        except Exception as e:
+            Console().print(
+                "[bold yellow]Warning:[/bold yellow] The results of "
+                + f"'{model_file.model_id}' can't be stored in the cache folder: {e}"
+            )
+            return results
+
+    def _read_results(self, model_file: ModelResultsFile) -> pd.DataFrame:
+        parquet_df = pd.read_parquet(
+            model_file.path, columns=self._filter_columns(model_file.columns)
+        )
+
+        # Add a _model_name column
+        parquet_df["_model_name"] = model_file.model_id
+        return parquet_df
+
+    def _filter_columns(self, columns: List[str]) -> List[str]:
+        # Filter columns if specified, keeping the sample ID column
+        if self.results_columns:
+            columns = [
+                column
+                for column in columns
+                if column in self.results_columns
+                or column == self.sample_id_column_name
+            ]
+
+        # Filter out ignored columns
+        if self.ignored_results_columns:
+            columns = [
+                column
+                for column in columns
+                if column not in self.ignored_results_columns
+            ]
+
+        return columns
+
+    def _check_sample_id_column(self, model_file: ModelResultsFile):
+        # Check if the sample_id_column_name is in the columns
+        if self.sample_id_column_name in model_file.columns:
+            return
+
+        console = Console()
+        available_columns = "\n".join(f"  - {col}" for col in model_file.columns)
+        console.print(
+            f"[bold red]Error:[/bold red] Column \
+'[cyan]{self.sample_id_column_name}[/cyan]' not found in the {model_file.model_id} parquet file.",
+            style="red",
+        )
+        console.print(
+            "[bold red]This column is required to map the model \
+results to the samples.[/bold red]",
+            style="red",
+        )
+        console.print(
+            f"[bold magenta]Available columns are:[/bold magenta]\n{available_columns}",
+            style="magenta",
+        )
+        raise ValueError(
+            f"Column '{self.sample_id_column_name}' not found in the parquet file."
+        )
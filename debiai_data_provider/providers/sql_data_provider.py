@@ -0,0 +1,491 @@
+import os
+import queue
+import sqlite3
+import threading
+import pandas as pd
+from contextlib import contextmanager
+from debiai_data_provider.models.project import DebiAIProject
+from pydantic import BaseModel, Field
+from typing import Dict, Iterator, List, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+
+# A Data-provider reading a SQLite table or view, the samples are
+# queried by sample ID so the dataset does not need to fit in memory
+
+# Maximum number of parameters of a query, lower on the older SQLite versions
+SQLITE_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteConnectionPool:
+    """
+    A thread-safe pool of SQLite connections,
+    each connection is used by a single thread at a time.
+    """
+
+    def __init__(self, database_path: str, size: int = 4):
+        self.database_path = database_path
+        self.size = size
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._nb_connections = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            pass
+
+        # Open a new connection while the pool is not full
+        with self._lock:
+            can_open = self._nb_connections < self.size
+            if can_open:
+                self._nb_connections += 1
+
+        if not can_open:
+            return self._connections.get()
+
+        try:
+            return sqlite3.connect(self.database_path, check_same_thread=False)
+        except sqlite3.Error:
+            with self._lock:
+                self._nb_connections -= 1
+            raise
+
+
+class SQLiteDataProviderConfig(BaseModel):
+    database_path: str = Field(..., description="Path to the SQLite database file")
+    table: str = Field(..., description="Table or view containing the samples")
+    sample_id_column_name: str = Field(
+        ...,
+        description="Name of the column containing the sample IDs, for the samples and results",
+    )
+    name: Optional[str] = Field(None, description="Name of the project")
+    columns: Optional[List[str]] = Field(
+        None, description="Columns to include in the project"
+    )
+    ignored_columns: Optional[List[str]] = Field(
+        None, description="Columns to ignore in the project"
+    )
+    results_table: Optional[str] = Field(
+        None,
+        description="Table or view containing the model results, one row by model and sample",
+    )
+    model_id_column_name: str = Field(
+        "model_id", description="Name of the column containing the model IDs"
+    )
+    results_columns: Optional[List[str]] = Field(
+        None, description="Columns for model results"
+    )
+    ignored_results_columns: Optional[List[str]] = Field(
+        None, description="Columns to ignore in model results"
+    )
+    max_sample_data_by_request: int = Field(
+        2000, description="Maximum number of sample IDs in a query"
+    )
+    pool_size: int = Field(4, description="Maximum number of open connections")
+    create_indexes: bool = Field(
+        False,
+        description="Create the missing indexes on the sample ID columns of the tables, "
+        + "the database is otherwise never modified",
+    )
+
+
+class SQLiteDataProvider(DebiAIProject):
+    creation_date = "2025-03-28"
+
+    def __init__(
+        self,
+        database_path: str,
+        table: str,
+        sample_id_column_name: str,
+        name: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        ignored_columns: Optional[List[str]] = None,
+        results_table: Optional[str] = None,
+        model_id_column_name: str = "model_id",
+        results_columns: Optional[List[str]] = None,
+        ignored_results_columns: Optional[List[str]] = None,
+        max_sample_data_by_request: int = 2000,
+        pool_size: int = 4,
+        create_indexes: bool = False,
+        verbose: bool = True,
+    ):
+        super().__init__()
+        self.config = SQLiteDataProviderConfig(
+            database_path=database_path,
+            table=table,
+            sample_id_column_name=sample_id_column_name,
+            name=name,
+            columns=columns,
+            ignored_columns=ignored_columns,
+            results_table=results_table,
+            model_id_column_name=model_id_column_name,
+            results_columns=results_columns,
+            ignored_results_columns=ignored_results_columns,
+            max_sample_data_by_request=max_sample_data_by_request,
+            pool_size=pool_size,
+            create_indexes=create_indexes,
+        )
+
+        # Setup name
+        if self.config.name:
+            self.name = self.config.name
+        else:
+            self.name = self.config.table
+
+        if verbose:
+            self.display_loading_table()
+
+        self.pool = SQLiteConnectionPool(self.config.database_path, pool_size)
+        self.batch_size = max(
+            1, min(self.config.max_sample_data_by_request, SQLITE_MAX_VARIABLES - 1)
+        )
+
+        # Check the tables and index their sample ID column
+        self.columns = self.load_columns()
+        self.results_columns: List[str] = []
+        if self.config.results_table:
+            self.results_columns = self.load_results_columns()
+
+        if self.config.create_indexes:
+            self.create_missing_indexes()
+        else:
+            self.display_missing_indexes()
+
+    def display_loading_table(self):
+        console = Console()
+        table = Table(title="Loading SQLite Database")
+        table.add_column("Property", style="cyan", no_wrap=True)
+        table.add_column("Value", style="magenta")
+        table.add_row("Database Path", self.config.database_path)
+        table.add_row("Table", self.config.table)
+        table.add_row("Project Name", self.name or "N/A")
+        table.add_row("Sample ID Column", self.config.sample_id_column_name)
+        table.add_row("Results Table", self.config.results_table or "N/A")
+        console.print(table)
+
+    # Loading
+    def get_table_columns(self, table: str) -> List[str]:
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                f"PRAGMA table_info({quote_identifier(table)})"
+            ).fetchall()
+
+        if not rows:
+            Console().print(
+                f"[bold red]Error:[/bold red] Table '[cyan]{table}[/cyan]' not found "
+                + f"in the database '{self.config.database_path}'.",
+                style="red",
+            )
+            raise ValueError(f"Table '{table}' not found in the database.")
+
+        return [row[1] for row in rows]
+
+    def check_column(self, table: str, column: str, table_columns: List[str]):
+        if column in table_columns:
+            return
+
+        console = Console()
+        available_columns = "\n".join(f"  - {col}" for col in table_columns)
+        console.print(
+            f"[bold red]Error:[/bold red] Column '[cyan]{column}[/cyan]' "
+            + f"not found in the table '{table}'.",
+            style="red",
+        )
+        console.print(
+            f"[bold magenta]Available columns are:[/bold magenta]\n{available_columns}",
+            style="magenta",
+        )
+        raise ValueError(f"Column '{column}' not found in the table '{table}'.")
+
+    def load_columns(self) -> List[str]:
+        table_columns = self.get_table_columns(self.config.table)
+        self.check_column(
+            self.config.table, self.config.sample_id_column_name, table_columns
+        )
+
+        return [
+            column
+            for column in table_columns
+            if column != self.config.sample_id_column_name
+            and (not self.config.columns or column in self.config.columns)
+            and (
+                not self.config.ignored_columns
+                or column not in self.config.ignored_columns
+            )
+        ]
+
+    def load_results_columns(self) -> List[str]:
+        table_columns = self.get_table_columns(self.config.results_table)
+        for column in [
+            self.config.sample_id_column_name,
+            self.config.model_id_column_name,
+        ]:
+            self.check_column(self.config.results_table, column, table_columns)
+
+        return [
+            column
+            for column in table_columns
+            if column
+            not in [self.config.sample_id_column_name, self.config.model_id_column_name]
+            and (
+                not self.config.results_columns or column in self.config.results_columns
+            )
+            and (
+                not self.config.ignored_results_columns
+                or column not in self.config.ignored_results_columns
+            )
+        ]
+
+    def get_missing_indexes(self) -> List[Tuple[str, List[str]]]:
+        # The samples and results are looked up by sample ID
+        indexes = [(self.config.table, [self.config.sample_id_column_name])]
+        if self.config.results_table:
+            indexes.append(
+                (
+                    self.config.results_table,
+                    [
+                        self.config.model_id_column_name,
+                        self.config.sample_id_column_name,
+                    ],
+                )
+            )
+
+        with self.pool.connection() as connection:
+            return [
+                (table, columns)
+                for table, columns in indexes
+                if not self.is_indexed(connection, table, columns[0])
+            ]
+
+    def display_missing_indexes(self):
+        for table, columns in self.get_missing_indexes():
+            Console().print(
+                "[bold yellow]Hint:[/bold yellow] The column "
+                + f"'{columns[0]}' of '{table}' is not indexed, the lookups by "
+                + "sample ID will scan the table. Create an index on "
+                + f"({', '.join(columns)}) or use create_indexes=True."
+            )
+
+    def create_missing_indexes(self):
+        missing_indexes = self.get_missing_indexes()
+        with self.pool.connection() as connection:
+            for table, columns in missing_indexes:
+                index_name = quote_identifier(f"debiai_{table}_{'_'.join(columns)}")
+                try:
+                    connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} "
+                        + f"ON {quote_identifier(table)} "
+                        + f"({', '.join(quote_identifier(c) for c in columns)})"
+                    )
+                    connection.commit()
+                except sqlite3.OperationalError as e:
+                    # A view or a read only database
+                    Console().print(
+                        "[bold yellow]Warning:[/bold yellow] No index created on "
+                        + f"'{table}', the lookups by sample ID will scan the table: {e}"
+                    )
+
+    def is_indexed(
+        self, connection: sqlite3.Connection, table: str, column: str
+    ) -> bool:
+        # An index starting with the column, the primary key included
+        for index in connection.execute(
+            f"PRAGMA index_list({quote_identifier(table)})"
+        ).fetchall():
+            first_column = connection.execute(
+                f"PRAGMA index_info({quote_identifier(index[1])})"
+            ).fetchone()
+            if first_column is not None and first_column[2] == column:
+                return True
+
+        # INTEGER PRIMARY KEY columns are the rowid, without an index
+        for table_column in connection.execute(
+            f"PRAGMA table_info({quote_identifier(table)})"
+        ).fetchall():
+            if table_column[1] == column and table_column[5] == 1:
+                return table_column[2].upper() == "INTEGER"
+
+        return False
+
+    def query_by_samples_ids(
+        self,
+        query: str,
+        samples_ids: List[str],
+        parameters: tuple = (),
+    ) -> List[tuple]:
+        # One query by batch of sample IDs, the query ends with "IN ({})"
+        rows = []
+        # The other parameters share the query variables limit
+        batch_size = max(
+            1, min(self.batch_size, SQLITE_MAX_VARIABLES - len(parameters))
+        )
+        with self.pool.connection() as connection:
+            for start in range(0, len(samples_ids), batch_size):
+                batch = samples_ids[start : start + batch_size]  # noqa
+                placeholders = ", ".join("?" * len(batch))
+                rows.extend(
+                    connection.execute(
+                        query.format(placeholders), (*parameters, *batch)
+                    ).fetchall()
+                )
+        return rows
+
+    # Project Info
+    def get_structure(self) -> dict:
+        return {
+            column: {"category": "context", "type": "auto"} for column in self.columns
+        }
+
+    def get_results_structure(self) -> dict:
+        if not self.config.results_table:
+            raise NotImplementedError(
+                "Results structure is not available for this project."
+            )
+
+        return {column: {"type": "auto"} for column in self.results_columns}
+
+    # Project Samples
+    def get_nb_samples(self) -> int:
+        with self.pool.connection() as connection:
+            return connection.execute(
+                f"SELECT COUNT(*) FROM {quote_identifier(self.config.table)}"
+            ).fetchone()[0]
+
+    def get_samples_ids(self) -> List[str]:
+        sample_id = quote_identifier(self.config.sample_id_column_name)
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {sample_id} FROM {quote_identifier(self.config.table)} "
+                + f"ORDER BY {sample_id}"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_data(self, samples_ids: List[str]) -> pd.DataFrame:
+        # The samples are read by batches of sample IDs, using the index
+        columns = [self.config.sample_id_column_name] + self.columns
+        rows = self.query_by_samples_ids(
+            f"SELECT {', '.join(quote_identifier(c) for c in columns)} "
+            + f"FROM {quote_identifier(self.config.table)} "
+            + f"WHERE {quote_identifier(self.config.sample_id_column_name)} IN ({{}})",
+            samples_ids,
+        )
+
+        data = pd.DataFrame.from_records(rows, columns=columns)
+        return data.set_index(self.config.sample_id_column_name).loc[samples_ids]
+
+    def get_version(self):
+        # Changes when the database is written, including its write-ahead log
+        version = []
+        for path in [self.config.database_path, self.config.database_path + "-wal"]:
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    # Project models
+    def get_models(self) -> List[dict]:
+        if not self.config.results_table:
+            return []
+
+        model_id = quote_identifier(self.config.model_id_column_name)
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {model_id}, COUNT(*) "
+                + f"FROM {quote_identifier(self.config.results_table)} "
+                + f"GROUP BY {model_id} ORDER BY {model_id}"
+            ).fetchall()
+
+        return [
+            {"id": str(model), "name": str(model), "nb_results": nb_results}
+            for model, nb_results in rows
+        ]
+
+    def get_model_evaluated_data_id_list(self, model_id: str) -> List[str]:
+        if not self.config.results_table:
+            return []
+
+        # Only keep the samples that are in the project data
+        sample_id = quote_identifier(self.config.sample_id_column_name)
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                f"SELECT {sample_id} "
+                + f"FROM {quote_identifier(self.config.results_table)} "
+                + f"WHERE {quote_identifier(self.config.model_id_column_name)} = ? "
+                + f"AND {sample_id} IN "
+                + f"(SELECT {sample_id} FROM {quote_identifier(self.config.table)})",
+                (model_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_model_results(self, model_id: str, samples_ids: List[str]) -> pd.DataFrame:
+        if not self.config.results_table:
+            return []
+
+        columns = [self.config.sample_id_column_name] + self.results_columns
+        rows = self.query_by_samples_ids(
+            f"SELECT {', '.join(quote_identifier(c) for c in columns)} "
+            + f"FROM {quote_identifier(self.config.results_table)} "
+            + f"WHERE {quote_identifier(self.config.model_id_column_name)} = ? "
+            + f"AND {quote_identifier(self.config.sample_id_column_name)} IN ({{}})",
+            samples_ids,
+            parameters=(model_id,),
+        )
+
+        # Indexed by sample ID, the samples without results are left out
+        results = pd.DataFrame.from_records(rows, columns=columns)
+        return results.set_index(self.config.sample_id_column_name)
+
+    def get_models_results(
+        self, model_ids: List[str], samples_ids: List[str]
+    ) -> Dict[str, pd.DataFrame]:
+        if not self.config.results_table:
+            return {}
+
+        # A single query for all the models, by batch of sample IDs
+        model_id_column = self.config.model_id_column_name
+        sample_id_column = self.config.sample_id_column_name
+        columns = [model_id_column, sample_id_column] + self.results_columns
+        rows = self.query_by_samples_ids(
+            f"SELECT {', '.join(quote_identifier(c) for c in columns)} "
+            + f"FROM {quote_identifier(self.config.results_table)} "
+            + f"WHERE {quote_identifier(model_id_column)} "
+            + f"IN ({', '.join('?' * len(model_ids))}) "
+            + f"AND {quote_identifier(sample_id_column)} IN ({{}})",
+            samples_ids,
+            parameters=tuple(model_ids),
+        )
+
+        # Grouped by the model IDs given by get_models, the model column may not be text
+        results = pd.DataFrame.from_records(rows, columns=columns)
+        models_ids = results.pop(model_id_column).map(str)
+        results = results.set_index(sample_id_column)
+        return {
+            model_id: results[(models_ids == model_id).to_numpy()]
+            for model_id in model_ids
+        }
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,406 @@
+import io
+import os
+import csv
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from debiai_data_provider.models.project import DebiAIProject
+from debiai_data_provider.providers.arrow_store import (
+    ArrowStore,
+    source_fingerprint,
+    store_name,
+)
+from debiai_data_provider.utils.memory import dataframe_memory_usage
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+
+# A Data-provider reading a CSV or JSON Lines file without loading it:
+# the file is scanned once to index the byte offset of each sample line,
+# then only the requested lines are read
+
+FILE_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# Dtypes of the JSON values, the missing values making the integers floats
+JSON_DTYPES = {bool: "bool", int: "int64", float: "float64", type(None): "float64"}
+
+# Lines parsed at once when inferring the dtypes of a CSV file
+CSV_CHUNK_SIZE = 100000
+
+
+def merge_dtypes(first: Optional[str], second: str) -> str:
+    """
+    Dtype holding the values of two dtypes, the same for every block of samples.
+    """
+    if first is None or first == second:
+        return second
+    if {first, second} <= {"int64", "float64"}:
+        return "float64"
+    return "object"
+
+
+class TextFileIndex:
+    """
+    Byte offset and length of the line of each sample of a CSV or JSON Lines file.
+    One sample by line: the CSV values can't contain line breaks.
+    """
+
+    def __init__(self, path: str, file_format: str, sample_id_column_name: str):
+        self.path = path
+        self.file_format = file_format
+        self.sample_id_column_name = sample_id_column_name
+
+        # Columns of the CSV header, or of the first JSON Lines record
+        self.header = ""
+        self.columns: List[str] = self._read_columns()
+
+        self.samples_ids: pd.Index = pd.Index([], dtype=object)
+        self.offsets = np.array([], dtype=np.int64)
+        self.lengths = np.array([], dtype=np.int64)
+
+        # Dtype of each column over the whole file, the blocks of samples
+        # are parsed with them instead of inferring them from their few lines
+        self.dtypes: Dict[str, str] = {}
+
+    def _read_columns(self) -> List[str]:
+        with open(self.path, "r", encoding="utf-8", newline="") as text_file:
+            first_line = text_file.readline()
+
+        if not first_line.strip():
+            return []
+
+        if self.file_format == "csv":
+            self.header = first_line
+            return next(csv.reader([first_line]))
+
+        return list(json.loads(first_line).keys())
+
+    def build(self):
+        """
+        Scans the file once, reading the sample ID of each line
+        and the dtypes of the columns.
+        """
+        samples_ids = []
+        offsets = []
+        lengths = []
+        dtypes: Dict[str, Optional[str]] = {column: None for column in self.columns}
+
+        if self.file_format == "csv":
+            id_position = self.columns.index(self.sample_id_column_name)
+
+        with open(self.path, "rb") as text_file:
+            offset = 0
+            if self.file_format == "csv":
+                offset = len(text_file.readline())
+
+            for line in text_file:
+                if line.strip():
+                    decoded_line = line.decode("utf-8")
+                    if self.file_format == "csv":
+                        sample_id = next(csv.reader([decoded_line]))[id_position]
+                    else:
+                        record = json.loads(decoded_line)
+                        sample_id = record[self.sample_id_column_name]
+                        for column in self.columns:
+                            dtypes[column] = merge_dtypes(
+                                dtypes[column],
+                                JSON_DTYPES.get(type(record.get(column)), "object"),
+                            )
+
+                    samples_ids.append(sample_id)
+                    offsets.append(offset)
+                    lengths.append(len(line))
+                offset += len(line)
+
+        if self.file_format == "csv":
+            dtypes = self._infer_csv_dtypes()
+
+        self.dtypes = {
+            column: dtype or "object"
+            for column, dtype in dtypes.items()
+            if column != self.sample_id_column_name
+        }
+        self.set_index(
+            pd.DataFrame(
+                {
+                    self.sample_id_column_name: pd.Series(samples_ids, dtype=object),
+                    "offset": np.array(offsets, dtype=np.int64),
+                    "length": np.array(lengths, dtype=np.int64),
+                }
+            )
+        )
+
+    def _infer_csv_dtypes(self) -> Dict[str, Optional[str]]:
+        # Parsed by chunks, like the blocks of samples, to merge their dtypes
+        dtypes: Dict[str, Optional[str]] = {column: None for column in self.columns}
+        chunks = pd.read_csv(
+            self.path,
+            dtype={self.sample_id_column_name: str},
+            chunksize=CSV_CHUNK_SIZE,
+        )
+        with chunks:
+            for chunk in chunks:
+                for column, dtype in chunk.dtypes.items():
+                    dtypes[column] = merge_dtypes(dtypes[column], str(dtype))
+        return dtypes
+
+    def set_dtypes(self, dtypes: pd.DataFrame):
+        self.dtypes = dict(zip(dtypes["column"].tolist(), dtypes["dtype"].tolist()))
+
+    def dtypes_to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "column": pd.Series(list(self.dtypes.keys()), dtype=object),
+                "dtype": pd.Series(list(self.dtypes.values()), dtype=object),
+            }
+        )
+
+    def set_index(self, index: pd.DataFrame):
+        self.samples_ids = pd.Index(
+            index[self.sample_id_column_name].tolist(), dtype=object
+        )
+        self.offsets = index["offset"].to_numpy(dtype=np.int64)
+        self.lengths = index["length"].to_numpy(dtype=np.int64)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                self.sample_id_column_name: pd.Series(
+                    self.samples_ids.tolist(), dtype=object
+                ),
+                "offset": self.offsets,
+                "length": self.lengths,
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.samples_ids)
+
+    def read_lines(self, samples_ids: List[str]) -> List[str]:
+        """
+        Reads the lines of samples, in the samples_ids order.
+        """
+        positions = self.samples_ids.get_indexer(samples_ids)
+        missing = positions == -1
+        if missing.any():
+            raise KeyError(
+                f"The sample '{samples_ids[missing.argmax()]}' not found in the data."
+            )
+
+        # Read in the file order, then put back in the requested order
+        lines: Dict[int, str] = {}
+        with open(self.path, "rb") as text_file:
+            for position in sorted(set(positions.tolist())):
+                text_file.seek(self.offsets[position])
+                line = text_file.read(self.lengths[position])
+                line = line.decode("utf-8")
+                # The last line of the file may not end with a line break
+                lines[position] = line if line.endswith("\n") else line + "\n"
+
+        return [lines[position] for position in positions.tolist()]
+
+
+class TextDataProviderConfig(BaseModel):
+    file_path: str = Field(..., description="Path to the CSV or JSON Lines file")
+    sample_id_column_name: str = Field(
+        ..., description="Name of the column containing the sample IDs"
+    )
+    name: Optional[str] = Field(None, description="Name of the project")
+    file_format: Optional[Literal["csv", "jsonl"]] = Field(
+        None, description="Format of the file, from its extension if not given"
+    )
+    columns: Optional[List[str]] = Field(
+        None, description="Columns to include in the project"
+    )
+    ignored_columns: Optional[List[str]] = Field(
+        None, description="Columns to ignore in the project"
+    )
+    cache_dir: Optional[str] = Field(
+        None,
+        description="Folder where the sample index is stored, "
+        + "a debiai_data_provider folder of the temporary directory if not given",
+    )
+
+
+class TextDataProvider(DebiAIProject):
+    creation_date = "2025-03-28"
+
+    def __init__(
+        self,
+        file_path: str,
+        sample_id_column_name: str,
+        name: Optional[str] = None,
+        file_format: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        ignored_columns: Optional[List[str]] = None,
+        cache_dir: Optional[str] = None,
+        verbose: bool = True,
+    ):
+        super().__init__()
+
+        if file_format is None:
+            file_format = FILE_FORMATS.get(Path(file_path).suffix.lower())
+            if file_format is None:
+                raise ValueError(
+                    f"Unknown format for '{file_path}', "
+                    + "set the file_format parameter to 'csv' or 'jsonl'."
+                )
+
+        self.config = TextDataProviderConfig(
+            file_path=file_path,
+            sample_id_column_name=sample_id_column_name,
+            name=name,
+            file_format=file_format,
+            columns=columns,
+            ignored_columns=ignored_columns,
+            cache_dir=cache_dir,
+        )
+
+        # Setup name
+        if self.config.name:
+            self.name = self.config.name
+        else:
+            self.name = Path(self.config.file_path).stem
+
+        if verbose:
+            self.display_loading_table()
+
+        self.index = TextFileIndex(
+            self.config.file_path,
+            self.config.file_format,
+            self.config.sample_id_column_name,
+        )
+        self.check_sample_id_column()
+        self.load_index()
+
+        self.columns = [
+            column
+            for column in self.index.columns
+            if column != self.config.sample_id_column_name
+            and (not self.config.columns or column in self.config.columns)
+            and (
+                not self.config.ignored_columns
+                or column not in self.config.ignored_columns
+            )
+        ]
+
+    def display_loading_table(self):
+        console = Console()
+        table = Table(title="Loading Text File")
+        table.add_column("Property", style="cyan", no_wrap=True)
+        table.add_column("Value", style="magenta")
+        table.add_row("File Path", self.config.file_path)
+        table.add_row("File Format", self.config.file_format)
+        table.add_row("Project Name", self.name or "N/A")
+        table.add_row("Sample ID Column", self.config.sample_id_column_name)
+        console.print(table)
+
+    def check_sample_id_column(self):
+        if self.config.sample_id_column_name in self.index.columns:
+            return
+
+        console = Console()
+        available_columns = "\n".join(f"  - {col}" for col in self.index.columns)
+        console.print(
+            f"[bold red]Error:[/bold red] Column '[cyan]{self.config.sample_id_column_name}[/cyan]'\
+ not found in the file.",
+            style="red",
+        )
+        console.print(
+            f"[bold magenta]Available columns are:[/bold magenta]\n{available_columns}",
+            style="magenta",
+        )
+        raise ValueError(
+            f"Column '{self.config.sample_id_column_name}' not found in the file."
+        )
+
+    def load_index(self):
+        # Not next to the file, its folder may be read-only or shared
+        cache_dir = self.config.cache_dir or os.path.join(
+            tempfile.gettempdir(), "debiai_data_provider"
+        )
+        name = store_name(self.config.file_path)
+        fingerprint = source_fingerprint(
+            [self.config.file_path],
+            self.config.model_dump(include={"sample_id_column_name", "file_format"}),
+        )
+
+        # The file is indexed once, the project does not change while it is served
+        self.version = fingerprint
+
+        # The file is only scanned when it has been modified since the last startup
+        try:
+            store = ArrowStore(cache_dir)
+            index = store.load(name, fingerprint)
+            dtypes = store.load(f"{name}-dtypes", fingerprint)
+        except OSError:
+            store = None
+            index = None
+            dtypes = None
+
+        if index is not None and dtypes is not None:
+            self.index.set_index(index)
+            self.index.set_dtypes(dtypes)
+            return
+
+        self.index.build()
+        if not self.index.samples_ids.is_unique:
+            Console().print(
+                "[bold red]Error:[/bold red] The sample IDs in the file must be unique.",
+                style="red",
+            )
+            raise ValueError("Sample IDs must be unique.")
+
+        if store is None:
+            return
+        try:
+            store.save(name, fingerprint, self.index.to_dataframe())
+            store.save(f"{name}-dtypes", fingerprint, self.index.dtypes_to_dataframe())
+        except Exception as e:
+            Console().print(
+                "[bold yellow]Warning:[/bold yellow] The sample index can't be "
+                + f"stored in '{cache_dir}', the file will be scanned again: {e}"
+            )
+
+    # Project Info
+    def get_version(self) -> str:
+        return self.version
+
+    def get_memory_details(self) -> Dict[str, int]:
+        # Only the sample index is kept in memory
+        return {"indexes": dataframe_memory_usage(self.index.to_dataframe())}
+
+    def get_structure(self) -> dict:
+        return {
+            column: {"category": "context", "type": "auto"} for column in self.columns
+        }
+
+    # Project Samples
+    def get_nb_samples(self) -> int:
+        return len(self.index)
+
+    def get_samples_ids(self) -> List[str]:
+        return self.index.samples_ids.tolist()
+
+    def get_data(self, samples_ids: List[str]) -> pd.DataFrame:
+        # Only the lines of the requested samples are read and parsed
+        lines = self.index.read_lines(samples_ids)
+
+        # With the dtypes of the whole file, the same for every block
+        dtypes = {column: self.index.dtypes[column] for column in self.columns}
+        if self.config.file_format == "csv":
+            data = pd.read_csv(
+                io.StringIO(self.index.header + "".join(lines)),
+                dtype={**dtypes, self.config.sample_id_column_name: str},
+            )
+        else:
+            data = pd.DataFrame.from_records(
+                [json.loads(line) for line in lines],
+                columns=self.index.columns,
+            ).astype(dtypes)
+
+        data.index = pd.Index(samples_ids, dtype=object)
+        return data[self.columns]
@@ -0,0 +1,217 @@
+import re
+import math
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# Heavy routes, limited by their group limit and by the global limit.
+# The other routes (/info, /projects, ...) are never queued
+HEAVY_ROUTES = {
+    "dataIdList": re.compile(r"^/projects/[^/]+/dataIdList$"),
+    "blocks": re.compile(r"^/projects/[^/]+/blocksFromSampleIds$"),
+    "results": re.compile(r"^/projects/[^/]+/models/([^/]+/)?results$"),
+}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class ConcurrencyLimit:
+    """
+    Limits the number of requests running at the same time, the next ones
+    wait in a bounded queue. Used from the event loop only.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queued: int = 100,
+        queue_timeout: float = 30,
+    ):
+        """
+        Parameters:
+            name (str): Name of the limited routes.
+            max_concurrent (int): Maximum number of requests running at the same time.
+            max_queued (int): Maximum number of waiting requests, the next ones
+                are rejected with a 429 status.
+            queue_timeout (float): Seconds a request can wait, after which
+                it is rejected with a 503 status.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+
+        self.running = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Moving average of the requests duration, to estimate the Retry-After
+        self._average_duration: Optional[float] = None
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """
+        Waits for a free slot.
+
+        Raises:
+            AdmissionRejected: The queue is full or the wait timed out.
+        """
+        if self.running < self.max_concurrent and not self._waiters:
+            self.running += 1
+            return
+
+        if len(self._waiters) >= self.max_queued:
+            self.rejected += 1
+            raise AdmissionRejected(
+                429, self.get_retry_after(), f"Too many '{self.name}' requests"
+            )
+
+        # The slot is handed over by release
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self.rejected += 1
+            raise AdmissionRejected(
+                503,
+                self.get_retry_after(),
+                f"The '{self.name}' requests queue is too slow",
+            )
+        except asyncio.CancelledError:
+            # Cancelled right after the slot was handed over
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, duration: Optional[float] = None):
+        if duration is not None:
+            self._record_duration(duration)
+
+        # Hand the slot over to the first waiting request
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.running -= 1
+
+    def get_retry_after(self) -> int:
+        # Time for the queue ahead to be processed, in whole seconds
+        if self._average_duration is None:
+            return 1
+        queue_duration = self._average_duration * (self.waiting + 1)
+        return max(1, math.ceil(queue_duration / self.max_concurrent))
+
+    def get_stats(self) -> dict:
+        return {
+            "maxConcurrent": self.max_concurrent,
+            "running": self.running,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "averageDuration": self._average_duration,
+        }
+
+    def _record_duration(self, duration: float):
+        if self._average_duration is None:
+            self._average_duration = duration
+        else:
+            self._average_duration += 0.3 * (duration - self._average_duration)
+
+
+class AdmissionController:
+    """
+    Concurrency limits of the heavy routes: a limit by route group
+    and a global limit shared by all the heavy routes.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_requests: Optional[int] = None,
+        route_concurrency_limits: Optional[Dict[str, int]] = None,
+        max_queued_requests: int = 100,
+        queue_timeout: float = 30,
+    ):
+        """
+        Parameters:
+            max_concurrent_requests (int): Maximum number of heavy requests
+                running at the same time, None for no global limit.
+            route_concurrency_limits (Dict[str, int]): Maximum number of running
+                requests by route group: "dataIdList", "blocks" or "results".
+            max_queued_requests (int): Maximum number of waiting requests by limit.
+            queue_timeout (float): Seconds a request can wait before being rejected.
+        """
+        route_concurrency_limits = route_concurrency_limits or {}
+        for route_group in route_concurrency_limits:
+            if route_group not in HEAVY_ROUTES:
+                raise ValueError(
+                    f"Unknown route group '{route_group}', expected one of "
+                    + ", ".join(HEAVY_ROUTES)
+                )
+
+        self.route_limits: Dict[str, ConcurrencyLimit] = {
+            route_group: ConcurrencyLimit(
+                route_group, max_concurrent, max_queued_requests, queue_timeout
+            )
+            for route_group, max_concurrent in route_concurrency_limits.items()
+        }
+        self.global_limit: Optional[ConcurrencyLimit] = None
+        if max_concurrent_requests:
+            self.global_limit = ConcurrencyLimit(
+                "heavy", max_concurrent_requests, max_queued_requests, queue_timeout
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.global_limit is not None or bool(self.route_limits)
+
+    def get_limits(self, path: str) -> List[ConcurrencyLimit]:
+        """
+        The limits to acquire for a request path, in order.
+        """
+        for route_group, pattern in HEAVY_ROUTES.items():
+            if pattern.match(path):
+                limits = []
+                if route_group in self.route_limits:
+                    limits.append(self.route_limits[route_group])
+                if self.global_limit is not None:
+                    limits.append(self.global_limit)
+                return limits
+        return []
+
+    async def acquire(self, limits: List[ConcurrencyLimit]):
+        acquired = []
+        try:
+            for limit in limits:
+                await limit.acquire()
+                acquired.append(limit)
+        except BaseException:
+            for limit in reversed(acquired):
+                limit.release()
+            raise
+
+    def release(self, limits: List[ConcurrencyLimit], duration: float):
+        for limit in reversed(limits):
+            limit.release(duration)
+
+    def get_stats(self) -> dict:
+        limits = dict(self.route_limits)
+        if self.global_limit is not None:
+            limits["global"] = self.global_limit
+        return {name: limit.get_stats() for name, limit in limits.items()}
@@ -0,0 +1,141 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimates the memory used by a Python value, including its content
+    for the builtin containers (list, tuple, set and dict).
+    """
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+
+    return size
+
+
+class MemoryBoundedCache:
+    """
+    A thread-safe LRU cache bounded by an estimated memory budget.
+
+    Keys are ``(group, key)`` tuples, the group allows to invalidate
+    all the entries of a group at once (a model, an analysis, ...).
+    """
+
+    def __init__(
+        self,
+        max_memory: int,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        """
+        Parameters:
+            max_memory (int): Memory budget of the cache, in bytes.
+            sizeof (Callable): Function used to estimate the size of a value.
+        """
+        self.max_memory = max_memory
+        self.sizeof = sizeof
+        self.memory_usage = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[Tuple[Hashable, Hashable], Tuple[Any, int]]" = (
+            OrderedDict()
+        )
+        self._groups: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Tuple[Hashable, Hashable]) -> bool:
+        return key in self._entries
+
+    def get(self, key: Tuple[Hashable, Hashable], default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Tuple[Hashable, Hashable], value: Any) -> bool:
+        """
+        Stores a value in the cache, evicting the least recently used entries
+        if the memory budget is exceeded.
+
+        Returns:
+            bool: False if the value is too large to fit in the cache.
+        """
+        size = self.sizeof(key) + self.sizeof(value)
+        if size > self.max_memory:
+            return False
+
+        with self._lock:
+            self._remove(key)
+
+            self._entries[key] = (value, size)
+            self._groups.setdefault(key[0], set()).add(key[1])
+            self.memory_usage += size
+
+            while self.memory_usage > self.max_memory:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+        return True
+
+    def pop(self, key: Tuple[Hashable, Hashable]):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_group(self, group: Hashable):
+        """
+        Removes all the entries of a group.
+        """
+        with self._lock:
+            for key in list(self._groups.get(group, ())):
+                self._remove((group, key))
+
+    def group_memory_usage(self, group: Hashable) -> int:
+        with self._lock:
+            return sum(
+                self._entries[(group, key)][1] for key in self._groups.get(group, ())
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self.memory_usage = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "memoryUsage": self.memory_usage,
+            "maxMemory": self.max_memory,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _remove(self, key: Tuple[Hashable, Hashable]) -> Optional[Any]:
+        # Must be called with the lock held
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+
+        self.memory_usage -= entry[1]
+
+        group_keys = self._groups.get(key[0])
+        if group_keys is not None:
+            group_keys.discard(key[1])
+            if not group_keys:
+                del self._groups[key[0]]
+
+        return entry[0]
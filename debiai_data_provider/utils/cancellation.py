@@ -0,0 +1,133 @@
+import time
+import asyncio
+import inspect
+import threading
+import contextvars
+import concurrent.futures
+from typing import Any, Callable, List, Optional
+
+_TIMEOUT_REASON = "The request timed out"
+
+
+class RequestCancelled(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class RequestTimeout(RequestCancelled):
+    pass
+
+
+class CancellationToken:
+    """
+    Cancellation state of a request, shared by the event loop and the thread
+    computing the request: the computation checks it between two steps.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ):
+        """
+        Parameters:
+            timeout (float): Seconds after which the request is cancelled,
+                None for no timeout.
+            loop (asyncio.AbstractEventLoop): Event loop running the async
+                methods of the projects, a new loop is used if not given.
+        """
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.loop = loop
+        self.reason: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    def cancel(self, reason: str = "The client disconnected"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            callback()
+
+    def expire(self):
+        self.cancel(_TIMEOUT_REASON)
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None:
+            if time.monotonic() >= self.deadline:
+                self.expire()
+        return self._event.is_set()
+
+    @property
+    def timed_out(self) -> bool:
+        return self.cancelled and self.reason == _TIMEOUT_REASON
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        if not self.cancelled:
+            return
+        if self.timed_out:
+            raise RequestTimeout(self.reason)
+        raise RequestCancelled(self.reason)
+
+    def add_callback(self, callback: Callable[[], Any]):
+        """
+        Calls ``callback`` when the request is cancelled, right away if it already is.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], Any]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def resolve_result(result: Any, cancellation: Optional[CancellationToken] = None):
+    """
+    Returns the result of a project method, awaiting it if the method is async.
+    The awaited coroutine is cancelled with the request.
+
+    Raises:
+        RequestCancelled: The request has been cancelled while awaiting.
+    """
+    if not inspect.isawaitable(result):
+        return result
+
+    # The coroutine sees the context variables of the request, like its current span
+    context = contextvars.copy_context()
+
+    async def await_result():
+        for variable, value in context.items():
+            variable.set(value)
+        return await result
+
+    if cancellation is None or cancellation.loop is None:
+        # Called outside of the API server
+        return asyncio.run(await_result())
+
+    future = asyncio.run_coroutine_threadsafe(await_result(), cancellation.loop)
+    cancellation.add_callback(future.cancel)
+    try:
+        return future.result(cancellation.remaining())
+    except (concurrent.futures.CancelledError, concurrent.futures.TimeoutError):
+        future.cancel()
+        cancellation.raise_if_cancelled()
+        raise RequestCancelled("The request has been cancelled")
+    finally:
+        cancellation.remove_callback(future.cancel)
@@ -0,0 +1,55 @@
+import os
+import sys
+from debiai_data_provider.utils.cache import estimate_size
+from typing import Optional
+
+
+def dataframe_memory_usage(value) -> int:
+    """
+    Memory used by a dataframe, including the content of its object columns.
+    """
+    import pandas as pd
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        memory_usage = value.memory_usage(deep=True)
+        return int(
+            memory_usage.sum() if isinstance(value, pd.DataFrame) else memory_usage
+        )
+    return estimate_size(value)
+
+
+def format_bytes(nb_bytes: int) -> str:
+    size = float(nb_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def get_process_rss() -> Optional[int]:
+    """
+    Resident memory of the current process in bytes, None if not available.
+    """
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    # Linux
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    # Peak resident memory on the other Unix systems
+    try:
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    except ImportError:
+        return None
@@ -1,7 +1,11 @@
+from __future__ import annotations
+
 from debiai_data_provider.models.project import DebiAIProject
-from debiai_data_provider.models.debiai import Column
-import pandas as pd
-from typing import List
+from debiai_data_provider.models.debiai import Column, ExpectedResult
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def extract_project_class_name(project: DebiAIProject) -> str:
@@ -9,31 +13,209 @@ def extract_project_class_name(project: DebiAIProject) -> str:
     return project.__class__.__name__
 
 
+def dataframe_to_debiai_columns(
+    columns: List[Column],
+    samples_id: List[str],
+    data: pd.DataFrame,
+    dictionary_encoding: bool = False,
+) -> List[Union[list, dict]]:
+    """
+    Extracts the values of the columns, in the samples_id order.
+
+    Parameters:
+        dictionary_encoding (bool): Send the categorical columns as
+            {"dictionary": [values], "codes": [value index or -1]}.
+
+    Returns:
+        List: One list of Python values per column.
+    """
+    import pandas as pd
+
+    if "Data ID" in data.columns:
+        data = data.drop_duplicates(subset="Data ID").set_index("Data ID")
+    elif not data.index.is_unique:
+        # Use the dataframe index as the sample ID
+        data = data[~data.index.duplicated()]
+
+    # Position of each sample in the dataframe
+    positions = data.index.get_indexer(samples_id)
+    missing = positions == -1
+    if missing.any():
+        missing_sample_id = samples_id[missing.argmax()]
+        raise KeyError(f"The sample '{missing_sample_id}' not found in the data.")
+
+    columns_values = []
+    for column in columns:
+        if column.name not in data.columns:
+            raise KeyError(f"Column '{column.name}' not found in the data.")
+
+        column_values = data[column.name].take(positions)
+
+        encoding = (column.metadata or {}).get("encoding")
+        if encoding:
+            columns_values.append(encode_list_column(column_values, encoding["dtype"]))
+            continue
+
+        if dictionary_encoding and isinstance(column_values.dtype, pd.CategoricalDtype):
+            columns_values.append(
+                {
+                    "dictionary": series_to_list(
+                        column_values.cat.categories.to_series()
+                    ),
+                    "codes": column_values.cat.codes.tolist(),
+                }
+            )
+            continue
+
+        columns_values.append(series_to_list(column_values))
+
+    return columns_values
+
+
+def encode_list_column(values: pd.Series, dtype: str) -> List[Optional[str]]:
+    """
+    Encodes the numeric lists of a column as base64 strings of their
+    little-endian dtype buffer, None for the missing values.
+    The values are converted from contiguous arrays, without Python numbers.
+    """
+    import base64
+    import numpy as np
+    import pandas as pd
+
+    buffer_dtype = np.dtype(dtype).newbyteorder("<")
+
+    def encode(row_values: np.ndarray) -> str:
+        return base64.b64encode(row_values.tobytes()).decode("ascii")
+
+    if isinstance(values.dtype, pd.ArrowDtype):
+        import pyarrow as pa
+
+        array = pa.array(values)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+
+        if pa.types.is_fixed_size_list(array.type):
+            row_size = array.type.list_size
+            offsets = np.arange(array.offset, array.offset + len(array) + 1) * row_size
+        else:
+            offsets = array.offsets.to_numpy()
+
+        flat_values = array.values.to_numpy(zero_copy_only=False).astype(buffer_dtype)
+        is_null = array.is_null().to_numpy(zero_copy_only=False)
+        return [
+            None if is_null[i] else encode(flat_values[offsets[i] : offsets[i + 1]])
+            for i in range(len(array))
+        ]
+
+    rows = values.tolist()
+    present_rows = [row for row in rows if row is not None]
+    row_lengths = {len(row) for row in present_rows}
+
+    if len(row_lengths) == 1 and len(present_rows) == len(rows):
+        # Same length lists, converted at once to a 2D array
+        matrix = np.asarray(present_rows, dtype=buffer_dtype)
+        return [encode(row_values) for row_values in matrix]
+
+    return [
+        None if row is None else encode(np.asarray(row, dtype=buffer_dtype))
+        for row in rows
+    ]
+
+
+def series_to_list(values: pd.Series) -> list:
+    """
+    Converts the values of a column to Python values, the missing values
+    of the Arrow backed columns becoming None.
+    """
+    import pandas as pd
+
+    if isinstance(values.dtype, pd.ArrowDtype):
+        import pyarrow as pa
+
+        return pa.array(values).to_pylist()
+
+    if isinstance(values.dtype, pd.CategoricalDtype) and isinstance(
+        values.dtype.categories.dtype, pd.ArrowDtype
+    ):
+        categories = series_to_list(values.cat.categories.to_series())
+        return [
+            categories[code] if code >= 0 else None
+            for code in values.cat.codes.tolist()
+        ]
+
+    # tolist converts the numpy values to Python values
+    return values.tolist()
+
+
 def dataframe_to_debiai_data_array(
     columns: List[Column],
     samples_id: List[str],
     data: pd.DataFrame,
 ):
-    sample_dicts = {}
-    for sample_id in samples_id:
-        sample_data = []
-
-        for column in columns:
-            try:
-                if "Data ID" in data.columns:
-                    sample_to_add = data.loc[
-                        data["Data ID"] == sample_id, column.name
-                    ].values[0]
-                else:
-                    # Use the dataframe index as the sample ID
-                    sample_to_add = data.loc[sample_id, column.name]
-            except KeyError:
-                raise KeyError(
-                    f"Column '{column.name}' of the sample '{sample_id}' not found in the data."
-                )
-
-            sample_data.append(sample_to_add)
-
-        sample_dicts[sample_id] = sample_data
-
-    return sample_dicts
+    columns_values = dataframe_to_debiai_columns(columns, samples_id, data)
+
+    if not columns_values:
+        return {sample_id: [] for sample_id in samples_id}
+
+    return {
+        sample_id: list(sample_data)
+        for sample_id, sample_data in zip(samples_id, zip(*columns_values))
+    }
+
+
+def dataframe_to_results(
+    results_columns: List[ExpectedResult],
+    samples_id: list,
+    data: pd.DataFrame,
+) -> Dict[Union[str, int, float], list]:
+    """
+    Matches the rows of a model results dataframe to the requested samples,
+    by the "Data ID" column or else by the dataframe index, like the project data.
+    The samples without results get None for each results column.
+
+    A dataframe with a default RangeIndex, or with an index holding none of the
+    requested samples, has its rows in the requested order.
+
+    Returns:
+        Dict: The results values of each sample, in the results columns order.
+    """
+    import pandas as pd
+
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame(data)
+
+    # Position of the row of each sample, -1 if the sample has no results
+    positions = None
+    if "Data ID" in data.columns:
+        data = data.drop_duplicates(subset="Data ID").set_index("Data ID")
+        positions = data.index.get_indexer(samples_id).tolist()
+    elif not isinstance(data.index, pd.RangeIndex):
+        indexed_data = data[~data.index.duplicated()]
+        index_positions = indexed_data.index.get_indexer(samples_id).tolist()
+        if any(position != -1 for position in index_positions):
+            data, positions = indexed_data, index_positions
+
+    if positions is None:
+        positions = [
+            position if position < len(data) else -1
+            for position in range(len(samples_id))
+        ]
+
+    columns_values = []
+    for column in results_columns:
+        if column.name not in data.columns:
+            columns_values.append([None] * len(positions))
+            continue
+
+        values = series_to_list(data[column.name])
+        columns_values.append(
+            [values[position] if position != -1 else None for position in positions]
+        )
+
+    if not columns_values:
+        return {sample_id: [] for sample_id in samples_id}
+
+    return {
+        sample_id: list(sample_results)
+        for sample_id, sample_results in zip(samples_id, zip(*columns_values))
+    }
@@ -0,0 +1,132 @@
+import threading
+from itertools import islice
+from pydantic_core import to_json
+from typing import Optional
+
+# Number of rows encoded to measure the serialized size of a sample
+MEASURED_ROWS = 100
+
+
+class RequestLimitsTuner:
+    """
+    Tunes the number of samples and results by request of a project from
+    the measured serialized size and build time of its samples, so that
+    each response targets a given size or latency.
+    """
+
+    def __init__(
+        self,
+        default_sample_data_by_request: int,
+        default_result_by_request: int,
+        target_response_size: Optional[int] = 4 * 1024 * 1024,
+        target_response_time: Optional[float] = None,
+        min_by_request: int = 10,
+        max_by_request: int = 50000,
+        smoothing: float = 0.3,
+        size_measure_interval: int = 10,
+    ):
+        """
+        Parameters:
+            default_sample_data_by_request (int): Limit advertised before any measure.
+            default_result_by_request (int): Limit advertised before any measure.
+            target_response_size (int): Targeted size of a response, in bytes.
+            target_response_time (float): Targeted time to build a response, in seconds.
+            min_by_request (int): Lowest limit that can be advertised.
+            max_by_request (int): Highest limit that can be advertised.
+            smoothing (float): Weight of a new measure in the moving averages.
+            size_measure_interval (int): The serialized size is measured on one
+                response out of size_measure_interval, the build time on each one.
+        """
+        self.default_sample_data_by_request = default_sample_data_by_request
+        self.default_result_by_request = default_result_by_request
+        self.target_response_size = target_response_size
+        self.target_response_time = target_response_time
+        self.min_by_request = min_by_request
+        self.max_by_request = max_by_request
+        self.smoothing = smoothing
+        self.size_measure_interval = size_measure_interval
+
+        # Moving averages of the bytes and seconds by sample
+        self._costs = {"data": None, "results": None}
+        self._nb_records = {"data": 0, "results": 0}
+        self._lock = threading.Lock()
+
+    def has_measures(self, kind: str = "data") -> bool:
+        return self._costs[kind] is not None
+
+    def record(self, kind: str, rows: dict, duration: float):
+        """
+        Records the cost of a built response.
+
+        Parameters:
+            kind (str): "data" for the samples blocks, "results" for the model results.
+            rows (dict): The built rows, by sample ID.
+            duration (float): Time spent building the rows, in seconds.
+        """
+        if not rows:
+            return
+
+        with self._lock:
+            self._nb_records[kind] += 1
+            measure_size = (
+                self._costs[kind] is None
+                or self._nb_records[kind] % self.size_measure_interval == 0
+            )
+
+        bytes_by_sample = None
+        if measure_size:
+            # Only encode a subset of the rows, like the responses are encoded
+            measured_rows = dict(islice(rows.items(), MEASURED_ROWS))
+            encoded = to_json(measured_rows, inf_nan_mode="null", fallback=str)
+            bytes_by_sample = len(encoded) / len(measured_rows)
+        seconds_by_sample = duration / len(rows)
+
+        with self._lock:
+            previous = self._costs[kind]
+            if previous is None:
+                self._costs[kind] = (bytes_by_sample, seconds_by_sample)
+            else:
+                self._costs[kind] = (
+                    (
+                        previous[0]
+                        if bytes_by_sample is None
+                        else self._smooth(previous[0], bytes_by_sample)
+                    ),
+                    self._smooth(previous[1], seconds_by_sample),
+                )
+
+    def get_sample_data_by_request(self) -> int:
+        return self._get_limit("data", self.default_sample_data_by_request)
+
+    def get_result_by_request(self) -> int:
+        return self._get_limit("results", self.default_result_by_request)
+
+    def get_stats(self) -> dict:
+        stats = {}
+        for kind, cost in self._costs.items():
+            stats[kind] = (
+                {"bytesBySample": cost[0], "secondsBySample": cost[1]}
+                if cost is not None
+                else None
+            )
+        return stats
+
+    def _smooth(self, previous: float, value: float) -> float:
+        return previous + self.smoothing * (value - previous)
+
+    def _get_limit(self, kind: str, default: int) -> int:
+        cost = self._costs[kind]
+        if cost is None:
+            return default
+
+        bytes_by_sample, seconds_by_sample = cost
+        limits = []
+        if self.target_response_size and bytes_by_sample > 0:
+            limits.append(self.target_response_size / bytes_by_sample)
+        if self.target_response_time and seconds_by_sample > 0:
+            limits.append(self.target_response_time / seconds_by_sample)
+
+        if not limits:
+            return default
+
+        return int(max(self.min_by_request, min(self.max_by_request, *limits)))
@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+# Marks a key that the computation did not return a value for
+_MISSING = object()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical computations: while a computation for a
+    key is in flight, later callers wait for it and share its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Runs ``fn`` unless a computation for ``key`` is already in flight,
+        in which case its result (or exception) is returned.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._forget([key])
+            future.set_exception(e)
+            raise
+
+        self._forget([key])
+        future.set_result(result)
+        return result
+
+    def _forget(self, keys: List[Hashable]):
+        # Before the waiting callers are woken up, so that a caller retrying
+        # after a failure starts a new computation instead of joining the failed one
+        with self._lock:
+            for key in keys:
+                del self._calls[key]
+
+    def do_many(
+        self,
+        keys: Iterable[Hashable],
+        fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+    ) -> Dict[Hashable, Any]:
+        """
+        Coalesces a computation made of independent keys, for example the
+        samples of a block: ``fn`` is only called with the keys that are
+        not already in flight, the other ones are awaited.
+
+        Parameters:
+            keys (Iterable): The keys to compute.
+            fn (Callable): Computes a list of keys, returns a dictionary
+                mapping the keys to their values.
+
+        Returns:
+            Dict: The values of the keys, keys without value are left out.
+        """
+        owned_keys: List[Hashable] = []
+        futures: Dict[Hashable, Future] = {}
+
+        with self._lock:
+            for key in keys:
+                if key in futures:
+                    continue
+
+                future = self._calls.get(key)
+                if future is None:
+                    future = Future()
+                    self._calls[key] = future
+                    owned_keys.append(key)
+                futures[key] = future
+
+        # Compute our own keys first so that callers waiting on them never block
+        if owned_keys:
+            try:
+                values = fn(owned_keys)
+            except BaseException as e:
+                self._forget(owned_keys)
+                for key in owned_keys:
+                    futures[key].set_exception(e)
+                raise
+
+            self._forget(owned_keys)
+            for key in owned_keys:
+                futures[key].set_result(values.get(key, _MISSING))
+
+        results = {}
+        for key, future in futures.items():
+            value = future.result()
+            if value is not _MISSING:
+                results[key] = value
+
+        return results
+
+    def in_flight(self) -> int:
+        return len(self._calls)
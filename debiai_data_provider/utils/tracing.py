@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# Spans of the data path, exported to a local file or kept in memory,
+# no tracing service needed. The current span is held by a context variable:
+# the code of the projects can open child spans, for example around the
+# queries of their database:
+#
+#     from debiai_data_provider.utils.tracing import span
+#
+#     def get_data(self, samples_ids):
+#         with span("database.query", nbSamples=len(samples_ids)):
+#             ...
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.thread = threading.current_thread().name
+        self.start_time = time.time()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "startTime": self.start_time,
+            "duration": self.duration,
+            "thread": self.thread,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    # Yielded when the tracing is disabled, the project code stays the same
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar(
+    "debiai_current_span", default=None
+)
+
+
+class InMemorySpanExporter:
+    """
+    Keeps the last spans in memory, served by the /diagnostics/traces route.
+    """
+
+    def __init__(self, max_spans: int = 10000):
+        self._spans: Deque[dict] = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self._spans.append(span.to_dict())
+
+    def get_spans(self) -> List[dict]:
+        return list(self._spans)
+
+    def get_traces(self) -> Dict[str, List[dict]]:
+        # Spans grouped by trace, in their end order
+        traces: Dict[str, List[dict]] = {}
+        for span in self.get_spans():
+            traces.setdefault(span["traceId"], []).append(span)
+        return traces
+
+    def clear(self):
+        self._spans.clear()
+
+
+class JsonLinesSpanExporter:
+    """
+    Appends the spans to a JSON Lines file, one span by line.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    def __init__(self, exporters: Optional[list] = None):
+        self.exporters = list(exporters or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """
+        Opens a span, child of the current span if there is one.
+        """
+        if not self.exporters:
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        current = Span(
+            name,
+            parent.trace_id if parent is not None else os.urandom(16).hex(),
+            parent.span_id if parent is not None else None,
+            attributes,
+        )
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end()
+            for exporter in self.exporters:
+                try:
+                    exporter.export(current)
+                except Exception:
+                    # The tracing never fails a request
+                    pass
+
+
+# Tracer of the spans opened outside of the requests of a DataProvider
+_tracer = Tracer()
+
+# Tracer of the current request, each DataProvider exporting its own spans
+_current_tracer: ContextVar[Optional[Tracer]] = ContextVar(
+    "debiai_current_tracer", default=None
+)
+
+
+def get_tracer() -> Tracer:
+    tracer = _current_tracer.get()
+    return tracer if tracer is not None else _tracer
+
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    """
+    Opens the spans of the current context, and of the threads
+    and tasks it starts, with the given tracer.
+    """
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def configure_tracing(exporters: list):
+    """
+    Sets the exporters of the spans opened outside of the requests
+    of a DataProvider, the tracing is disabled without exporter.
+    """
+    _tracer.exporters = list(exporters)
+
+
+def span(name: str, **attributes):
+    return get_tracer().span(name, **attributes)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
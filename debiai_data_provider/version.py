@@ -1 +1 @@
-VERSION = "1.1.6"
+VERSION = "1.1.31"
@@ -20,6 +20,12 @@ setup(
         "fastapi==0.115.4",
         "uvicorn==0.32.0",
         "rich==13.9.4",
+        "pyarrow",
     ],
-    entry_points={},
+    extras_require={"yaml": ["pyyaml"]},
+    entry_points={
+        "console_scripts": [
+            "debiai-data-provider=debiai_data_provider.cli:main",
+        ],
+    },
 )
@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from debiai_data_provider.controller.middleware import AdmissionControlMiddleware
+from debiai_data_provider.utils.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    ConcurrencyLimit,
+)
+
+
+def test_concurrency_limit_queue():
+    async def scenario():
+        limit = ConcurrencyLimit("blocks", max_concurrent=2, max_queued=2)
+        order = []
+        release = asyncio.Event()
+
+        async def request(i):
+            await limit.acquire()
+            order.append(i)
+            await release.wait()
+            limit.release(0.5)
+
+        tasks = [asyncio.create_task(request(i)) for i in range(4)]
+        await asyncio.sleep(0)
+        assert (limit.running, limit.waiting) == (2, 2)
+
+        # The queue is full
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limit.acquire()
+        assert rejected.value.status_code == 429
+        assert rejected.value.retry_after >= 1
+
+        # The waiting requests run in arrival order
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order == [0, 1, 2, 3]
+        assert (limit.running, limit.waiting, limit.rejected) == (0, 0, 1)
+
+        # Retry-After estimated from the requests duration
+        assert limit.get_retry_after() == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_limit_timeout_and_cancellation():
+    async def scenario():
+        limit = ConcurrencyLimit("results", max_concurrent=1, queue_timeout=0.05)
+        await limit.acquire()
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await limit.acquire()
+        assert rejected.value.status_code == 503
+
+        # A cancelled waiting request leaves the queue
+        waiting = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+        assert limit.waiting == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert limit.waiting == 0
+
+        limit.release()
+        assert limit.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_controller_routes():
+    controller = AdmissionController(
+        max_concurrent_requests=4, route_concurrency_limits={"blocks": 2}
+    )
+    blocks_limits = controller.get_limits("/projects/p1/blocksFromSampleIds")
+    assert [limit.name for limit in blocks_limits] == ["blocks", "heavy"]
+    assert [
+        limit.name for limit in controller.get_limits("/projects/p1/models/m/results")
+    ] == ["heavy"]
+    assert [
+        limit.name for limit in controller.get_limits("/projects/p1/models/results")
+    ] == ["heavy"]
+    assert controller.get_limits("/info") == []
+    assert controller.get_limits("/projects") == []
+    assert set(controller.get_stats()) == {"blocks", "global"}
+
+    assert not AdmissionController().enabled
+    with pytest.raises(ValueError):
+        AdmissionController(route_concurrency_limits={"unknown": 1})
+
+
+def test_admission_control_middleware():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] != "/info":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = AdmissionControlMiddleware(
+            app,
+            AdmissionController(
+                route_concurrency_limits={"blocks": 1}, max_queued_requests=1
+            ),
+        )
+
+        async def call(path):
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": b""}
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+            await middleware(scope, receive, send)
+            return messages[0]
+
+        path = "/projects/p1/blocksFromSampleIds"
+        running = asyncio.create_task(call(path))
+        queued = asyncio.create_task(call(path))
+        await asyncio.sleep(0.01)
+
+        # The queue is full, the cheap routes are not limited
+        rejected = await call(path)
+        assert rejected["status"] == 429
+        assert (b"retry-after", b"1") in rejected["headers"]
+        assert (await call("/info"))["status"] == 200
+
+        release.set()
+        assert (await running)["status"] == 200
+        assert (await queued)["status"] == 200
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+from debiai_data_provider.utils.cache import MemoryBoundedCache, estimate_size
+
+
+def test_memory_bounded_cache_eviction():
+    row_size = estimate_size(("m1", 0)) + estimate_size([0.5, "OK"])
+    cache = MemoryBoundedCache(max_memory=row_size * 3)
+
+    for i in range(3):
+        assert cache.set(("m1", i), [0.5, "OK"])
+    assert len(cache) == 3
+
+    # The least recently used entry is evicted
+    cache.get(("m1", 0))
+    cache.set(("m1", 3), [0.5, "OK"])
+    assert ("m1", 0) in cache
+    assert ("m1", 1) not in cache
+    assert cache.memory_usage <= cache.max_memory
+
+    # Too large values are not stored
+    assert not cache.set(("m1", 4), ["x" * row_size * 4])
+
+
+def test_memory_bounded_cache_groups():
+    cache = MemoryBoundedCache(max_memory=1024 * 1024)
+    cache.set(("m1", "s1"), [1])
+    cache.set(("m1", "s2"), [2])
+    cache.set(("m2", "s1"), [3])
+
+    cache.invalidate_group("m1")
+    assert len(cache) == 1
+    assert cache.get(("m2", "s1")) == [3]
+    assert cache.memory_usage == cache.group_memory_usage("m2")
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.memory_usage == 0
@@ -0,0 +1,371 @@
+import time
+import json
+import asyncio
+import threading
+import pytest
+import pandas as pd
+from fastapi import FastAPI
+from debiai_data_provider.data_provider import DataProvider
+from debiai_data_provider.controller.routes import router
+from debiai_data_provider.models.project import ProjectToExpose
+from debiai_data_provider.utils.cancellation import (
+    CancellationToken,
+    RequestCancelled,
+    RequestTimeout,
+    resolve_result,
+)
+from tests.test_utils import SamplesProject
+
+# Ten samples with a number value
+DATA = {"Data ID": [f"s{i}" for i in range(10)], "value": list(range(10))}
+STRUCTURE = {"value": {"type": "number", "category": "other"}}
+
+
+def create_slow_project(delay: float = 0) -> SamplesProject:
+    return SamplesProject(DATA, STRUCTURE, name="slow", delay=delay)
+
+
+class AsyncProject(SamplesProject):
+    def __init__(self, delay: float = 0):
+        super().__init__(DATA, STRUCTURE, {"score": {"type": "number"}}, delay=delay)
+        self.cancelled = threading.Event()
+
+    async def get_data(self, samples_ids):
+        self.data_calls.append(list(samples_ids))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        return self.data[self.data["Data ID"].isin(samples_ids)]
+
+    async def get_model_results(self, model_id, sample_ids):
+        return pd.DataFrame({"score": [1.0] * len(sample_ids)})
+
+
+def test_cancellation_token():
+    token = CancellationToken()
+    calls = []
+    token.add_callback(lambda: calls.append("cancelled"))
+    assert not token.cancelled
+    token.raise_if_cancelled()
+
+    token.cancel()
+    token.cancel("ignored")
+    assert token.cancelled and not token.timed_out
+    assert token.reason == "The client disconnected"
+    assert calls == ["cancelled"]
+    with pytest.raises(RequestCancelled):
+        token.raise_if_cancelled()
+
+    # Called right away once cancelled
+    token.add_callback(lambda: calls.append("late"))
+    assert calls == ["cancelled", "late"]
+
+    # Timeout
+    token = CancellationToken(timeout=0)
+    assert token.remaining() == 0
+    assert token.timed_out
+    with pytest.raises(RequestTimeout):
+        token.raise_if_cancelled()
+
+
+def test_resolve_result():
+    async def compute():
+        return 42
+
+    assert resolve_result(1) == 1
+    assert resolve_result(compute()) == 42
+
+    async def scenario():
+        # Awaited on the event loop, cancelled with the request
+        token = CancellationToken(loop=asyncio.get_running_loop())
+        started = asyncio.Event()
+        cancelled = []
+
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        computation = asyncio.ensure_future(
+            asyncio.to_thread(resolve_result, slow(), token)
+        )
+        await started.wait()
+        token.cancel()
+        with pytest.raises(RequestCancelled):
+            await computation
+        await asyncio.sleep(0)
+        assert cancelled == [True]
+
+    asyncio.run(scenario())
+
+
+def test_cancel_between_sub_chunks():
+    project = create_slow_project()
+    project_to_expose = ProjectToExpose(project, "slow", sub_chunk_size=3)
+    samples_ids = project.get_samples_ids()
+
+    token = CancellationToken()
+    data = project_to_expose.get_data_from_ids(samples_ids, cancellation=token)
+    assert list(data.keys()) == samples_ids
+    assert [len(call) for call in project.data_calls] == [3, 3, 3, 1]
+
+    # Cancelled after the first sub-chunk
+    project.data_calls = []
+    token = CancellationToken()
+    original_get_data = project.get_data
+
+    def get_data_and_cancel(samples_ids):
+        token.cancel()
+        return original_get_data(samples_ids)
+
+    project.get_data = get_data_and_cancel
+    with pytest.raises(RequestCancelled):
+        project_to_expose.get_data_from_ids(samples_ids, cancellation=token)
+    assert len(project.data_calls) == 1
+
+    # Also for the columnar blocks
+    project.data_calls = []
+    token = CancellationToken()
+    with pytest.raises(RequestCancelled):
+        project_to_expose.get_columnar_data_from_ids(samples_ids, cancellation=token)
+    assert len(project.data_calls) == 1
+
+    # Requests without token are computed at once
+    project.get_data = original_get_data
+    project.data_calls = []
+    project_to_expose.get_data_from_ids(samples_ids)
+    assert len(project.data_calls) == 1
+
+    # The columns are built from the data of all the sub-chunks
+    project.data_calls = []
+    columnar_data = project_to_expose.get_columnar_data_from_ids(
+        samples_ids, cancellation=CancellationToken()
+    )
+    assert columnar_data == {"ids": samples_ids, "columns": [list(range(10))]}
+    assert [len(call) for call in project.data_calls] == [3, 3, 3, 1]
+
+
+def test_shared_columnar_computation_cancelled():
+    project = create_slow_project()
+    project_to_expose = ProjectToExpose(project, "slow", sub_chunk_size=3)
+    samples_ids = project.get_samples_ids()
+    started = threading.Event()
+    release = threading.Event()
+    original_get_data = project.get_data
+
+    def get_data(samples_ids):
+        started.set()
+        release.wait(5)
+        return original_get_data(samples_ids)
+
+    project.get_data = get_data
+    first_token, second_token = CancellationToken(), CancellationToken()
+    results = {}
+
+    def request(name, token):
+        try:
+            results[name] = project_to_expose.get_columnar_data_from_ids(
+                samples_ids, cancellation=token
+            )
+        except RequestCancelled as e:
+            results[name] = e
+
+    first = threading.Thread(target=request, args=("first", first_token))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=request, args=("second", second_token))
+    second.start()
+    time.sleep(0.05)
+
+    # Only the request leading the shared computation is cancelled
+    first_token.cancel()
+    release.set()
+    first.join(5)
+    second.join(5)
+    assert isinstance(results["first"], RequestCancelled)
+    assert results["second"] == {"ids": samples_ids, "columns": [list(range(10))]}
+
+
+def test_async_project_methods():
+    project = AsyncProject()
+    project_to_expose = ProjectToExpose(project, "async")
+
+    assert project_to_expose.get_data_from_ids(["s1", "s2"]) == {
+        "s1": [1],
+        "s2": [2],
+    }
+    assert project_to_expose.get_model_results("m1", ["s1"]) == {"s1": [1.0]}
+
+
+async def asgi_request(app, path: str, body, disconnect_after: float = None):
+    messages = []
+    body_sent = []
+
+    async def receive():
+        if not body_sent:
+            body_sent.append(True)
+            return {"type": "http.request", "body": json.dumps(body).encode()}
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "server": ("test", 80),
+        "client": ("test", 1234),
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+def send_request(app, path: str, body, disconnect_after: float = None):
+    return asyncio.run(asgi_request(app, path, body, disconnect_after))
+
+
+def call_route(app, path: str, body, disconnect_after: float = None):
+    return send_request(app, path, body, disconnect_after)[0]["status"]
+
+
+def post_json(app, path: str, body):
+    messages = send_request(app, path, body)
+    content = b"".join(message.get("body", b"") for message in messages[1:])
+    return messages[0]["status"], json.loads(content)
+
+
+def test_blocks_route_cancellation():
+    project = AsyncProject(delay=5)
+    data_provider = DataProvider(request_timeout=10)
+    data_provider.add_project(project)
+    app = FastAPI()
+    app.state.data_provider = data_provider
+    app.include_router(router)
+    path = "/projects/AsyncProject/blocksFromSampleIds"
+
+    # The client disconnects, the project coroutine is cancelled
+    start_time = time.perf_counter()
+    status = call_route(app, path, {"sampleIds": ["s1"]}, disconnect_after=0.1)
+    assert status == 499
+    assert project.cancelled.wait(2)
+    assert time.perf_counter() - start_time < 4
+
+    # Timeout
+    project.cancelled.clear()
+    data_provider.request_timeout = 0.1
+    assert call_route(app, path, {"sampleIds": ["s1"]}) == 504
+    assert project.cancelled.wait(2)
+
+    # Completed, encoded in the threadpool with the NaN values as null
+    project.delay = 0
+    project.data.loc[2, "value"] = float("nan")
+    assert post_json(app, path, {"sampleIds": ["s1", "s2"]}) == (
+        200,
+        {"data": {"s1": [1.0], "s2": [None]}, "dataMap": True},
+    )
+
+
+def test_timed_out_request_holds_its_admission_slot():
+    from debiai_data_provider.controller.middleware import AdmissionControlMiddleware
+
+    project = create_slow_project(delay=0.5)
+    data_provider = DataProvider(
+        request_timeout=0.1,
+        route_concurrency_limits={"blocks": 1},
+        max_queued_requests=0,
+    )
+    data_provider.add_project(project)
+    app = FastAPI()
+    app.state.data_provider = data_provider
+    app.include_router(router)
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        admission_controller=data_provider.admission_controller,
+    )
+    path = "/projects/slow/blocksFromSampleIds"
+    stats = data_provider.admission_controller.route_limits["blocks"].get_stats
+
+    async def scenario():
+        timed_out = await asgi_request(app, path, {"sampleIds": ["s1"]})
+        assert timed_out[0]["status"] == 504
+
+        # The project is still computing, the next request is rejected
+        assert stats()["running"] == 1
+        rejected = await asgi_request(app, path, {"sampleIds": ["s2"]})
+        assert rejected[0]["status"] == 429
+
+        while stats()["running"]:
+            await asyncio.sleep(0.01)
+        project.delay = 0
+        completed = await asgi_request(app, path, {"sampleIds": ["s2"]})
+        assert completed[0]["status"] == 200
+
+    asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_model_results_route_without_results():
+    data_provider = DataProvider()
+    data_provider.add_project(AsyncProject())
+    app = FastAPI()
+    app.state.data_provider = data_provider
+    app.include_router(router)
+
+    async def get_model_results(model_id, sample_ids):
+        return pd.DataFrame({"score": [1.0]}, index=["s1"])
+
+    data_provider._get_project_to_expose("AsyncProject").project.get_model_results = (
+        get_model_results
+    )
+
+    # The samples without results are sent as null
+    path = "/projects/AsyncProject/models/m1/results"
+    assert post_json(app, path, ["s1", "s2"]) == (
+        200,
+        {"s1": [1.0], "s2": [None]},
+    )
+
+
+def test_routes_numpy_values():
+    import numpy as np
+
+    project = AsyncProject()
+    project.data["value"] = pd.Series([np.int64(i) for i in range(10)], dtype=object)
+
+    async def get_model_results(model_id, sample_ids):
+        return pd.DataFrame({"score": pd.Series([np.int64(7)], ["s1"], object)})
+
+    project.get_model_results = get_model_results
+    data_provider = DataProvider()
+    data_provider.add_project(project)
+    app = FastAPI()
+    app.state.data_provider = data_provider
+    app.include_router(router)
+
+    # The numpy scalars of the object columns are sent as Python values
+    assert post_json(
+        app, "/projects/AsyncProject/blocksFromSampleIds", {"sampleIds": ["s1"]}
+    ) == (200, {"data": {"s1": [1]}, "dataMap": True})
+    assert post_json(app, "/projects/AsyncProject/models/m1/results", ["s1"]) == (
+        200,
+        {"s1": [7]},
+    )
+    assert post_json(
+        app,
+        "/projects/AsyncProject/models/results",
+        {"modelIds": ["m1"], "sampleIds": ["s1"]},
+    ) == (200, {"m1": {"s1": [7]}})
@@ -0,0 +1,115 @@
+import os
+import json
+import threading
+import pandas as pd
+import pytest
+from debiai_data_provider.config import load_config, create_data_provider
+from tests.test_utils import create_temp_parquet_file
+
+
+def test_load_config():
+    data = pd.DataFrame({"sample_id": ["s1", "s2"], "class": ["A", "B"]})
+    with create_temp_parquet_file(data) as parquet_path:
+        config_path = os.path.join(os.path.dirname(parquet_path), "config.json")
+        with open(config_path, "w") as config_file:
+            json.dump(
+                {
+                    "server": {"port": 8080, "max_sample_data_by_request": 100},
+                    "projects": [
+                        {
+                            "parquet_path": "data.parquet",
+                            "sample_id_column_name": "sample_id",
+                            "name": "My project",
+                            "cache_dir": "cache",
+                        }
+                    ],
+                },
+                config_file,
+            )
+
+        config = load_config(config_path)
+        assert config.server.port == 8080
+        assert config.server.host == "0.0.0.0"
+        # Relative paths are resolved from the config file
+        assert config.projects[0].parquet_path == parquet_path
+        assert config.projects[0].cache_dir == os.path.join(
+            os.path.dirname(parquet_path), "cache"
+        )
+
+        data_provider = create_data_provider(config)
+        assert data_provider.max_sample_data_by_request == 100
+        assert data_provider.get_project("My project").get_nb_samples() == 2
+
+        # Invalid configuration
+        with open(config_path, "w") as config_file:
+            json.dump({"projects": [{"parquet_path": "data.parquet"}]}, config_file)
+        with pytest.raises(ValueError, match="sample_id_column_name"):
+            load_config(config_path)
+
+
+def test_add_projects_in_parallel():
+    from debiai_data_provider import DataProvider, ParquetDataProvider
+
+    data = pd.DataFrame({"sample_id": ["s1", "s2"], "class": ["A", "B"]})
+    with create_temp_parquet_file(data) as parquet_path:
+        project_loaders = {
+            f"project_{i}": lambda i=i: ParquetDataProvider(
+                parquet_path=parquet_path,
+                sample_id_column_name="sample_id",
+                name=f"project_{i}",
+                verbose=False,
+            )
+            for i in range(3)
+        }
+        project_loaders["missing"] = lambda: ParquetDataProvider(
+            parquet_path="non-existing", sample_id_column_name="sample_id"
+        )
+
+        data_provider = DataProvider()
+        loading_thread = data_provider.add_projects_in_parallel(
+            project_loaders, max_workers=2, wait=False
+        )
+        loading_thread.join(10)
+
+        # The failing project does not prevent the others from being served
+        project_names = sorted(p.project_name for p in data_provider.projects)
+        assert project_names == ["project_0", "project_1", "project_2"]
+        assert data_provider.get_project("project_1").load_duration is not None
+
+
+def test_start_server_while_loading(monkeypatch, capsys):
+    from debiai_data_provider import DataProvider, ParquetDataProvider
+
+    monkeypatch.setattr(
+        "debiai_data_provider.app.start_api_server", lambda *args, **kwargs: None
+    )
+    data = pd.DataFrame({"sample_id": ["s1", "s2"], "class": ["A", "B"]})
+    loading = threading.Event()
+    with create_temp_parquet_file(data) as parquet_path:
+
+        def load_project():
+            loading.wait(5)
+            return ParquetDataProvider(
+                parquet_path=parquet_path,
+                sample_id_column_name="sample_id",
+                name="slow project",
+                verbose=False,
+            )
+
+        data_provider = DataProvider()
+        loading_thread = data_provider.add_projects_in_parallel(
+            {"slow project": load_project}, wait=False
+        )
+
+        # The server starts while the project is loading
+        data_provider.start_server()
+        output = capsys.readouterr().out
+        assert "Number of Projects: 0 (1 loading)" in output
+        assert "NB samples" not in output
+
+        # The project details are displayed once loaded
+        loading.set()
+        loading_thread.join(10)
+        output = capsys.readouterr().out
+        assert "Loaded the project 'slow project'" in output
+        assert "NB samples:" in output
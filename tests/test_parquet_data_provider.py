@@ -1,6 +1,16 @@
+import os
+import threading
 import pandas as pd
+from debiai_data_provider import DataProvider
+from debiai_data_provider.models.project import DebiAIProject, ProjectToExpose
 from debiai_data_provider.providers.parquet_data_provider import ParquetDataProvider
-from tests.test_utils import create_temp_parquet_file, create_temp_results_folder
+from debiai_data_provider.providers.parquet_dataset import PartitionedParquetDataset
+from debiai_data_provider.providers.parquet_results import ParquetResultsCatalog
+from tests.test_utils import (
+    create_temp_parquet_file,
+    create_temp_results_folder,
+    create_temp_partitioned_dataset,
+)
 import pytest
 
 
@@ -209,6 +219,23 @@ def test_parquet_data_provider_with_results():
         assert m2_results["predicted_state"].tolist() == ["KO", "OK"]
         assert m2_results["score"].tolist() == [0.7, 0.6]
 
+        # Indexed by sample ID, in the requested order
+        m1_results = provider.get_model_results("m1", ["S3", "S2", "S1"])
+        assert m1_results.index.tolist() == ["S2", "S1"]
+        assert m1_results["score"].tolist() == [0.8, 0.9]
+
+        # Results of several models at once
+        models_results = provider.get_models_results(["m2", "m1", "m3"], ["S3", "S1"])
+        assert list(models_results.keys()) == ["m2", "m1"]
+        assert models_results["m1"].index.tolist() == ["S1"]
+        assert models_results["m2"]["score"].tolist() == [0.6]
+
+        project = ProjectToExpose(provider, "results")
+        assert project.get_models_results(["m1", "m2"], ["S2", "S1"]) == {
+            "m1": {"S2": ["KO", 0.8], "S1": ["OK", 0.9]},
+            "m2": {"S2": ["KO", 0.7], "S1": [None, None]},
+        }
+
         # New provider with columns filter
         provider = ParquetDataProvider(
             parquet_path=parquet_path,
@@ -380,3 +407,574 @@ def test_parquet_data_provider_with_ignored_results_columns():
         assert "predicted_state" in m1_results.columns
         assert "score" in m1_results.columns
         assert "extra_result_column" not in m1_results.columns
+
+
+def test_parquet_data_provider_categorical_columns():
+    # Create a temporary parquet file
+    data = pd.DataFrame(
+        {
+            "sample_id": [f"s{i}" for i in range(6)],
+            "weather": ["sun", "rain", "sun", "sun", "rain", "sun"],
+            "comment": ["a", "b", "c", "d", "e", "f"],
+        }
+    )
+    with create_temp_parquet_file(data) as parquet_path:
+        provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+        )
+
+        # Only the low cardinality columns are categoricals
+        assert isinstance(provider.data["weather"].dtype, pd.CategoricalDtype)
+        assert not isinstance(provider.data["comment"].dtype, pd.CategoricalDtype)
+        assert provider.get_data(["s1", "s2"])["weather"].tolist() == ["rain", "sun"]
+
+        # Dictionary encoded blocks
+        project_to_expose = ProjectToExpose(provider, "categorical")
+        data = project_to_expose.get_columnar_data_from_ids(
+            ["s1", "s2", "s4"], dictionary_encoding=True
+        )
+        assert data["columns"][0] == {
+            "dictionary": ["rain", "sun"],
+            "codes": [0, 1, 0],
+        }
+        assert data["columns"][1] == ["b", "c", "e"]
+
+        provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            max_categories=None,
+        )
+        assert not isinstance(provider.data["weather"].dtype, pd.CategoricalDtype)
+
+
+def test_parquet_data_provider_compact_memory():
+    nb_samples = 1000
+    data = pd.DataFrame(
+        {
+            "sample_id": [f"sample_{i}" for i in range(nb_samples)],
+            "label": [f"label_{i % 3}" for i in range(nb_samples)],
+            "count": [i % 100 for i in range(nb_samples)],
+            "score": [(i % 4) / 4 for i in range(nb_samples)],
+            "precise": [i / 3 for i in range(nb_samples)],
+            "comment": [None if i % 2 else f"comment {i}" for i in range(nb_samples)],
+            "box": [[i, i + 1] for i in range(nb_samples)],
+        }
+    )
+    with create_temp_parquet_file(data) as parquet_path:
+        default_provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+        )
+        compact_provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            compact_memory=True,
+        )
+
+        # Downcast only when the values are kept as is
+        dtypes = compact_provider.data.dtypes
+        assert str(dtypes["count"]) == "int8[pyarrow]"
+        assert str(dtypes["score"]) == "float[pyarrow]"
+        assert str(dtypes["precise"]) == "double[pyarrow]"
+        assert isinstance(dtypes["label"], pd.CategoricalDtype)
+        assert compact_provider.get_memory_usage() < default_provider.get_memory_usage()
+
+        # Same Python values sent to DebiAI
+        samples_ids = ["sample_3", "sample_10", "sample_998"]
+        default_data = ProjectToExpose(default_provider, "default").get_data_from_ids(
+            samples_ids
+        )
+        compact_data = ProjectToExpose(compact_provider, "compact").get_data_from_ids(
+            samples_ids
+        )
+        assert compact_data == {
+            "sample_3": ["label_0", 3, 0.75, 1.0, None, [3, 4]],
+            "sample_10": ["label_1", 10, 0.5, 10 / 3, "comment 10", [10, 11]],
+            "sample_998": ["label_2", 98, 0.5, 998 / 3, "comment 998", [998, 999]],
+        }
+        # The default provider keeps the lists as numpy arrays
+        default_row = default_data["sample_10"]
+        assert [*default_row[:5], default_row[5].tolist()] == compact_data["sample_10"]
+        assert type(compact_data["sample_3"][1]) is int
+        assert compact_provider.get_samples_ids()[:2] == ["sample_0", "sample_1"]
+
+
+def test_parquet_data_provider_partitioned():
+    data = pd.DataFrame(
+        {
+            "sample_id": [f"s{i}" for i in range(12)],
+            "value": list(range(12)),
+            "date": ["d1"] * 6 + ["d2"] * 6,
+            "sensor": ["a", "b"] * 6,
+        }
+    )
+    with create_temp_partitioned_dataset(
+        data, ["date", "sensor"], row_group_size=2
+    ) as dataset_path:
+        provider = ParquetDataProvider(
+            parquet_path=dataset_path,
+            sample_id_column_name="sample_id",
+        )
+
+        assert provider.get_nb_samples() == 12
+        assert sorted(provider.get_samples_ids()) == sorted(data["sample_id"])
+
+        # Partition keys are context columns
+        structure = provider.get_structure()
+        assert list(structure.keys()) == ["value", "date", "sensor"]
+        assert structure["date"]["category"] == "context"
+
+        returned_data = provider.get_data(["s7", "s0"])
+        assert returned_data.index.tolist() == ["s7", "s0"]
+        assert returned_data["value"].tolist() == [7, 0]
+        assert returned_data["date"].tolist() == ["d2", "d1"]
+        assert returned_data["sensor"].tolist() == ["b", "a"]
+
+        # Only the file and row group containing the samples are read
+        locations = provider.partitioned_dataset.locate(["s1", "s3"])
+        assert len(locations) == 1
+        assert list(locations.values()) == [[0]]
+
+        # Blocks
+        project_to_expose = ProjectToExpose(provider, "partitioned")
+        assert project_to_expose.get_data_from_ids(["s2"]) == {"s2": [2, "d1", "a"]}
+
+        # Ignored columns
+        provider = ParquetDataProvider(
+            parquet_path=dataset_path,
+            sample_id_column_name="sample_id",
+            ignored_columns=["sensor"],
+        )
+        assert "sensor" not in provider.get_data(["s1"]).columns
+
+        with pytest.raises(ValueError, match="Column 'non-existing' not found"):
+            ParquetDataProvider(
+                parquet_path=dataset_path, sample_id_column_name="non-existing"
+            )
+
+
+def test_parquet_data_provider_lazy_results(capsys):
+    data = pd.DataFrame(
+        {
+            "sample_id": ["S1", "S2", "S3"],
+            "class": ["A", "B", "C"],
+        }
+    )
+    results = {
+        f"m{i}": pd.DataFrame(
+            {
+                "sample_id": ["S1", "S2", "S3"],
+                "score": [0.1 * i, 0.2 * i, 0.3 * i],
+                "comment": ["x" * 1000] * 3,
+            }
+        )
+        for i in range(3)
+    }
+    with create_temp_parquet_file(data) as parquet_path, create_temp_results_folder(
+        results
+    ) as results_dir:
+        provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            results_parquet_folder_path=results_dir,
+            lazy_results_loading=True,
+            results_max_memory=10000,
+        )
+        catalog = provider.results_catalog
+
+        # Only the metadata is read at startup
+        assert catalog.get_memory_usage() == 0
+        assert [model["id"] for model in provider.get_models()] == ["m0", "m1", "m2"]
+        assert provider.get_models()[1]["nb_results"] == 3
+        assert list(provider.get_results_structure().keys()) == ["score", "comment"]
+        assert provider.get_model_evaluated_data_id_list("m1") == ["S1", "S2", "S3"]
+        assert catalog.get_memory_usage() == 0
+
+        # The results are loaded when requested
+        m1_results = provider.get_model_results("m1", ["S2"])
+        assert m1_results["score"].tolist() == [0.2]
+        assert 0 < catalog.get_memory_usage() <= 10000
+
+        # And evicted under the memory budget
+        for model_id in ["m0", "m2", "m1"]:
+            provider.get_model_results(model_id, ["S1"])
+            assert catalog.get_memory_usage() <= 10000
+        assert catalog._get_loaded_results("m1") is not None
+        assert catalog._get_loaded_results("m0") is None
+
+        # A model larger than the budget is never kept, warned once
+        catalog._results_cache.max_memory = 1000
+        for _ in range(2):
+            assert catalog.get_results("m0")["score"].tolist() == [0, 0, 0]
+        assert catalog._get_loaded_results("m0") is None
+        assert capsys.readouterr().out.count("exceed results_max_memory") == 1
+
+        # Removed by a concurrent scan, like the unknown models
+        del catalog.files["m1"]
+        assert catalog._load_lazy("m1").empty
+
+
+def test_parquet_data_provider_refresh_models():
+    data = pd.DataFrame({"sample_id": ["S1", "S2"], "class": ["A", "B"]})
+    results = {
+        model_id: pd.DataFrame({"sample_id": ["S1", "S2"], "score": [0.1, 0.2]})
+        for model_id in ["m1", "m2"]
+    }
+    with create_temp_parquet_file(data) as parquet_path, create_temp_results_folder(
+        results
+    ) as results_dir:
+        provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            results_parquet_folder_path=results_dir,
+        )
+        project = ProjectToExpose(
+            provider, "refresh", max_results_cache_memory=1024 * 1024
+        )
+        catalog = provider.results_catalog
+        assert project.get_model_results("m1", ["S1"]) == {"S1": [0.1]}
+
+        # Nothing changed
+        assert project.refresh_models() == {
+            "added": [],
+            "modified": [],
+            "removed": [],
+        }
+
+        # A new model, a re-evaluated one and a deleted one
+        pd.DataFrame({"sample_id": ["S1"], "score": [0.3]}).to_parquet(
+            os.path.join(results_dir, "m3.parquet")
+        )
+        pd.DataFrame({"sample_id": ["S1", "S2"], "score": [0.5, 0.6]}).to_parquet(
+            os.path.join(results_dir, "m1.parquet")
+        )
+        os.remove(os.path.join(results_dir, "m2.parquet"))
+        os.utime(os.path.join(results_dir, "m1.parquet"), ns=(0, 0))
+
+        assert project.refresh_models() == {
+            "added": ["m3"],
+            "modified": ["m1"],
+            "removed": ["m2"],
+        }
+        assert [model["id"] for model in provider.get_models()] == ["m1", "m3"]
+        assert project.get_model_results("m1", ["S1"]) == {"S1": [0.5]}
+        assert project.get_model_results("m3", ["S1"]) == {"S1": [0.3]}
+        assert catalog.get_results("m2").empty
+
+        # The unchanged models are not read again
+        m3_results = catalog.get_results("m3")
+        provider.refresh_models()
+        assert catalog.get_results("m3") is m3_results
+
+        # The cached results are dropped when the file changes between two refreshes
+        pd.DataFrame({"sample_id": ["S1", "S2"], "score": [0.8, 0.9]}).to_parquet(
+            os.path.join(results_dir, "m3.parquet")
+        )
+        os.utime(os.path.join(results_dir, "m3.parquet"), ns=(1, 1))
+        provider.refresh_models()
+        assert project.get_model_results("m3", ["S1"]) == {"S1": [0.8]}
+
+
+def test_parquet_data_provider_diagnostics():
+    data = pd.DataFrame({"sample_id": ["S1", "S2", "S3"], "value": [1, 2, 3]})
+    results = {"m1": pd.DataFrame({"sample_id": ["S1", "S2"], "score": [0.1, 0.2]})}
+    with create_temp_parquet_file(data) as parquet_path, create_temp_results_folder(
+        results
+    ) as results_dir:
+        data_provider = DataProvider(max_results_cache_memory=1024 * 1024)
+        data_provider.add_project(
+            ParquetDataProvider(
+                parquet_path=parquet_path,
+                sample_id_column_name="sample_id",
+                results_parquet_folder_path=results_dir,
+                name="diagnostics",
+            )
+        )
+        data_provider._get_project_to_expose("diagnostics").get_model_results(
+            "m1", ["S1"]
+        )
+
+        diagnostics = data_provider.get_diagnostics()
+        assert diagnostics["process"]["nbProjects"] == 1
+        assert diagnostics["process"]["rss"] > 0
+
+        project_diagnostics = diagnostics["projects"]["diagnostics"]
+        assert project_diagnostics["nbSamples"] == 3
+        assert project_diagnostics["nbColumns"] == 1
+        assert project_diagnostics["nbResultsColumns"] == 1
+        assert project_diagnostics["nbModels"] == 1
+        assert project_diagnostics["loadDuration"] > 0
+
+        memory = project_diagnostics["memory"]
+        assert set(memory) == {"data", "results", "resultsCache", "analyses"}
+        assert memory["data"] > 0 and memory["results"] > 0
+        assert memory["resultsCache"] > 0
+        assert project_diagnostics["memoryUsage"] == sum(memory.values())
+
+
+def test_parquet_data_provider_shared_arrow_store(tmp_path, monkeypatch):
+    data = pd.DataFrame(
+        {
+            "sample_id": ["S1", "S2", "S3", "S4"],
+            "label": ["cat", "dog", "cat", "cat"],
+            "value": [1, 2, None, 4],
+            "box": [[0, 1], [1, 2], [2, 3], [3, 4]],
+        }
+    )
+    cache_dir = str(tmp_path / "cache")
+    with create_temp_parquet_file(data) as parquet_path:
+        provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            cache_dir=cache_dir,
+        )
+        assert os.path.exists(provider.data_store_path)
+        expected_data = {
+            "S2": ["dog", 2.0, [1, 2]],
+            "S3": ["cat", None, [2, 3]],
+        }
+        project = ProjectToExpose(provider, "store")
+        assert project.get_data_from_ids(["S2", "S3"]) == expected_data
+        assert "mappedData" in provider.get_memory_details()
+
+        # The other processes map the stored file without reading the parquet file
+        def read_parquet_file(*args, **kwargs):
+            raise AssertionError("The parquet file should not be read")
+
+        monkeypatch.setattr(
+            ParquetDataProvider, "read_project_parquet_samples", read_parquet_file
+        )
+        mapped_provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            cache_dir=cache_dir,
+        )
+        monkeypatch.undo()
+        assert mapped_provider.data_store_path == provider.data_store_path
+        assert isinstance(mapped_provider.data["value"].dtype, pd.ArrowDtype)
+        assert isinstance(mapped_provider.data["label"].dtype, pd.CategoricalDtype)
+        mapped_project = ProjectToExpose(mapped_provider, "mapped")
+        assert mapped_project.get_data_from_ids(["S2", "S3"]) == expected_data
+
+        # Stored again when the source changes
+        data["value"] = [10, 20, 30, 40]
+        data.to_parquet(parquet_path)
+        os.utime(parquet_path, ns=(0, 0))
+        updated_provider = ParquetDataProvider(
+            parquet_path=parquet_path,
+            sample_id_column_name="sample_id",
+            cache_dir=cache_dir,
+        )
+        assert updated_provider.data_store_path != provider.data_store_path
+        assert updated_provider.get_data(["S3"])["value"].tolist() == [30]
+
+
+def test_parquet_data_provider_load_cache(tmp_path, monkeypatch):
+    data = pd.DataFrame({"sample_id": ["S1", "S2", "S3"], "value": [1, 2, 3]})
+    results = {
+        "m1": pd.DataFrame({"sample_id": ["S1", "S2"], "score": [0.1, None]}),
+        "m2": pd.DataFrame({"sample_id": ["S3"], "score": [0.3]}),
+    }
+    cache_dir = str(tmp_path / "cache")
+
+    def not_read(*args, **kwargs):
+        raise AssertionError("The source file should not be read")
+
+    with create_temp_parquet_file(data) as parquet_path, create_temp_results_folder(
+        results
+    ) as results_dir:
+
+        def load_provider():
+            return ParquetDataProvider(
+                parquet_path=parquet_path,
+                sample_id_column_name="sample_id",
+                results_parquet_folder_path=results_dir,
+                cache_dir=cache_dir,
+            )
+
+        provider = load_provider()
+        expected_results = ProjectToExpose(provider, "first").get_model_results(
+            "m1", ["S1", "S2"]
+        )
+        assert expected_results == {"S1": [0.1], "S2": [None]}
+
+        # The next startups map the stored data and results
+        with monkeypatch.context() as patch:
+            patch.setattr(ParquetDataProvider, "read_project_parquet_samples", not_read)
+            patch.setattr(ParquetResultsCatalog, "_read_results", not_read)
+            restarted_provider = load_provider()
+            restarted_project = ProjectToExpose(restarted_provider, "restarted")
+            assert (
+                restarted_project.get_model_results("m1", ["S1", "S2"])
+                == expected_results
+            )
+            assert restarted_project.get_data_from_ids(["S2"]) == {"S2": [2]}
+
+        # Only the modified results are read again, the previous file is removed
+        stored_files = set(os.listdir(cache_dir))
+        pd.DataFrame({"sample_id": ["S3"], "score": [0.9]}).to_parquet(
+            os.path.join(results_dir, "m2.parquet")
+        )
+        os.utime(os.path.join(results_dir, "m2.parquet"), ns=(0, 0))
+        restarted_provider = load_provider()
+        assert restarted_provider.get_model_results("m2", ["S3"])["score"].tolist() == [
+            0.9
+        ]
+        new_files = set(os.listdir(cache_dir))
+        assert len(new_files) == len(stored_files)
+        assert len(new_files - stored_files) == 1
+
+        # A corrupted file is stored again
+        with open(restarted_provider.data_store_path, "r+b") as data_file:
+            data_file.truncate(10)
+        assert load_provider().get_data(["S1"])["value"].tolist() == [1]
+
+
+def test_parquet_data_provider_partitioned_index_cache(tmp_path, monkeypatch):
+    data = pd.DataFrame(
+        {
+            "sample_id": [f"s{i}" for i in range(8)],
+            "value": list(range(8)),
+            "sensor": ["a", "b"] * 4,
+        }
+    )
+    cache_dir = str(tmp_path / "cache")
+    with create_temp_partitioned_dataset(
+        data, ["sensor"], row_group_size=2
+    ) as dataset_path:
+        provider = ParquetDataProvider(
+            parquet_path=dataset_path,
+            sample_id_column_name="sample_id",
+            cache_dir=cache_dir,
+        )
+        locations = provider.partitioned_dataset.locate(["s1", "s4"])
+
+        # The sample index is not built again
+        monkeypatch.setattr(
+            PartitionedParquetDataset,
+            "_build_sample_index",
+            lambda self: pytest.fail("The sample index should not be built"),
+        )
+        restarted_provider = ParquetDataProvider(
+            parquet_path=dataset_path,
+            sample_id_column_name="sample_id",
+            cache_dir=cache_dir,
+        )
+        assert restarted_provider.get_nb_samples() == 8
+        assert restarted_provider.partitioned_dataset.locate(["s1", "s4"]) == locations
+        assert restarted_provider.get_data(["s5", "s2"])["value"].tolist() == [5, 2]
+
+
+def test_parquet_data_provider_list_encoding():
+    import base64
+    import numpy as np
+
+    data = pd.DataFrame(
+        {
+            "sample_id": ["S1", "S2", "S3"],
+            "embedding": [[0.5, 1.5, -2.0], [1.0, 2.0, 3.0], None],
+            "tags": [["a"], ["b", "c"], []],
+            "label": ["x", "y", "z"],
+        }
+    )
+
+    def decode(value, dtype):
+        return np.frombuffer(base64.b64decode(value), dtype=dtype).tolist()
+
+    with create_temp_parquet_file(data) as parquet_path:
+        for compact_memory in [False, True]:
+            provider = ParquetDataProvider(
+                parquet_path=parquet_path,
+                sample_id_column_name="sample_id",
+                list_encoding="float16",
+                compact_memory=compact_memory,
+            )
+            project = ProjectToExpose(provider, "embeddings")
+
+            # The encoding is declared in the column metadata
+            columns = {column.name: column for column in project.get_columns()}
+            assert columns["embedding"].type == "list"
+            assert columns["embedding"].metadata["encoding"] == {
+                "format": "base64",
+                "dtype": "float16",
+                "byteOrder": "little",
+            }
+            assert "encoding" not in columns["tags"].metadata
+
+            blocks = project.get_data_from_ids(["S2", "S1", "S3"])
+            assert decode(blocks["S2"][0], "<f2") == [1.0, 2.0, 3.0]
+            assert decode(blocks["S1"][0], "<f2") == [0.5, 1.5, -2.0]
+            assert blocks["S3"][0] is None
+            assert list(blocks["S2"][1]) == ["b", "c"]
+            assert blocks["S2"][2] == "y"
+
+            columnar = project.get_columnar_data_from_ids(["S1"])
+            assert decode(columnar["columns"][0][0], "<f2") == [0.5, 1.5, -2.0]
+
+
+def test_list_encoding_structure_validation():
+    class EncodedProject(DebiAIProject):
+        def get_structure(self):
+            return {"embedding": {"type": "auto", "encoding": "float32"}}
+
+    with pytest.raises(ValueError):
+        ProjectToExpose(EncodedProject(), "invalid").get_columns()
+
+
+def test_parquet_data_provider_reload_while_serving():
+    def write_version(path, version):
+        data = pd.DataFrame(
+            {"sample_id": [f"S{i}" for i in range(50)], "value": [version] * 50}
+        )
+        if version % 2:
+            data["extra"] = "x"
+        # Replaced at once, like a dataset export
+        data.to_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    with create_temp_parquet_file(pd.DataFrame()) as parquet_path:
+        write_version(parquet_path, 0)
+        data_provider = DataProvider()
+        data_provider.add_project(
+            ParquetDataProvider(
+                parquet_path=parquet_path,
+                sample_id_column_name="sample_id",
+                name="reloaded",
+                verbose=False,
+            )
+        )
+        project = data_provider._get_project_to_expose("reloaded")
+        samples_ids = [f"S{i}" for i in range(50)]
+        stop = threading.Event()
+        inconsistent = []
+
+        def read():
+            while not stop.is_set():
+                rows = list(project.get_data_from_ids(samples_ids).values())
+                version = rows[0][0]
+                # The columns and the values of a single version
+                expected_row = [version, "x"] if version % 2 else [version]
+                if any(row != expected_row for row in rows):
+                    inconsistent.append(rows)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        try:
+            for version in range(1, 8):
+                write_version(parquet_path, version)
+                overview = data_provider.reload_project("reloaded")
+                assert overview.nbSamples == 50
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join(10)
+
+        assert inconsistent == []
+        assert project.project.data_version == 7
+        assert project.get_data_from_ids(["S1"]) == {"S1": [7, "x"]}
+
+        # Projects without reload
+        with pytest.raises(ValueError):
+            ProjectToExpose(DebiAIProject(), "other").reload()
@@ -0,0 +1,361 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait
+from debiai_data_provider.data_provider import DataProvider
+from debiai_data_provider.models.project import DebiAIProject, ProjectToExpose
+from tests.test_utils import SamplesProject
+
+RESULTS_STRUCTURE = {
+    "prediction": {"type": "text"},
+    "score": {"type": "number"},
+}
+
+# Structure of the default samples of SamplesProject
+DATA_STRUCTURE = {"class": {"type": "text", "category": "context"}}
+
+
+def test_model_results_cache():
+    project = SamplesProject(results_structure=RESULTS_STRUCTURE)
+    project_to_expose = ProjectToExpose(
+        project, "results", max_results_cache_memory=1024 * 1024
+    )
+
+    results = project_to_expose.get_model_results("m1", ["s1", "s2"])
+    assert results == {"s1": ["m1-s1", 2], "s2": ["m1-s2", 3]}
+    assert project.results_calls == [("m1", ["s1", "s2"])]
+
+    # Only the missing samples are asked to the project
+    results = project_to_expose.get_model_results("m1", ["s3", "s2", "s1"])
+    assert list(results.keys()) == ["s3", "s2", "s1"]
+    assert results["s1"] == ["m1-s1", 2]
+    assert project.results_calls[-1] == ("m1", ["s3"])
+
+    # Fully cached
+    project_to_expose.get_model_results("m1", ["s1", "s2", "s3"])
+    assert len(project.results_calls) == 2
+
+    # Per model invalidation
+    project_to_expose.get_model_results("m2", ["s1"])
+    project_to_expose.invalidate_model_results("m1")
+    assert ("m2", "s1") in project_to_expose.results_cache
+    assert ("m1", "s1") not in project_to_expose.results_cache
+    project_to_expose.get_model_results("m1", ["s1"])
+    assert project.results_calls[-1] == ("m1", ["s1"])
+
+
+class FileOrderResultsProject(DebiAIProject):
+    # Returns the results in the file order, without the missing samples
+    def __init__(self):
+        self.results = pd.DataFrame({"Data ID": ["a", "b", "c"], "score": [10, 20, 30]})
+
+    def get_results_structure(self) -> dict:
+        return {"score": {"type": "number"}}
+
+    def get_model_results(self, model_id, sample_ids):
+        return self.results[self.results["Data ID"].isin(sample_ids)]
+
+
+def test_model_results_matched_by_sample_id():
+    project_to_expose = ProjectToExpose(
+        FileOrderResultsProject(), "results", max_results_cache_memory=1024 * 1024
+    )
+
+    assert project_to_expose.get_model_results("m1", ["c", "a"]) == {
+        "c": [30],
+        "a": [10],
+    }
+    assert project_to_expose.get_model_results("m1", ["zz", "c", "b"]) == {
+        "zz": [None],
+        "c": [30],
+        "b": [20],
+    }
+
+    # Served from the cache
+    assert project_to_expose.results_cache.get(("m1", "zz")) == [None]
+    assert project_to_expose.get_model_results("m1", ["a", "b", "c", "zz"]) == {
+        "a": [10],
+        "b": [20],
+        "c": [30],
+        "zz": [None],
+    }
+
+
+def test_model_results_in_requested_order():
+    # Default RangeIndex, the rows are in the requested order
+    project = FileOrderResultsProject()
+    project.get_model_results = lambda model_id, sample_ids: pd.DataFrame(
+        {"score": [10 * (i + 1) for i in range(len(sample_ids))]}
+    )
+    project_to_expose = ProjectToExpose(project, "results")
+    assert project_to_expose.get_model_results("m1", [5, 3, 1]) == {
+        5: [10],
+        3: [20],
+        1: [30],
+    }
+
+    # Filtered rows without sample ID, the samples without results at the end
+    project.get_model_results = lambda model_id, sample_ids: pd.DataFrame(
+        {"score": [10, 20, 30]}
+    ).iloc[[0, 2]]
+    assert project_to_expose.get_model_results("m1", ["a", "c", "d"]) == {
+        "a": [10],
+        "c": [30],
+        "d": [None],
+    }
+
+
+def test_model_results_without_cache():
+    project = SamplesProject(results_structure=RESULTS_STRUCTURE)
+    project_to_expose = ProjectToExpose(project, "results")
+
+    project_to_expose.get_model_results("m1", ["s1"])
+    project_to_expose.get_model_results("m1", ["s1"])
+    assert len(project.results_calls) == 2
+
+
+class BatchResultsProject(SamplesProject):
+    def __init__(self):
+        super().__init__(results_structure=RESULTS_STRUCTURE)
+        self.batch_calls = []
+
+    def get_models_results(self, model_ids, sample_ids):
+        self.batch_calls.append((list(model_ids), list(sample_ids)))
+        return {
+            model_id: self.get_model_results(model_id, sample_ids).set_axis(sample_ids)
+            for model_id in model_ids
+            if model_id != "unknown"
+        }
+
+
+def test_models_results():
+    # One call by model when the project has no batch method
+    project = SamplesProject(results_structure=RESULTS_STRUCTURE)
+    project_to_expose = ProjectToExpose(project, "results")
+    assert project_to_expose.get_models_results(["m1", "m22"], ["s1"]) == {
+        "m1": {"s1": ["m1-s1", 2]},
+        "m22": {"s1": ["m22-s1", 3]},
+    }
+    assert project.results_calls == [("m1", ["s1"]), ("m22", ["s1"])]
+
+    # A single call, shared with the model results cache
+    project = BatchResultsProject()
+    project_to_expose = ProjectToExpose(
+        project, "results", max_results_cache_memory=1024 * 1024
+    )
+    project_to_expose.get_model_results("m1", ["s1"])
+    results = project_to_expose.get_models_results(
+        ["m1", "m2", "unknown"], ["s2", "s1"]
+    )
+    assert results == {
+        "m1": {"s2": ["m1-s2", 2], "s1": ["m1-s1", 2]},
+        "m2": {"s2": ["m2-s2", 2], "s1": ["m2-s1", 3]},
+        "unknown": {},
+    }
+    assert project.batch_calls == [(["m1", "m2", "unknown"], ["s2", "s1"])]
+
+    # Fully cached, the unknown model results are asked again
+    project_to_expose.get_models_results(["m1", "m2"], ["s1", "s2"])
+    assert len(project.batch_calls) == 1
+
+
+class FileOrderBatchResultsProject(FileOrderResultsProject):
+    def get_models_results(self, model_ids, sample_ids):
+        return {
+            model_id: self.get_model_results(model_id, sample_ids).set_index("Data ID")
+            for model_id in model_ids
+        }
+
+
+def test_models_results_shared_cache():
+    # Both routes fill the same cache, matching the rows by sample ID
+    project_to_expose = ProjectToExpose(
+        FileOrderBatchResultsProject(),
+        "results",
+        max_results_cache_memory=1024 * 1024,
+    )
+    assert project_to_expose.get_model_results("m1", ["c", "zz"]) == {
+        "c": [30],
+        "zz": [None],
+    }
+    assert project_to_expose.get_models_results(["m1", "m2"], ["zz", "b", "c"]) == {
+        "m1": {"zz": [None], "b": [20], "c": [30]},
+        "m2": {"zz": [None], "b": [20], "c": [30]},
+    }
+    assert project_to_expose.get_model_results("m2", ["c", "a", "b"]) == {
+        "c": [30],
+        "a": [10],
+        "b": [20],
+    }
+
+
+def test_get_data_from_ids():
+    project = SamplesProject(structure=DATA_STRUCTURE)
+    project_to_expose = ProjectToExpose(project, "data")
+
+    assert project_to_expose.get_data_id_list(1, 2) == ["s2", "s3"]
+    assert project_to_expose.get_data_from_ids(["s3", "s1", "s3"]) == {
+        "s3": ["C"],
+        "s1": ["A"],
+    }
+    assert project.data_calls == [["s3", "s1"]]
+
+
+def test_analysis_sessions():
+    project = SamplesProject(structure=DATA_STRUCTURE)
+    project_to_expose = ProjectToExpose(project, "data")
+
+    # The sample IDs ordering is pinned at the analysis start
+    assert project_to_expose.get_data_id_list(0, 0, "a1", analysisStart=True) == ["s1"]
+    project.data = project.data.iloc[::-1]
+    assert project_to_expose.get_data_id_list(1, 2, "a1", analysisEnd=True) == [
+        "s2",
+        "s3",
+    ]
+    assert project_to_expose.get_data_id_list(0, 0) == ["s3"]
+
+    stats = project_to_expose.analysis_sessions.get_stats()
+    assert stats["nbAnalyses"] == 1
+    assert stats["analyses"][0]["id"] == "a1"
+
+    # The session is released at the end of the analysis
+    data = project_to_expose.get_data_from_ids(["s1"], "a1", analysisEnd=True)
+    assert data == {"s1": ["A"]}
+    assert len(project_to_expose.analysis_sessions) == 0
+
+    # Idle sessions are released
+    project_to_expose.analysis_sessions.idle_timeout = -1
+    project_to_expose.get_data_id_list(0, 0, "a2", analysisStart=True)
+    assert project_to_expose.analysis_sessions.get_stats()["nbAnalyses"] == 0
+
+
+def test_idle_analyses_of_other_projects():
+    data_provider = DataProvider(analysis_idle_timeout=600)
+    data_provider.add_project(SamplesProject(structure=DATA_STRUCTURE, name="data"))
+    data_provider.add_project(SamplesProject(structure=DATA_STRUCTURE, name="other"))
+    project_to_expose = data_provider._get_project_to_expose("data")
+    other_project_to_expose = data_provider._get_project_to_expose("other")
+
+    # Abandoned analysis, its project is not used anymore
+    project_to_expose.get_data_id_list(0, 0, "a1", analysisStart=True)
+    project_to_expose.get_data_from_ids(["s1"], "a1")
+    assert len(project_to_expose.analysis_sessions) == 1
+
+    # Released by the analyses of the other projects
+    project_to_expose.analysis_sessions.idle_timeout = -1
+    other_project_to_expose.get_data_id_list(0, 0, "a2", analysisStart=True)
+    assert len(project_to_expose.analysis_sessions) == 0
+    assert len(other_project_to_expose.analysis_sessions) == 1
+
+
+def test_prefetch_blocks():
+    project = SamplesProject(structure=DATA_STRUCTURE)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        project_to_expose = ProjectToExpose(
+            project, "data", prefetch_executor=executor, prefetch_chunk_size=2
+        )
+
+        project_to_expose.get_data_id_list(0, 2, "a1", analysisStart=True)
+        session = project_to_expose.analysis_sessions.get("a1")
+        wait(session.tasks, timeout=5)
+        assert project.data_calls == [["s1", "s2"], ["s3"]]
+        assert len(session.blocks) == 3
+
+        # The blocks are served from the prefetched ones
+        data = project_to_expose.get_data_from_ids(["s1", "s2", "s3"], "a1")
+        assert data == {"s1": ["A"], "s2": ["B"], "s3": ["C"]}
+        assert len(project.data_calls) == 2
+        assert len(session.blocks) == 0
+
+        # Ending the analysis cancels the prefetch
+        project_to_expose.get_data_from_ids(["s1"], "a1", analysisEnd=True)
+        assert session.cancelled.is_set()
+
+
+def test_get_columnar_data_from_ids():
+    project = SamplesProject(structure=DATA_STRUCTURE)
+    project.data["value"] = [10, 20, 30]
+    project_to_expose = ProjectToExpose(project, "data")
+    project.get_structure = lambda: {
+        "class": {"type": "text", "category": "context"},
+        "value": {"type": "number", "category": "other"},
+        "missing": {"type": "number", "category": "other"},
+    }
+
+    data = project_to_expose.get_columnar_data_from_ids(["s3", "s1"])
+    assert data == {
+        "ids": ["s3", "s1"],
+        "columns": [["C", "A"], [30, 10], [None, None]],
+    }
+    assert type(data["columns"][1][0]) is int
+
+    # Same values as the rows
+    rows = project_to_expose.get_data_from_ids(["s3", "s1"])
+    assert rows == {"s3": ["C", 30, None], "s1": ["A", 10, None]}
+
+
+class VersionedProject(SamplesProject):
+    def __init__(self):
+        super().__init__(structure=DATA_STRUCTURE)
+        self.version = 1
+        self.nb_models_calls = 0
+
+    def get_version(self):
+        return self.version
+
+    def get_models(self):
+        self.nb_models_calls += 1
+        return [{"id": f"m{i}"} for i in range(self.version)]
+
+
+def test_cached_overview():
+    project = VersionedProject()
+    project_to_expose = ProjectToExpose(project, "data")
+
+    assert project_to_expose.get_overview().nbModels == 1
+    assert project_to_expose.get_overview().nbModels == 1
+    assert project.nb_models_calls == 1
+
+    # Computed again when the project version changes
+    project.version = 2
+    assert project_to_expose.is_overview_stale()
+    assert project_to_expose.get_overview().nbModels == 2
+    assert project.nb_models_calls == 2
+
+    # Projects without version are refreshed after a maximum age
+    project.get_version = lambda: None
+    project_to_expose.refresh_overview()
+    assert not project_to_expose.is_overview_stale()
+    project_to_expose.overview_max_age = -1
+    assert project_to_expose.is_overview_stale()
+
+
+def test_overviews_background_refresh():
+    projects = [VersionedProject() for _ in range(3)]
+    data_provider = DataProvider()
+    for i, project in enumerate(projects):
+        project.name = f"project {i}"
+        data_provider.add_project(project)
+
+    # Computed concurrently on the first request
+    overviews = data_provider.get_overviews()
+    assert list(overviews.keys()) == ["project 0", "project 1", "project 2"]
+    assert [project.nb_models_calls for project in projects] == [1, 1, 1]
+
+    # The stale overview is served while it is refreshed
+    projects[1].version = 3
+    assert data_provider.get_overviews()["project 1"].nbModels == 1
+    data_provider.overview_executor.shutdown(wait=True)
+    assert data_provider.get_overviews()["project 1"].nbModels == 3
+    assert [project.nb_models_calls for project in projects] == [1, 2, 1]
+
+
+def test_rich_table_memory_scan():
+    project = SamplesProject(structure=DATA_STRUCTURE)
+    memory_scans = []
+
+    def get_memory_details():
+        memory_scans.append(True)
+        return {"data": 1024, "indexes": 1024}
+
+    project.get_memory_details = get_memory_details
+    ProjectToExpose(project, "data").get_rich_table()
+    assert len(memory_scans) == 1
@@ -0,0 +1,62 @@
+from debiai_data_provider.models.project import ProjectToExpose
+from debiai_data_provider.utils.request_limits import RequestLimitsTuner
+from tests.test_utils import SamplesProject
+
+
+def create_wide_project(nb_columns: int) -> SamplesProject:
+    # 100 samples with nb_columns text columns
+    return SamplesProject(
+        {
+            "Data ID": [f"s{i}" for i in range(100)],
+            **{f"col_{i}": [f"value {i}"] * 100 for i in range(nb_columns)},
+        },
+        {f"col_{i}": {"type": "text", "category": "other"} for i in range(nb_columns)},
+    )
+
+
+def test_request_limits_tuner():
+    tuner = RequestLimitsTuner(
+        default_sample_data_by_request=2000,
+        default_result_by_request=5000,
+        target_response_size=10000,
+    )
+    assert tuner.get_sample_data_by_request() == 2000
+
+    # 100 bytes by sample
+    tuner.record("data", {"s1": ["x" * 89]}, duration=0.1)
+    assert tuner.get_sample_data_by_request() == 100
+    assert tuner.get_result_by_request() == 5000
+
+    # The size is measured again after size_measure_interval responses
+    for _ in range(tuner.size_measure_interval - 2):
+        tuner.record("data", {"s1": ["x" * 989]}, duration=0.1)
+    assert tuner.get_sample_data_by_request() == 100
+    tuner.record("data", {"s1": ["x" * 989]}, duration=0.1)
+    assert tuner.get_stats()["data"]["bytesBySample"] == 100 + 0.3 * 900
+
+    # Targeting a latency
+    tuner.target_response_size = None
+    tuner.target_response_time = 1
+    assert tuner.get_sample_data_by_request() == 10
+
+
+def test_project_details_tuned_limits():
+    limits = {}
+    for nb_columns in [5, 100]:
+        project_to_expose = ProjectToExpose(
+            create_wide_project(nb_columns),
+            "wide",
+            limits_tuner=RequestLimitsTuner(
+                default_sample_data_by_request=2000,
+                default_result_by_request=5000,
+                target_response_size=1024 * 1024,
+            ),
+        )
+        details = project_to_expose.get_details()
+        limits[nb_columns] = details.maxSampleDataByRequest
+
+    assert limits[5] > limits[100] * 10
+    assert (
+        ProjectToExpose(create_wide_project(5), "wide").get_details().maxResultByRequest
+        is None
+    )
@@ -0,0 +1,77 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from debiai_data_provider.utils.rw_lock import ReadWriteLock
+
+
+def test_read_write_lock():
+    lock = ReadWriteLock()
+    events = []
+    reading = threading.Event()
+    release_reader = threading.Event()
+
+    def reader():
+        with lock.read():
+            reading.set()
+            release_reader.wait(5)
+            # Reentrant, even with a waiting writer
+            with lock.read():
+                events.append("read")
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    def late_reader():
+        with lock.read():
+            events.append("late read")
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    reading.wait(5)
+
+    # The writer waits for the reader
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    while lock.get_stats()["waitingWriters"] == 0:
+        time.sleep(0.001)
+
+    # New readers wait for the waiting writer
+    late_reader_thread = threading.Thread(target=late_reader)
+    late_reader_thread.start()
+    late_reader_thread.join(0.05)
+    assert late_reader_thread.is_alive()
+
+    release_reader.set()
+    for thread in [reader_thread, writer_thread, late_reader_thread]:
+        thread.join(5)
+    assert events == ["read", "write", "late read"]
+    assert lock.get_stats() == {"readers": 0, "writing": False, "waitingWriters": 0}
+
+
+def test_read_write_lock_hammer():
+    lock = ReadWriteLock()
+    state = {"a": 0, "b": 0}
+    inconsistent = []
+
+    def write(i):
+        with lock.write():
+            state["a"] = i
+            time.sleep(0)
+            state["b"] = i
+
+    def read(_):
+        with lock.read():
+            a = state["a"]
+            time.sleep(0)
+            if state["b"] != a:
+                inconsistent.append((a, state["b"]))
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        for i in range(2000):
+            executor.submit(write if i % 10 == 0 else read, i)
+
+    # The writes run concurrently, in no given order
+    assert inconsistent == []
+    assert state["a"] == state["b"]
+    assert state["a"] in range(0, 2000, 10)
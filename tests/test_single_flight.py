@@ -0,0 +1,85 @@
+import threading
+import pytest
+from debiai_data_provider.utils.single_flight import SingleFlight
+
+
+def test_single_flight_do():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(single_flight.do("key", compute))
+    )
+    leader.start()
+    started.wait(5)
+
+    followers = [
+        threading.Thread(
+            target=lambda: results.append(single_flight.do("key", compute))
+        )
+        for _ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ["result"] * 4
+    assert single_flight.in_flight() == 0
+
+
+def test_single_flight_do_many():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    computed_keys = []
+
+    def compute(keys):
+        computed_keys.append(list(keys))
+        started.set()
+        release.wait(5)
+        return {key: key * 10 for key in keys if key != 4}
+
+    results = {}
+    first = threading.Thread(
+        target=lambda: results.update(first=single_flight.do_many([1, 2, 3], compute))
+    )
+    first.start()
+    started.wait(5)
+
+    # Overlapping keys are only computed once
+    second = threading.Thread(
+        target=lambda: results.update(
+            second=single_flight.do_many([2, 3, 4, 5], compute)
+        )
+    )
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert computed_keys == [[1, 2, 3], [4, 5]]
+    assert results["first"] == {1: 10, 2: 20, 3: 30}
+    assert results["second"] == {2: 20, 3: 30, 5: 50}
+
+
+def test_single_flight_errors():
+    single_flight = SingleFlight()
+
+    def compute(keys):
+        raise KeyError("Sample not found")
+
+    with pytest.raises(KeyError):
+        single_flight.do_many(["s1"], compute)
+    assert single_flight.in_flight() == 0
@@ -0,0 +1,201 @@
+import sqlite3
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from debiai_data_provider.models.project import ProjectToExpose
+from debiai_data_provider.providers.sql_data_provider import SQLiteDataProvider
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = str(tmp_path / "project.db")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE samples (sample_id TEXT, label TEXT, value REAL, hidden TEXT)"
+    )
+    connection.executemany(
+        "INSERT INTO samples VALUES (?, ?, ?, ?)",
+        [(f"s{i}", f"label {i % 3}", i / 2, "x") for i in range(50)],
+    )
+    connection.execute(
+        "CREATE TABLE results (model_id TEXT, sample_id TEXT, prediction TEXT)"
+    )
+    connection.executemany(
+        "INSERT INTO results VALUES (?, ?, ?)",
+        [("m1", f"s{i}", f"p{i}") for i in range(0, 50, 2)]
+        + [("m2", "s1", "p1"), ("m2", "unknown", "p")],
+    )
+    connection.execute("CREATE VIEW samples_view AS SELECT * FROM samples")
+    connection.commit()
+    connection.close()
+    return path
+
+
+def test_sql_data_provider(database_path):
+    provider = SQLiteDataProvider(
+        database_path=database_path,
+        table="samples",
+        sample_id_column_name="sample_id",
+        ignored_columns=["hidden"],
+        results_table="results",
+        max_sample_data_by_request=7,
+    )
+
+    assert list(provider.get_structure().keys()) == ["label", "value"]
+    assert list(provider.get_results_structure().keys()) == ["prediction"]
+    assert provider.get_nb_samples() == 50
+    assert len(provider.get_samples_ids()) == 50
+
+    # Read by batches of 7 samples, in the requested order
+    samples_ids = [f"s{i}" for i in range(49, 9, -1)]
+    data = provider.get_data(samples_ids)
+    assert data.index.tolist() == samples_ids
+    assert data["value"].tolist() == [i / 2 for i in range(49, 9, -1)]
+
+    # Models
+    assert provider.get_models() == [
+        {"id": "m1", "name": "m1", "nb_results": 25},
+        {"id": "m2", "name": "m2", "nb_results": 2},
+    ]
+    assert provider.get_model_evaluated_data_id_list("m2") == ["s1"]
+    results = provider.get_model_results("m1", ["s8", "s3", "s2"])
+    assert results["prediction"].to_dict() == {"s8": "p8", "s2": "p2"}
+
+    # A single query for several models
+    models_results = provider.get_models_results(["m1", "m2"], ["s1", "s2", "s3"])
+    assert models_results["m1"]["prediction"].to_dict() == {"s2": "p2"}
+    assert models_results["m2"]["prediction"].to_dict() == {"s1": "p1"}
+
+    # Exposed to DebiAI
+    project = ProjectToExpose(provider, "sql")
+    assert project.get_data_from_ids(["s4", "s1"]) == {
+        "s4": ["label 1", 2.0],
+        "s1": ["label 1", 0.5],
+    }
+    assert project.get_model_results("m1", ["s8", "s3", "s2"]) == {
+        "s8": ["p8"],
+        "s3": [None],
+        "s2": ["p2"],
+    }
+    provider.close()
+
+
+def test_sql_data_provider_integer_models(tmp_path):
+    path = str(tmp_path / "project.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE samples (sample_id TEXT, value REAL)")
+    connection.executemany(
+        "INSERT INTO samples VALUES (?, ?)", [("s1", 1.0), ("s2", 2.0)]
+    )
+    connection.execute(
+        "CREATE TABLE results (model_id INTEGER, sample_id TEXT, score REAL)"
+    )
+    connection.executemany(
+        "INSERT INTO results VALUES (?, ?, ?)",
+        [(1, "s1", 0.1), (1, "s2", 0.2), (2, "s2", 0.4)],
+    )
+    connection.commit()
+    connection.close()
+
+    provider = SQLiteDataProvider(
+        database_path=path,
+        table="samples",
+        sample_id_column_name="sample_id",
+        results_table="results",
+    )
+
+    # The model IDs given by get_models are sent back by the clients
+    models_ids = [model["id"] for model in provider.get_models()]
+    assert models_ids == ["1", "2"]
+
+    project = ProjectToExpose(provider, "sql")
+    assert project.get_models_results(models_ids, ["s2", "s1"]) == {
+        "1": {"s2": [0.2], "s1": [0.1]},
+        "2": {"s2": [0.4], "s1": [None]},
+    }
+    assert project.get_model_results("2", ["s2", "s1"]) == {
+        "s2": [0.4],
+        "s1": [None],
+    }
+    provider.close()
+
+
+def test_sql_data_provider_indexes(database_path, capsys):
+    # The database is not modified by default
+    provider = SQLiteDataProvider(
+        database_path=database_path,
+        table="samples",
+        sample_id_column_name="sample_id",
+        results_table="results",
+        verbose=False,
+    )
+    with provider.pool.connection() as connection:
+        assert not provider.is_indexed(connection, "samples", "sample_id")
+    assert "'sample_id' of 'samples' is not indexed" in capsys.readouterr().out
+    provider.close()
+
+    provider = SQLiteDataProvider(
+        database_path=database_path,
+        table="samples",
+        sample_id_column_name="sample_id",
+        results_table="results",
+        create_indexes=True,
+    )
+    with provider.pool.connection() as connection:
+        assert provider.is_indexed(connection, "samples", "sample_id")
+        assert provider.is_indexed(connection, "results", "model_id")
+        query_plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM samples WHERE sample_id IN (?, ?)",
+            ("s1", "s2"),
+        ).fetchall()
+    assert "USING INDEX" in " ".join(str(step[-1]) for step in query_plan)
+
+    # Views can't be indexed, their lookups still work
+    view_provider = SQLiteDataProvider(
+        database_path=database_path,
+        table="samples_view",
+        sample_id_column_name="sample_id",
+    )
+    assert view_provider.get_data(["s3"])["label"].tolist() == ["label 0"]
+
+
+def test_sql_data_provider_concurrent_requests(database_path):
+    provider = SQLiteDataProvider(
+        database_path=database_path,
+        table="samples",
+        sample_id_column_name="sample_id",
+        pool_size=2,
+    )
+
+    def get_values(i):
+        return provider.get_data([f"s{i}", f"s{i + 1}"])["value"].tolist()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(executor.map(get_values, range(40)))
+
+    assert values == [[i / 2, (i + 1) / 2] for i in range(40)]
+    assert provider.pool._nb_connections <= 2
+
+
+def test_sql_data_provider_bad_configurations(database_path):
+    with pytest.raises(ValueError):
+        SQLiteDataProvider(
+            database_path=database_path,
+            table="missing",
+            sample_id_column_name="sample_id",
+        )
+
+    with pytest.raises(ValueError):
+        SQLiteDataProvider(
+            database_path=database_path,
+            table="samples",
+            sample_id_column_name="id",
+        )
+
+    with pytest.raises(ValueError):
+        SQLiteDataProvider(
+            database_path=database_path,
+            table="samples",
+            sample_id_column_name="sample_id",
+            results_table="results",
+            model_id_column_name="model",
+        )
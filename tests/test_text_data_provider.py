@@ -0,0 +1,143 @@
+import os
+import json
+import tempfile
+import pytest
+from debiai_data_provider.models.project import ProjectToExpose
+from debiai_data_provider.providers.text_data_provider import (
+    TextDataProvider,
+    TextFileIndex,
+)
+
+
+def write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as jsonl_file:
+        jsonl_file.write("\n".join(json.dumps(record) for record in records))
+
+
+def test_jsonl_data_provider(tmp_path):
+    path = str(tmp_path / "labels.jsonl")
+    write_jsonl(
+        path,
+        [
+            {"id": f"s{i}", "label": f"l{i % 2}", "score": i / 4, "box": [i, i + 1]}
+            for i in range(20)
+        ],
+    )
+
+    provider = TextDataProvider(
+        file_path=path, sample_id_column_name="id", ignored_columns=["score"]
+    )
+    assert provider.name == "labels"
+    assert list(provider.get_structure().keys()) == ["label", "box"]
+    assert provider.get_nb_samples() == 20
+    assert provider.get_samples_ids()[:3] == ["s0", "s1", "s2"]
+
+    # Only the requested lines are read, in the requested order
+    data = provider.get_data(["s19", "s3", "s19"])
+    assert data.index.tolist() == ["s19", "s3", "s19"]
+    assert data["box"].tolist() == [[19, 20], [3, 4], [19, 20]]
+
+    assert provider.get_memory_details()["indexes"] > 0
+
+    project = ProjectToExpose(provider, "jsonl")
+    assert project.get_data_from_ids(["s2", "s5"]) == {
+        "s2": ["l0", [2, 3]],
+        "s5": ["l1", [5, 6]],
+    }
+
+    with pytest.raises(KeyError):
+        provider.get_data(["unknown"])
+
+
+def test_csv_data_provider(tmp_path):
+    path = str(tmp_path / "labels.csv")
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        csv_file.write("id,label,count\r\n")
+        csv_file.write('001,"cat, black",3\r\n')
+        csv_file.write("002,dog,4\r\n")
+        csv_file.write("\r\n")
+        csv_file.write("003,bird,5")
+
+    provider = TextDataProvider(file_path=path, sample_id_column_name="id")
+    assert provider.get_samples_ids() == ["001", "002", "003"]
+    assert list(provider.get_structure().keys()) == ["label", "count"]
+
+    data = provider.get_data(["003", "001"])
+    assert data["label"].tolist() == ["bird", "cat, black"]
+    assert data["count"].tolist() == [5, 3]
+
+
+def test_text_data_provider_dtypes(tmp_path):
+    # The dtypes of the whole file, whatever the lines of the block
+    path = str(tmp_path / "labels.csv")
+    with open(path, "w", encoding="utf-8") as csv_file:
+        csv_file.write("id,score,code\n")
+        csv_file.write("".join(f"s{i},{i},00{i}\n" for i in range(5)))
+        csv_file.write("s5,2.5,x\n")
+
+    provider = TextDataProvider(
+        file_path=path, sample_id_column_name="id", cache_dir=str(tmp_path)
+    )
+    data = provider.get_data(["s1", "s2"])
+    assert data["score"].dtype == "float64"
+    assert data["code"].tolist() == ["001", "002"]
+
+    # Also when loaded from the stored index
+    provider = TextDataProvider(
+        file_path=path, sample_id_column_name="id", cache_dir=str(tmp_path)
+    )
+    assert provider.get_data(["s3"])["code"].tolist() == ["003"]
+
+    path = str(tmp_path / "labels.jsonl")
+    write_jsonl(
+        path,
+        [{"id": "s0", "score": 1}, {"id": "s1", "score": None}, {"id": "s2"}],
+    )
+    provider = TextDataProvider(
+        file_path=path, sample_id_column_name="id", cache_dir=str(tmp_path)
+    )
+    assert provider.get_data(["s0"])["score"].dtype == "float64"
+
+
+def test_text_data_provider_persistent_index(tmp_path, monkeypatch):
+    path = str(tmp_path / "labels.jsonl")
+    write_jsonl(path, [{"id": f"s{i}", "value": i} for i in range(10)])
+
+    # Stored in the temporary directory by default, not next to the file
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "tmp"))
+    TextDataProvider(file_path=path, sample_id_column_name="id")
+    assert os.listdir(tmp_path / "tmp" / "debiai_data_provider")
+    assert sorted(os.listdir(tmp_path)) == ["labels.jsonl", "tmp"]
+
+    # The next startups do not scan the file
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            TextFileIndex,
+            "build",
+            lambda self: pytest.fail("The file should not be scanned"),
+        )
+        provider = TextDataProvider(file_path=path, sample_id_column_name="id")
+        assert provider.get_data(["s7"])["value"].tolist() == [7]
+
+    # Scanned again when the file changes
+    write_jsonl(path, [{"id": f"s{i}", "value": i * 10} for i in range(12)])
+    os.utime(path, ns=(0, 0))
+    provider = TextDataProvider(file_path=path, sample_id_column_name="id")
+    assert provider.get_nb_samples() == 12
+    assert provider.get_data(["s11"])["value"].tolist() == [110]
+
+
+def test_text_data_provider_bad_configurations(tmp_path):
+    path = str(tmp_path / "labels.jsonl")
+    write_jsonl(path, [{"id": "s1"}, {"id": "s1"}])
+
+    with pytest.raises(ValueError):
+        TextDataProvider(file_path=path, sample_id_column_name="sample_id")
+
+    with pytest.raises(ValueError):
+        TextDataProvider(file_path=path, sample_id_column_name="id")
+
+    with pytest.raises(ValueError):
+        TextDataProvider(
+            file_path=str(tmp_path / "labels.txt"), sample_id_column_name="id"
+        )
@@ -0,0 +1,150 @@
+import json
+import asyncio
+import pytest
+from fastapi import FastAPI
+from debiai_data_provider.data_provider import DataProvider
+from debiai_data_provider.controller.middleware import TracingMiddleware
+from debiai_data_provider.controller.routes import router
+from debiai_data_provider.models.project import ProjectToExpose
+from debiai_data_provider.utils.tracing import (
+    InMemorySpanExporter,
+    JsonLinesSpanExporter,
+    configure_tracing,
+    get_current_span,
+    span,
+)
+from tests.test_utils import SamplesProject
+
+
+@pytest.fixture
+def collector():
+    collector = InMemorySpanExporter()
+    configure_tracing([collector])
+    yield collector
+    configure_tracing([])
+
+
+class TracedProject(SamplesProject):
+    def __init__(self):
+        super().__init__(
+            {"Data ID": ["s1", "s2"], "value": [1, 2]},
+            {"value": {"type": "number", "category": "other"}},
+            name="traced",
+        )
+
+    async def get_data(self, samples_ids):
+        # Child span opened by the project code
+        with span("database.query", table="samples"):
+            await asyncio.sleep(0)
+        return self.data[self.data["Data ID"].isin(samples_ids)]
+
+
+def test_spans(collector, tmp_path):
+    with span("root", kind="test") as root:
+        assert get_current_span() is root
+        with span("child") as child:
+            child.set_attribute("nbSamples", 3)
+        with pytest.raises(ValueError):
+            with span("failed"):
+                raise ValueError("bad sample")
+    assert get_current_span() is None
+
+    spans = {s["name"]: s for s in collector.get_spans()}
+    assert [s["name"] for s in collector.get_spans()] == ["child", "failed", "root"]
+    assert spans["child"]["parentId"] == spans["root"]["spanId"]
+    assert spans["child"]["traceId"] == spans["root"]["traceId"]
+    assert spans["child"]["attributes"] == {"nbSamples": 3}
+    assert spans["failed"]["error"] == "ValueError: bad sample"
+    assert spans["root"]["duration"] >= spans["child"]["duration"]
+    assert len(collector.get_traces()) == 1
+
+    # Exported to a local file
+    path = str(tmp_path / "spans.jsonl")
+    exporter = JsonLinesSpanExporter(path)
+    configure_tracing([exporter])
+    with span("root"):
+        with span("child"):
+            pass
+    exporter.close()
+    with open(path, "r", encoding="utf-8") as spans_file:
+        lines = [json.loads(line) for line in spans_file]
+    assert [line["name"] for line in lines] == ["child", "root"]
+
+    # Disabled
+    configure_tracing([])
+    with span("ignored") as ignored:
+        ignored.set_attribute("key", "value")
+        assert get_current_span() is None
+
+
+def test_project_spans(collector):
+    project_to_expose = ProjectToExpose(TracedProject(), "traced")
+    with span("request"):
+        project_to_expose.get_data_from_ids(["s1"])
+
+    spans = {s["name"]: s for s in collector.get_spans()}
+    assert set(spans) == {
+        "request",
+        "project.validate_columns",
+        "project.get_data",
+        "database.query",
+        "build_blocks",
+    }
+    assert spans["database.query"]["parentId"] == spans["project.get_data"]["spanId"]
+    assert spans["build_blocks"]["parentId"] == spans["request"]["spanId"]
+
+
+def test_request_trace():
+    data_provider = DataProvider(trace_memory_spans=100)
+    data_provider.add_project(TracedProject())
+    app = FastAPI()
+    app.state.data_provider = data_provider
+    app.include_router(router)
+    app = TracingMiddleware(app, data_provider.tracer)
+
+    # Each provider exports the spans of its own requests
+    other_data_provider = DataProvider(trace_memory_spans=100)
+
+    async def call():
+        body = json.dumps({"sampleIds": ["s1", "s2"]}).encode()
+        messages = []
+
+        async def receive():
+            if not messages:
+                messages.append(None)
+                return {"type": "http.request", "body": body}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        path = "/projects/traced/blocksFromSampleIds"
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "headers": [(b"content-type", b"application/json")],
+            "server": ("test", 80),
+            "client": ("test", 1234),
+        }
+        await app(scope, receive, send)
+
+    asyncio.run(call())
+
+    # The async get_data of the project runs on the event loop, in the request trace
+    traces = list(data_provider.get_traces().values())
+    assert len(traces) == 1
+    assert other_data_provider.get_traces() == {}
+    spans = {s["name"]: s for s in traces[0]}
+    assert spans["http.request"]["attributes"]["statusCode"] == 200
+    assert spans["http.request"]["parentId"] is None
+    assert spans["database.query"]["parentId"] == spans["project.get_data"]["spanId"]
+
+    # The dataMap blocks are encoded in the request trace
+    assert spans["encode_response"]["attributes"] == {"nbSamples": 2}
+    assert spans["encode_response"]["parentId"] == spans["http.request"]["spanId"]
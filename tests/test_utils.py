@@ -1,6 +1,70 @@
 import os
+import time
+import pandas as pd
 from tempfile import TemporaryDirectory
 from contextlib import contextmanager
+from debiai_data_provider.models.project import DebiAIProject
+
+
+class SamplesProject(DebiAIProject):
+    """
+    Test project serving the samples of a dataframe with a "Data ID" column,
+    and generated model results. The requested samples are recorded.
+    """
+
+    def __init__(
+        self,
+        data=None,
+        structure=None,
+        results_structure=None,
+        name=None,
+        delay: float = 0,
+    ):
+        """
+        Parameters:
+            data (dict): Columns of the samples, 3 samples with a class by default.
+            structure (dict): Structure of the data columns, "auto" by default.
+            results_structure (dict): Structure of the "prediction" and "score"
+                results, the project has no results by default.
+            name (str): Name of the project, its class name by default.
+            delay (float): Seconds spent by each get_data call.
+        """
+        if data is None:
+            data = {"Data ID": ["s1", "s2", "s3"], "class": ["A", "B", "C"]}
+        self.data = pd.DataFrame(data)
+        self.structure = structure or {
+            column: {"type": "auto", "category": "other"}
+            for column in self.data.columns
+            if column != "Data ID"
+        }
+        self.results_structure = results_structure or {}
+        self.name = name
+        self.delay = delay
+        self.data_calls = []
+        self.results_calls = []
+
+    def get_structure(self) -> dict:
+        return self.structure
+
+    def get_results_structure(self) -> dict:
+        return self.results_structure
+
+    def get_samples_ids(self):
+        return self.data["Data ID"].tolist()
+
+    def get_data(self, samples_ids):
+        self.data_calls.append(list(samples_ids))
+        time.sleep(self.delay)
+        return self.data[self.data["Data ID"].isin(samples_ids)]
+
+    def get_model_results(self, model_id, sample_ids):
+        self.results_calls.append((model_id, list(sample_ids)))
+        return pd.DataFrame(
+            {
+                "score": [len(model_id) + i for i in range(len(sample_ids))],
+                "prediction": [f"{model_id}-{s_id}" for s_id in sample_ids],
+            }
+        )
 
 
 @contextmanager
@@ -26,3 +90,22 @@ def create_temp_results_folder(results_dict):
             model_path = os.path.join(temp_dir, f"{model_name}.parquet")
             dataframe.to_parquet(model_path)
         yield temp_dir
+
+
+@contextmanager
+def create_temp_partitioned_dataset(dataframe, partition_cols, row_group_size=None):
+    """
+    Context manager to create a temporary hive partitioned parquet dataset.
+    Automatically cleans up the temporary folder on exit.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with TemporaryDirectory() as temp_dir:
+        pq.write_to_dataset(
+            pa.Table.from_pandas(dataframe, preserve_index=False),
+            temp_dir,
+            partition_cols=partition_cols,
+            row_group_size=row_group_size,
+        )
+        yield temp_dir